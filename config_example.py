@@ -12,4 +12,43 @@ API_KEY = "YOUR_API_KEY_HERE"
 # API 基础URL（一般不需要修改）
 BASE_URL = "https://api.materialsproject.org"
 
+# 以下为可选配置（不填写时使用默认值）
+# 每秒最多请求数，所有并发线程共享（Materials Project API 配额约为 25 次/秒）
+RATE_LIMIT = 25
+
+# 最大并发请求数（命令行 --workers 可覆盖，1 表示逐个顺序搜索）
+# 实际并发数会在 1 ~ MAX_WORKERS 之间按服务器响应自适应调整
+MAX_WORKERS = 8
+
+# 请求失败（限流 429、服务端错误 5xx、超时）后的最大重试次数
+MAX_RETRIES = 5
+
+# 目标延迟（秒），请求耗时超过该值时自动降低并发
+TARGET_LATENCY = 10.0
+
+# 电子结构接口每批请求的材料数（命令行 --chunk-size 可覆盖）
+ES_CHUNK_SIZE = 50
+
+# 每次搜索请求合并的化学系统数（逗号分隔的 chemsys，结果分页流式读取）
+CHEMSYS_PER_QUERY = 20
+
+# 本地响应缓存（SQLite 文件），命令行 --no-cache 可跳过
+CACHE_FILE = ".mp_cache.sqlite"
+CACHE_TTL_DAYS = 30  # 缓存有效期（天），Materials Project 数据仅在数据库发布时更新
+CACHE_MAX_MB = 512  # 缓存大小上限（MB），超出后淘汰最久未访问的条目
+
+# 断点续传检查点文件，中断后使用命令行 --resume 继续
+CHECKPOINT_FILE = "主流半导体材料数据库.checkpoint.jsonl"
+
+# 筛选规则文件（TOML / YAML / JSON），包含搜索条件与应用潜力评分等级
+# 文件不存在时使用内置默认规则，格式见 screening_rules_example.toml
+SCREENING_RULES_FILE = "screening_rules.toml"
+
+# 本地索引数据库（SQLite），每次运行按 material_id 插入或更新，可用 materials_store 直接查询
+STORE_FILE = "主流半导体材料数据库.sqlite"
+
+# 可视化脚本读取的数据文件（Parquet 目录、.sqlite、.json、.arrow 或 .xlsx），命令行 --data 可覆盖
+# 不填写时依次查找获取脚本输出的 Parquet 数据集、JSON、本地数据库和 Excel
+# DATA_FILE = "主流半导体材料数据库.parquet"
+
 # 注意：请不要将包含真实API Key的config.py文件提交到Git仓库
@@ -0,0 +1,100 @@
+"""
+半导体材料数据库 - 列式数据集读写
+作者: Luffy.Solution
+功能: 将材料数据表写出为按 分类 / 化学系统 分区的 Parquet 数据集（zstd 压缩、保留类型），
+      读取时支持列投影与谓词下推，只读取需要的列和分区
+
+目录结构（Hive 分区，目录名中的中文值由 pyarrow 做 URL 编码）:
+    主流半导体材料数据库.parquet/
+        分类=氮化物/化学系统=Ga-N/<uuid>-0.parquet
+        ...
+
+依赖 pyarrow（可选）：未安装时 HAS_PYARROW 为 False，写出会被跳过。
+"""
+
+import os
+import shutil
+import tempfile
+
+try:
+    import pyarrow  # noqa: F401
+
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+import pandas as pd
+
+PARTITION_COLUMNS = ["分类", "化学系统"]
+
+
+def write_dataset(df, path, partition_cols=PARTITION_COLUMNS, compression="zstd"):
+    """
+    写出分区 Parquet 数据集（先写入临时目录再替换，重复写出不会残留旧分区）
+
+    参数:
+        df: 材料数据表
+        path: 数据集目录
+        partition_cols: 分区列
+        compression: 压缩算法
+    """
+    if not HAS_PYARROW:
+        raise ImportError("写出 Parquet 数据集需要 pyarrow（pip install pyarrow）")
+
+    parent = os.path.dirname(os.path.abspath(path))
+    tmp_dir = tempfile.mkdtemp(prefix=".parquet-", dir=parent)
+    try:
+        df.to_parquet(
+            tmp_dir,
+            engine="pyarrow",
+            partition_cols=list(partition_cols),
+            compression=compression,
+            index=False,
+        )
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.replace(tmp_dir, path)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+
+def dataset_columns(path):
+    """数据集（目录或单个 Parquet 文件）中的全部列名，只读取文件元数据"""
+    if not HAS_PYARROW:
+        raise ImportError("读取 Parquet 数据集需要 pyarrow（pip install pyarrow）")
+    import pyarrow.dataset as ds
+
+    return ds.dataset(path, format="parquet", partitioning="hive").schema.names
+
+
+def read_dataset(path, columns=None, filters=None, memory_map=False):
+    """
+    读取分区 Parquet 数据集
+
+    参数:
+        path: 数据集目录
+        columns: 只读取的列（列投影），None 表示全部
+        filters: 谓词下推条件，如 [("分类", "==", "氮化物"), ("带隙 (eV)", ">", 1.5)]；
+                 分区列上的条件只读取匹配的分区目录
+        memory_map: 以内存映射方式打开文件（按需由操作系统换入页面，不先整体读入内存）
+    """
+    if not HAS_PYARROW:
+        raise ImportError("读取 Parquet 数据集需要 pyarrow（pip install pyarrow）")
+
+    df = pd.read_parquet(
+        path,
+        engine="pyarrow",
+        columns=columns,
+        filters=filters,
+        memory_map=memory_map,
+    )
+    # 分区列读回时为分类类型且位于末尾，转回字符串并恢复原列顺序
+    for col in PARTITION_COLUMNS:
+        if col in df.columns and isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(str)
+    if columns is None:
+        columns = [c for c in PARTITION_COLUMNS if c in df.columns] + [
+            c for c in df.columns if c not in PARTITION_COLUMNS
+        ]
+    return df[list(columns)]
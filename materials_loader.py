@@ -0,0 +1,270 @@
+"""
+半导体材料数据库 - 数据读取
+作者: Luffy.Solution
+功能: 按统一的列定义把获取脚本的输出读取为类型确定的材料数据表（数值列为 float64，
+      缺失为 NaN），支持列投影，只读取和转换需要的列:
+          Parquet 数据集 / 文件     列投影下推到文件，以内存映射方式打开
+          Arrow IPC（.arrow / .feather）  内存映射，未压缩且无缺失的数值列零拷贝
+          本地 SQLite 数据库        只查询需要的字段（materials_store）
+          JSON                      获取脚本保存的原始记录，按列定义转换
+          Excel                     仅作后备（解析最慢）
+
+使用方法:
+    from materials_loader import load_materials
+
+    df = load_materials("主流半导体材料数据库.parquet")
+    df = load_materials("主流半导体材料数据库.sqlite", columns=["分类", "带隙 (eV)"])
+
+    # 原始记录（API 返回的 dict）-> 材料数据表，获取脚本的 create_dataframe 也使用这里
+    df = dataframe_from_records(materials, rules)
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from materials_dataset import HAS_PYARROW, dataset_columns, read_dataset
+from materials_store import BOOLEAN_FIELDS, FIELD_NAMES, MaterialsStore
+from screening_rules import load_rules, to_float_array
+
+# 材料数据表的列定义：(列名, 记录字段, 类型, 字段不存在时的默认值, 小数位)
+#   value  原样保存
+#   float  转为 float 并按小数位四舍五入，缺失为 NaN
+#   flag   真值为 "是"，否则为 "否"
+#   list   以 ", " 连接
+COLUMNS = [
+    ("分类", "category", "value", "Unknown", None),
+    ("化学系统", "chemsys", "value", "Unknown", None),
+    ("材料ID", "material_id", "value", "", None),
+    ("化学式", "formula_pretty", "value", "", None),
+    ("元素组成", "elements", "list", [], None),
+    ("元素数", "nelements", "value", 0, None),
+    ("原子数", "nsites", "value", 0, None),
+    # 电子性质
+    ("带隙 (eV)", "band_gap", "float", None, 3),
+    ("直接带隙", "is_gap_direct", "flag", None, None),
+    ("导带底 CBM (eV)", "cbm", "float", None, 3),
+    ("价带顶 VBM (eV)", "vbm", "float", None, 3),
+    ("费米能级 (eV)", "efermi", "float", None, 3),
+    # 热力学性质
+    ("形成能 (eV/atom)", "formation_energy_per_atom", "float", None, 4),
+    ("能量高于凸包 (eV/atom)", "energy_above_hull", "float", None, 4),
+    # 结构性质
+    ("晶系", "crystal_system", "value", "Unknown", None),
+    ("空间群", "spacegroup_symbol", "value", "Unknown", None),
+    ("密度 (g/cm³)", "density", "float", None, 3),
+    ("体积 (Ų)", "volume", "float", None, 2),
+]
+FLOAT_COLUMNS = [name for name, _, kind, _, _ in COLUMNS if kind == "float"]
+
+# 数据表的行顺序
+SORT_COLUMNS = ["分类", "带隙 (eV)"]
+
+# 扩展名 -> 格式（目录视为分区 Parquet 数据集）
+FORMATS = {
+    ".parquet": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+    ".sqlite": "sqlite",
+    ".db": "sqlite",
+    ".json": "json",
+    ".xlsx": "excel",
+    ".xls": "excel",
+}
+
+
+def detect_format(path):
+    """按路径判断数据格式"""
+    if os.path.isdir(path):
+        return "parquet"
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in FORMATS:
+        raise ValueError(
+            f"无法识别的数据文件格式: {path}（支持 {', '.join(sorted(FORMATS))} 及 Parquet 目录）"
+        )
+    return FORMATS[ext]
+
+
+def _convert(kind, values, decimals):
+    """一列字段值 -> 数据表列"""
+    if kind == "float":
+        return pd.Series(to_float_array(values)).round(decimals)
+    if kind == "flag":
+        return ["是" if value else "否" for value in values]
+    if kind == "list":
+        return [", ".join(value) for value in values]
+    return values
+
+
+def _output_screens(rules, columns, available=None):
+    """
+    需要输出到数据表的应用筛选名称
+
+    参数:
+        rules: 筛选规则
+        columns: 需要的列，None 表示全部
+        available: 可用的字段，None 表示不限；用到其它字段的筛选无法评估，跳过
+    """
+    return [
+        name
+        for name, screen in rules.screens.items()
+        if screen.column
+        and (columns is None or screen.column in columns)
+        and (available is None or screen.fields <= available)
+    ]
+
+
+def _build(get_field, n, rules, columns, available=None):
+    """
+    按列定义构建数据表
+
+    参数:
+        get_field: get_field(字段, 默认值) -> 该字段的取值列表（或数组）
+        n: 行数
+        rules: 筛选规则（RuleSet），输出其中带 column 的应用筛选结果
+        columns: 需要的列，None 表示全部
+        available: 可用的字段，见 _output_screens
+    """
+    wanted = None if columns is None else set(columns)
+    data = {}
+    for name, field, kind, default, decimals in COLUMNS:
+        if wanted is None or name in wanted:
+            data[name] = _convert(kind, get_field(field, default), decimals)
+    df = pd.DataFrame(data, index=pd.RangeIndex(n))
+
+    # 应用潜力评估：一次评估所有需要输出的筛选（使用未四舍五入的原始数值）
+    screens = _output_screens(rules, wanted, available)
+    if screens:
+        fields = set().union(*(rules.screens[name].fields for name in screens))
+        results = rules.evaluate(
+            {field: to_float_array(get_field(field, None)) for field in fields}, screens
+        )
+        for name, labels in results.items():
+            df[rules.screens[name].column] = labels
+
+    by = [col for col in SORT_COLUMNS if col in df.columns]
+    if by:
+        df = df.sort_values(by=by, ascending=[True] * len(by)).reset_index(drop=True)
+    return df
+
+
+def dataframe_from_records(materials, rules=None, columns=None):
+    """
+    原始材料记录 -> 材料数据表
+
+    按列一次性构建：每个字段只遍历一遍记录列表，数值列整体转换为 float
+    并向量化四舍五入，缺失值保存为 NaN。
+
+    参数:
+        materials: 材料记录（dict）列表
+        rules: 筛选规则，None 时使用内置默认规则
+        columns: 需要的列，None 表示全部
+    """
+    if rules is None:
+        rules = load_rules()
+
+    def get_field(field, default):
+        return [mat.get(field, default) for mat in materials]
+
+    return _build(get_field, len(materials), rules, columns)
+
+
+def _read_store(path, columns, rules):
+    """从本地 SQLite 数据库读取：只查询列定义与筛选规则需要的字段"""
+    wanted = None if columns is None else set(columns)
+    fields = {
+        field for name, field, _, _, _ in COLUMNS if wanted is None or name in wanted
+    }
+    # 自定义规则用到数据库中没有的字段时无法评估，对应的列不输出
+    available = set(FIELD_NAMES)
+    for name in _output_screens(rules, wanted, available):
+        fields |= rules.screens[name].fields
+
+    with MaterialsStore(path) as store:
+        frame = store.query_df(columns=[f for f in FIELD_NAMES if f in fields])
+
+    def get_field(field, default):
+        values = frame[field]
+        if field in BOOLEAN_FIELDS:
+            return values.astype(object).where(values.notna(), None).tolist()
+        if field == "elements":
+            return [value if isinstance(value, list) else [] for value in values]
+        if values.dtype.kind == "f":
+            return values.to_numpy()
+        if default is not None:
+            values = values.fillna(default)
+        return values.tolist()
+
+    return _build(get_field, len(frame), rules, columns, available)
+
+
+def _read_json(path, columns, rules):
+    """读取获取脚本保存的 JSON 原始记录"""
+    with open(path, encoding="utf-8") as f:
+        materials = json.load(f)
+    return dataframe_from_records(materials, rules, columns)
+
+
+def _read_parquet(path, columns):
+    """读取 Parquet 数据集 / 文件（列投影，内存映射）"""
+    available = dataset_columns(path)
+    if columns is not None:
+        available = [col for col in columns if col in available]
+    return read_dataset(path, columns=available, memory_map=True)
+
+
+def _read_arrow(path, columns):
+    """读取 Arrow IPC 文件（内存映射，数值列尽量不复制）"""
+    if not HAS_PYARROW:
+        raise ImportError("读取 Arrow 文件需要 pyarrow（pip install pyarrow）")
+    import pyarrow as pa
+
+    # 表中的缓冲区引用映射的内存，映射随表一起释放
+    table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+    if columns is not None:
+        table = table.select([col for col in columns if col in table.column_names])
+    # split_blocks：每列单独成块，无缺失的数值列可直接引用映射的内存
+    return table.to_pandas(split_blocks=True)
+
+
+def _read_excel(path, columns):
+    """读取 Excel（后备：解析最慢）；缺失值显示为 "N/A"，读取时直接转为 NaN"""
+    wanted = None if columns is None else set(columns)
+    usecols = None if wanted is None else (lambda col: col in wanted)
+    return pd.read_excel(path, usecols=usecols, na_values=["N/A"])
+
+
+def load_materials(path, columns=None, rules=None):
+    """
+    读取材料数据表
+
+    参数:
+        path: 数据文件（.parquet / Parquet 目录、.arrow / .feather、.sqlite / .db、
+              .json、.xlsx / .xls）
+        columns: 需要的列（列投影），None 表示全部；数据中没有的列会被忽略
+        rules: JSON / SQLite 计算应用潜力列时使用的筛选规则，None 时使用内置默认规则
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"数据文件不存在: {path}")
+    fmt = detect_format(path)
+    if rules is None:
+        rules = load_rules()
+
+    if fmt == "parquet":
+        df = _read_parquet(path, columns)
+    elif fmt == "arrow":
+        df = _read_arrow(path, columns)
+    elif fmt == "sqlite":
+        df = _read_store(path, columns, rules)
+    elif fmt == "json":
+        df = _read_json(path, columns, rules)
+    else:
+        df = _read_excel(path, columns)
+
+    # 数值列统一为 float64（Excel 中的文本、整数列等）
+    for col in FLOAT_COLUMNS:
+        if col in df.columns and df[col].dtype != np.float64:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype(float)
+    return df
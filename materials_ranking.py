@@ -0,0 +1,233 @@
+"""
+半导体材料数据库 - 多指标排名
+作者: Luffy.Solution
+功能: 按多个指标（与理想带隙的距离、凸包能量、是否直接带隙等）选出前 K 个材料，
+      支持加权求和与字典序两种方式、按分类分别取前 K 个；
+      只做部分选择（argpartition / 大小为 K 的堆），不对全部候选排序
+
+使用方法:
+    from materials_ranking import PV_RANKING, rank, top_k
+
+    # DataFrame：向量化计算得分后部分选择
+    top = rank(df, PV_RANKING, k=10)
+    top_per_category = rank(df, PV_RANKING, k=3, by="分类")
+
+    # 任意可迭代的记录（如 API 返回的 dict、MaterialsStore.query 结果）：流式处理，
+    # 内存占用只与 K 有关
+    criteria = [Criterion("band_gap", target=1.34), Criterion("energy_above_hull", 5)]
+    best = top_k(records, criteria, k=10)
+
+排名规则:
+    每个指标先换算为 "罚分"（越小越好）：
+        target=值      |x - target|
+        prefer=值      等于该值为 0，否则为 1
+        descending=True  -x（越大越好）
+        默认           x（越小越好）
+    缺失值的罚分为无穷大，排在最后
+    mode="weighted"       按 Σ 权重 × 罚分 排序（各指标单位不同，由权重换算）
+    mode="lexicographic"  按指标顺序逐个比较，权重不起作用
+"""
+
+import heapq
+import math
+
+import numpy as np
+import pandas as pd
+
+RANK_MODES = ("weighted", "lexicographic")
+
+
+class Criterion:
+    """
+    排名指标
+
+    参数:
+        column: 列名（DataFrame）或字段名（记录 dict）
+        weight: 加权模式下的权重
+        target: 理想值，罚分为与理想值的距离
+        prefer: 偏好的取值（如 "是" / True），罚分为 0 或 1
+        descending: 为 True 时数值越大越好
+    """
+
+    def __init__(self, column, weight=1.0, target=None, prefer=None, descending=False):
+        self.column = column
+        self.weight = weight
+        self.target = target
+        self.prefer = prefer
+        self.descending = descending
+
+    def __repr__(self):
+        return f"Criterion({self.column!r}, weight={self.weight})"
+
+    def penalties(self, values):
+        """一列取值 -> 罚分数组（缺失为 inf）"""
+        if self.prefer is not None:
+            matched = values.eq(self.prefer).to_numpy(dtype=bool, na_value=False)
+            return np.where(matched, 0.0, 1.0)
+        values = pd.to_numeric(values, errors="coerce").to_numpy(dtype=float)
+        if self.target is not None:
+            values = np.abs(values - self.target)
+        elif self.descending:
+            values = -values
+        return np.where(np.isnan(values), np.inf, values)
+
+    def penalty(self, value):
+        """单个取值 -> 罚分（缺失为 inf）"""
+        if self.prefer is not None:
+            return 0.0 if value == self.prefer else 1.0
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return math.inf
+        if math.isnan(value):
+            return math.inf
+        if self.target is not None:
+            return abs(value - self.target)
+        return -value if self.descending else value
+
+
+# 光伏：带隙接近 Shockley-Queisser 最优值 1.34 eV，其次稳定（0.05 eV/atom 的凸包能量
+# 约相当于 0.25 eV 的带隙偏差），直接带隙优先
+PV_RANKING = [
+    Criterion("带隙 (eV)", target=1.34),
+    Criterion("能量高于凸包 (eV/atom)", weight=5.0),
+    Criterion("直接带隙", weight=0.3, prefer="是"),
+]
+
+# 光催化：带隙接近 2.4 eV（兼顾可见光吸收与水分解所需的过电位），其次稳定
+PC_RANKING = [
+    Criterion("带隙 (eV)", target=2.4),
+    Criterion("能量高于凸包 (eV/atom)", weight=5.0),
+]
+
+
+def _check_mode(mode):
+    if mode not in RANK_MODES:
+        raise ValueError(f"未知的排名方式: {mode}（可选 {', '.join(RANK_MODES)}）")
+
+
+def _keys(df, criteria, mode):
+    """DataFrame -> 排序键数组列表（第一个为主键）"""
+    penalties = [criterion.penalties(df[criterion.column]) for criterion in criteria]
+    if mode == "lexicographic":
+        return penalties
+    score = np.zeros(len(df))
+    for criterion, values in zip(criteria, penalties):
+        if criterion.weight:
+            score += criterion.weight * values
+    return [score]
+
+
+def _top_positions(keys, k):
+    """
+    在排序键上部分选择前 k 个，返回位置数组（按名次排列，并列时保持原顺序）
+
+    先用 argpartition 在主键上找到第 k 小的值，只对不大于该值的候选做排序。
+    """
+    n = len(keys[0])
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.intp)
+    if k < n:
+        kth = np.partition(keys[0], k - 1)[k - 1]
+        candidates = np.flatnonzero(keys[0] <= kth)
+    else:
+        candidates = np.arange(n)
+    # lexsort 以最后一个键为主键，且是稳定排序
+    order = np.lexsort([key[candidates] for key in reversed(keys)])
+    return candidates[order[:k]]
+
+
+def rank(df, criteria, k=10, mode="weighted", by=None):
+    """
+    从 DataFrame 中选出排名前 k 的行
+
+    参数:
+        df: 材料数据表
+        criteria: Criterion 列表
+        k: 每组选出的个数
+        mode: "weighted"（加权求和）或 "lexicographic"（字典序）
+        by: 分组列（如 "分类"），给定时每组各取前 k 个，按组名排列
+    """
+    _check_mode(mode)
+    keys = _keys(df, criteria, mode)
+    if by is None:
+        return df.iloc[_top_positions(keys, k)]
+
+    positions = []
+    groups = df.groupby(by, sort=False).indices
+    for name in sorted(groups, key=str):
+        group = groups[name]
+        top = _top_positions([key[group] for key in keys], k)
+        positions.append(group[top])
+    if not positions:
+        return df.iloc[:0]
+    return df.iloc[np.concatenate(positions)]
+
+
+class TopK:
+    """
+    流式前 K 个：维护大小为 K 的堆，每次推入 O(log K)
+
+    参数:
+        k: 保留的个数
+    """
+
+    def __init__(self, k):
+        self.k = k
+        self._heap = []
+        self._seq = 0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, key, item):
+        """推入一个候选，key 越小越好（float 或 tuple）"""
+        if self.k <= 0:
+            return
+        # 堆顶为当前最差的候选：键取负后用最小堆；并列时先推入的更优
+        negated = tuple(-x for x in key) if isinstance(key, tuple) else -key
+        entry = (negated, -self._seq, item)
+        self._seq += 1
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def items(self):
+        """按名次返回保留的候选"""
+        return [
+            entry[2] for entry in sorted(self._heap, key=lambda e: e[:2], reverse=True)
+        ]
+
+
+def top_k(records, criteria, k=10, mode="weighted", by=None):
+    """
+    从任意可迭代的记录（dict）中流式选出排名前 k 的记录
+
+    参数:
+        records: 可迭代的记录，只遍历一次
+        criteria: Criterion 列表，column 为记录中的字段名
+        k, mode: 同 rank
+        by: 分组字段，给定时返回 {组名: 前 k 条记录}
+    """
+    _check_mode(mode)
+    weighted = [(c, c.weight) for c in criteria if c.weight]
+
+    def key(record):
+        if mode == "lexicographic":
+            return tuple(c.penalty(record.get(c.column)) for c in criteria)
+        return sum(w * c.penalty(record.get(c.column)) for c, w in weighted)
+
+    if by is None:
+        heap = TopK(k)
+        for record in records:
+            heap.push(key(record), record)
+        return heap.items()
+
+    heaps = {}
+    for record in records:
+        group = record.get(by)
+        if group not in heaps:
+            heaps[group] = TopK(k)
+        heaps[group].push(key(record), record)
+    return {group: heaps[group].items() for group in sorted(heaps, key=str)}
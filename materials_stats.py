@@ -0,0 +1,138 @@
+"""
+半导体材料数据库 - 统计汇总
+作者: Luffy.Solution
+功能: 对材料数据表一次性计算摘要报告、控制台输出和图表所需的全部统计量，
+      各处共用同一个 MaterialStats 对象，不再对数据表重复筛选、复制和逐行遍历
+
+使用方法:
+    from materials_stats import compute_stats
+
+    stats = compute_stats(df)
+    stats.category_counts          # 各分类材料数（按数量降序）
+    stats.band_gap["mean"]         # 带隙统计：count / mean / min / max / median
+    stats.band_gap_bins            # 带隙区间分布
+    stats.by_category              # 按分类汇总（材料数、带隙统计、直接/间接带隙数）
+"""
+
+import numpy as np
+import pandas as pd
+
+# 带隙区间：(下界, 标签)，区间为 [下界, 下一个下界)
+BAND_GAP_BINS = [
+    (0.0, "0.0-1.0 eV (红外)"),
+    (1.0, "1.0-2.0 eV (近红外-可见)"),
+    (2.0, "2.0-3.0 eV (可见-紫外)"),
+    (3.0, "3.0+ eV (紫外)"),
+]
+
+# 需要计数的标签列
+LABEL_COLUMNS = ["直接带隙", "晶系", "光电应用潜力", "光催化应用潜力"]
+
+
+class MaterialStats:
+    """
+    材料数据表的统计汇总（由 compute_stats 生成）
+
+    属性:
+        total: 材料总数
+        category_counts: 各分类材料数（Series，按数量降序）
+        band_gap: 带隙统计 dict（count / mean / min / max / median），无带隙数据时为 None
+        band_gap_bins: 带隙区间分布（Series，索引为 BAND_GAP_BINS 中的标签）
+        label_counts: LABEL_COLUMNS 中各列的取值计数（dict: 列名 -> Series）
+        by_category: 按分类汇总的 DataFrame，列为 材料数、带隙数、平均带隙、
+                     最小带隙、最大带隙、中位带隙、直接带隙数、间接带隙数
+                     （直接/间接只统计有带隙数据的材料）
+    """
+
+    def __init__(
+        self, total, category_counts, band_gap, band_gap_bins, label_counts, by_category
+    ):
+        self.total = total
+        self.category_counts = category_counts
+        self.band_gap = band_gap
+        self.band_gap_bins = band_gap_bins
+        self.label_counts = label_counts
+        self.by_category = by_category
+
+    @property
+    def n_categories(self):
+        return len(self.category_counts)
+
+    def counts(self, column):
+        """某个标签列的取值计数，列不存在时为空 Series"""
+        return self.label_counts.get(column, pd.Series(dtype="int64"))
+
+
+def compute_stats(df):
+    """
+    计算材料数据表的统计汇总
+
+    每列只读取一次：分类统计在一次分组聚合中完成，带隙区间用 searchsorted + bincount
+    一次得到，标签列各做一次计数。
+
+    参数:
+        df: create_dataframe 生成的材料数据表（带隙为数值列，缺失为 NaN）；
+            只读取了部分列时，缺少的带隙、标签列按全部缺失统计
+    """
+    if "带隙 (eV)" in df.columns:
+        band_gap = pd.to_numeric(df["带隙 (eV)"], errors="coerce").to_numpy(dtype=float)
+    else:
+        band_gap = np.full(len(df), np.nan)
+    has_gap = ~np.isnan(band_gap)
+    if "直接带隙" in df.columns:
+        direct = df["直接带隙"].eq("是").to_numpy(dtype=bool, na_value=False)
+    else:
+        direct = np.zeros(len(df), dtype=bool)
+
+    # 分类编码一次，再按整数编码分组聚合（比按字符串分组快）
+    codes, categories = pd.factorize(df["分类"])
+    grouped = pd.DataFrame({
+        "带隙": band_gap,
+        "直接": has_gap & direct,
+        "间接": has_gap & ~direct,
+    }).groupby(codes, sort=False)
+    by_category = grouped.agg(
+        材料数=("带隙", "size"),
+        带隙数=("带隙", "count"),
+        平均带隙=("带隙", "mean"),
+        最小带隙=("带隙", "min"),
+        最大带隙=("带隙", "max"),
+        中位带隙=("带隙", "median"),
+        直接带隙数=("直接", "sum"),
+        间接带隙数=("间接", "sum"),
+    ).sort_values("材料数", ascending=False, kind="stable")
+    by_category.index = categories[by_category.index]
+    by_category.index.name = "分类"
+
+    # 总体带隙统计（np.median 基于 O(n) 的选择算法，无需排序）
+    gaps = band_gap[has_gap]
+    if len(gaps):
+        gap_stats = {
+            "count": len(gaps),
+            "mean": float(gaps.mean()),
+            "min": float(gaps.min()),
+            "max": float(gaps.max()),
+            "median": float(np.median(gaps)),
+        }
+    else:
+        gap_stats = None
+
+    lower_bounds = [low for low, _ in BAND_GAP_BINS]
+    bin_index = np.searchsorted(lower_bounds[1:], gaps, side="right")
+    band_gap_bins = pd.Series(
+        np.bincount(bin_index, minlength=len(BAND_GAP_BINS)),
+        index=[label for _, label in BAND_GAP_BINS],
+    )
+
+    label_counts = {
+        col: df[col].value_counts() for col in LABEL_COLUMNS if col in df.columns
+    }
+
+    return MaterialStats(
+        total=len(df),
+        category_counts=by_category["材料数"],
+        band_gap=gap_stats,
+        band_gap_bins=band_gap_bins,
+        label_counts=label_counts,
+        by_category=by_category,
+    )
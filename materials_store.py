@@ -0,0 +1,287 @@
+"""
+半导体材料数据库 - 本地索引存储
+作者: Luffy.Solution
+功能: 将获取到的材料记录保存到本地 SQLite 数据库（按 material_id 插入或更新，
+      replace_all 使数据库与一次完整运行的结果一致），常用筛选字段建有索引，
+      筛选查询无需把全部数据加载到 pandas
+
+使用方法:
+    from materials_store import MaterialsStore
+
+    with MaterialsStore("主流半导体材料数据库.sqlite") as store:
+        # 稳定的直接带隙硒化物，带隙 1.2 ~ 1.6 eV
+        rows = store.query(
+            elements=["Se"],
+            is_stable=True,
+            is_gap_direct=True,
+            band_gap=(1.2, 1.6),
+            order_by="band_gap",
+        )
+
+查询条件写法:
+    字段=值            等于（布尔字段用 True/False）
+    字段=(最小, 最大)  闭区间，None 表示不限，如 energy_above_hull=(None, 0.05)
+    字段=[值1, 值2]    取值之一（IN）
+    elements=[...]     同时包含这些元素
+"""
+
+import json
+import sqlite3
+import threading
+
+import pandas as pd
+
+# 表字段：(字段名, SQLite 类型)，其余字段只保存在 documents 表的完整记录中
+COLUMNS = [
+    ("material_id", "TEXT PRIMARY KEY"),
+    ("category", "TEXT"),
+    ("chemsys", "TEXT"),
+    ("formula_pretty", "TEXT"),
+    ("elements", "TEXT"),
+    ("nelements", "INTEGER"),
+    ("nsites", "INTEGER"),
+    ("band_gap", "REAL"),
+    ("is_gap_direct", "INTEGER"),
+    ("is_metal", "INTEGER"),
+    ("is_stable", "INTEGER"),
+    ("cbm", "REAL"),
+    ("vbm", "REAL"),
+    ("efermi", "REAL"),
+    ("formation_energy_per_atom", "REAL"),
+    ("energy_above_hull", "REAL"),
+    ("density", "REAL"),
+    ("volume", "REAL"),
+    ("crystal_system", "TEXT"),
+    ("spacegroup_symbol", "TEXT"),
+    ("last_updated", "TEXT"),
+]
+FIELD_NAMES = [name for name, _ in COLUMNS]
+BOOLEAN_FIELDS = {"is_gap_direct", "is_metal", "is_stable"}
+
+# 索引：(索引名, 字段)。is_gap_direct 只有两个取值，与 band_gap 组成联合索引，
+# "直接带隙 + 带隙范围" 的查询可直接在索引上定位
+INDEXES = [
+    ("band_gap", "band_gap"),
+    ("energy_above_hull", "energy_above_hull"),
+    ("chemsys", "chemsys"),
+    ("crystal_system", "crystal_system"),
+    ("is_gap_direct", "is_gap_direct, band_gap"),
+]
+
+
+def _row(mat):
+    """材料记录 -> 数据库行"""
+    values = []
+    for name in FIELD_NAMES:
+        value = mat.get(name)
+        if name == "elements":
+            # 以 ",Cd,Se," 形式保存，便于按元素匹配
+            value = f",{','.join(value)}," if value else None
+        elif name in BOOLEAN_FIELDS and value is not None:
+            value = int(bool(value))
+        values.append(value)
+    return values
+
+
+class MaterialsStore:
+    """
+    本地材料数据库（SQLite）
+
+    参数:
+        path: 数据库文件路径，":memory:" 为内存数据库
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        columns = ", ".join(f"{name} {kind}" for name, kind in COLUMNS)
+        self._conn.execute(f"CREATE TABLE IF NOT EXISTS materials ({columns})")
+        # 完整记录单独存放，筛选时只扫描较窄的字段表
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents "
+            "(material_id TEXT PRIMARY KEY, doc TEXT NOT NULL)"
+        )
+        for name, fields in INDEXES:
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_materials_{name} ON materials({fields})"
+            )
+        self._conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM materials").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+    def upsert(self, materials):
+        """
+        按 material_id 插入或更新材料记录（整条记录替换），返回写入的条数
+
+        同一材料出现在多个类别中时，保留最后写入的类别。
+        """
+        materials = [mat for mat in materials if mat.get("material_id")]
+        with self._lock:
+            self._write(materials)
+            self._conn.commit()
+            # 更新索引统计信息，查询规划器据此选择选择性最高的索引
+            self._conn.execute("PRAGMA optimize")
+        return len(materials)
+
+    def replace_all(self, materials):
+        """
+        以一次完整运行的结果替换数据库内容：写入这些记录，并删除不在其中的材料
+        （上游已移除或不再满足筛选条件），返回删除的条数
+
+        写入与删除在同一个事务中完成，中途失败时数据库保持原状。
+        """
+        materials = [mat for mat in materials if mat.get("material_id")]
+        with self._lock:
+            self._write(materials)
+            self._conn.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS keep_ids (material_id TEXT PRIMARY KEY)"
+            )
+            self._conn.execute("DELETE FROM keep_ids")
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO keep_ids VALUES (?)",
+                ((mat["material_id"],) for mat in materials),
+            )
+            removed = self._conn.execute(
+                "DELETE FROM materials "
+                "WHERE material_id NOT IN (SELECT material_id FROM keep_ids)"
+            ).rowcount
+            self._conn.execute(
+                "DELETE FROM documents "
+                "WHERE material_id NOT IN (SELECT material_id FROM keep_ids)"
+            )
+            self._conn.execute("DELETE FROM keep_ids")
+            self._conn.commit()
+            self._conn.execute("PRAGMA optimize")
+        return removed
+
+    def _write(self, materials):
+        """插入或更新记录（不提交，调用方持有锁）"""
+        updates = ", ".join(f"{name} = excluded.{name}" for name in FIELD_NAMES[1:])
+        sql = (
+            f"INSERT INTO materials ({', '.join(FIELD_NAMES)}) "
+            f"VALUES ({', '.join('?' * len(FIELD_NAMES))}) "
+            f"ON CONFLICT(material_id) DO UPDATE SET {updates}"
+        )
+        self._conn.executemany(sql, map(_row, materials))
+        self._conn.executemany(
+            "INSERT INTO documents VALUES (?, ?) "
+            "ON CONFLICT(material_id) DO UPDATE SET doc = excluded.doc",
+            (
+                (mat["material_id"], json.dumps(mat, ensure_ascii=False))
+                for mat in materials
+            ),
+        )
+
+    def get(self, material_id):
+        """按 material_id 读取完整记录，不存在时返回 None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT doc FROM documents WHERE material_id = ?", (material_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _where(self, filters):
+        """查询条件 -> (WHERE 子句, 参数)"""
+        clauses, params = [], []
+        for field, value in filters.items():
+            if field not in FIELD_NAMES:
+                raise ValueError(f"未知的查询字段: {field}")
+            if field == "elements":
+                for element in [value] if isinstance(value, str) else value:
+                    clauses.append("elements LIKE ?")
+                    params.append(f"%,{element},%")
+            elif isinstance(value, tuple):
+                low, high = value
+                if low is not None:
+                    clauses.append(f"{field} >= ?")
+                    params.append(low)
+                if high is not None:
+                    clauses.append(f"{field} <= ?")
+                    params.append(high)
+            elif isinstance(value, (list, set, frozenset)):
+                values = list(value)
+                clauses.append(f"{field} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+            elif value is None:
+                clauses.append(f"{field} IS NULL")
+            else:
+                clauses.append(f"{field} = ?")
+                params.append(int(value) if isinstance(value, bool) else value)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+
+    def _select(self, columns, filters, order_by=None, limit=None):
+        """构造 SELECT 语句 -> (SQL, 参数)"""
+        where, params = self._where(filters)
+        sql = f"SELECT {columns} FROM materials{where}"
+        if order_by:
+            field = order_by.lstrip("-")
+            if field not in FIELD_NAMES:
+                raise ValueError(f"未知的排序字段: {field}")
+            sql += f" ORDER BY {field} {'DESC' if order_by.startswith('-') else 'ASC'}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return sql, params
+
+    def query(self, order_by=None, limit=None, **filters):
+        """
+        按条件查询，返回完整材料记录列表
+
+        参数:
+            order_by: 排序字段，前缀 "-" 表示降序，如 "-band_gap"
+            limit: 最多返回的条数
+            **filters: 查询条件（见模块说明）
+        """
+        sql, params = self._select("material_id", filters, order_by, limit)
+        sql = (
+            f"SELECT d.doc FROM ({sql}) AS m "
+            "JOIN documents AS d ON d.material_id = m.material_id"
+        )
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(doc) for (doc,) in rows]
+
+    def query_df(self, columns=None, order_by=None, limit=None, **filters):
+        """
+        按条件查询，返回 DataFrame（只读取需要的字段，不解析完整记录）
+
+        参数:
+            columns: 返回的字段，None 表示全部表字段
+            order_by, limit, **filters: 同 query
+        """
+        columns = list(columns or FIELD_NAMES)
+        unknown = [col for col in columns if col not in FIELD_NAMES]
+        if unknown:
+            raise ValueError(f"未知的字段: {', '.join(unknown)}")
+        sql, params = self._select(", ".join(columns), filters, order_by, limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        df = pd.DataFrame(rows, columns=columns)
+        for col in BOOLEAN_FIELDS & set(columns):
+            df[col] = df[col].astype("boolean")
+        if "elements" in columns:
+            df["elements"] = df["elements"].str.strip(",").str.split(",")
+        return df
+
+    def count(self, **filters):
+        """满足条件的材料数"""
+        where, params = self._where(filters)
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT COUNT(*) FROM materials{where}", params
+            ).fetchone()[0]
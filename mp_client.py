@@ -0,0 +1,520 @@
+"""
+Materials Project API - 请求客户端
+作者: Luffy.Solution
+功能: 为数据获取脚本提供统一的 API 请求入口与全局速率限制
+
+所有对 Materials Project 的请求都应通过 MPClient 发出，
+这样多线程并发搜索时也能共享同一个令牌桶和连接池，不会超出 API 配额；
+请求失败时按指数退避自动重试（遵守 429/503 的 Retry-After），
+并按延迟和错误率自适应调整并发数（AIMD）；
+同时可挂载本地 SQLite 响应缓存，重复运行时无需再次下载。
+"""
+
+import hashlib
+import json
+import random
+import sqlite3
+import threading
+import time
+import zlib
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# 可重试的状态码：限流、服务端错误
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# 可重试的异常：连接错误、超时、响应体传输中断
+# （ChunkedEncodingError 不是 ConnectionError 的子类，需要单独列出）
+RETRY_EXCEPTIONS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+)
+
+# API 单页记录数上限（_limit 超过时按上限截断）
+MAX_PAGE_SIZE = 1000
+
+
+class MPAPIError(Exception):
+    """API 请求失败（非 200 状态码）"""
+
+    def __init__(self, status_code, url=""):
+        super().__init__(f"请求失败 (状态码: {status_code})")
+        self.status_code = status_code
+        self.url = url
+
+
+class TokenBucket:
+    """
+    线程安全的令牌桶限速器
+
+    参数:
+        rate: 每秒补充的令牌数（即允许的平均请求速率）
+        capacity: 桶容量（允许的瞬时突发请求数），默认等于 rate
+    """
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError("rate 必须为正数")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """非阻塞获取令牌，成功返回 True"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1):
+        """阻塞直到取得指定数量的令牌"""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            # 在锁外等待，避免阻塞其他线程补充/获取令牌
+            time.sleep(wait)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD 自适应并发限制器
+
+    请求成功且延迟正常时并发上限加性增长（每轮约 +1），
+    出现限流/服务端错误时减半，延迟超过目标值时降为 0.8 倍。
+    同一冷却期内只降一次，避免并发中的多个失败把上限一次压到底。
+
+    参数:
+        max_limit: 并发上限的最大值
+        min_limit: 并发上限的最小值
+        target_latency: 目标延迟（秒），超过即视为服务端压力上升
+    """
+
+    def __init__(self, max_limit, min_limit=1, target_latency=10.0):
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.target_latency = target_latency
+        self.limit = float(max(self.min_limit, self.max_limit // 2))
+        self.in_flight = 0
+        self.decreases = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """阻塞直到在途请求数低于当前上限"""
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self, latency, ok=True):
+        """
+        释放一个并发名额，并根据本次请求结果调整上限
+
+        参数:
+            latency: 本次请求耗时（秒）
+            ok: 请求是否成功（限流或服务端错误为 False）
+        """
+        with self._cond:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if not ok or latency > self.target_latency:
+                # 冷却期取本次延迟与 1 秒中的较大者
+                if now - self._last_decrease > max(1.0, latency):
+                    factor = 0.5 if not ok else 0.8
+                    self.limit = max(self.min_limit, self.limit * factor)
+                    self._last_decrease = now
+                    self.decreases += 1
+            else:
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+
+def parse_retry_after(value):
+    """解析 Retry-After 响应头（秒数或 HTTP 日期），无法解析时返回 None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize_params(params):
+    """
+    规范化查询参数，使语义相同的参数得到相同的缓存键
+
+    - 去掉值为 None 的参数
+    - 布尔值统一为 "true"/"false"，其他值转为字符串
+    - _fields 字段列表排序去重
+    """
+    normalized = {}
+    for key, value in params.items():
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            value = "true" if value else "false"
+        value = str(value)
+        if key == "_fields":
+            value = ",".join(sorted(set(value.split(","))))
+        normalized[key] = value
+    return normalized
+
+
+def make_cache_key(url, params):
+    """缓存键 = 请求地址 + 规范化参数的 SHA-256"""
+    raw = url.rstrip("/") + "?" + json.dumps(normalize_params(params), sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    基于 SQLite 的 API 响应缓存
+
+    以请求地址 + 规范化参数为键保存 JSON 响应（zlib 压缩），
+    超过 ttl 的条目视为过期；总大小超过 max_bytes 时按最近访问时间淘汰。
+
+    参数:
+        path: 缓存数据库文件路径
+        ttl: 条目有效期（秒），None 表示永不过期
+        max_bytes: 缓存总大小上限（字节）
+    """
+
+    def __init__(self, path, ttl=30 * 24 * 3600, max_bytes=512 * 1024 * 1024):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                payload BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed)"
+        )
+        self._conn.commit()
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+
+    def get(self, url, params):
+        """读取缓存，未命中或已过期时返回 None"""
+        key = make_cache_key(url, params)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, size, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            payload, size, created = row
+            if self.ttl is not None and now - created > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                self._total_bytes -= size
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE responses SET accessed = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(zlib.decompress(payload))
+
+    def put(self, url, params, data):
+        """写入缓存，必要时淘汰最久未访问的条目"""
+        key = make_cache_key(url, params)
+        payload = zlib.compress(json.dumps(data, ensure_ascii=False).encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute(
+                "SELECT size FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, url, payload, len(payload), now, now),
+            )
+            self._total_bytes += len(payload) - (old[0] if old else 0)
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """淘汰最久未访问的条目，直到总大小不超过上限（调用方需持有锁）"""
+        while self._total_bytes > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY accessed LIMIT 100"
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._total_bytes -= size
+                self.evictions += 1
+                if self._total_bytes <= self.max_bytes:
+                    break
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            self._total_bytes = 0
+
+    def stats(self):
+        """返回命中统计"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": self._total_bytes,
+        }
+
+
+class MPClient:
+    """
+    Materials Project API 客户端
+
+    参数:
+        base_url: API 基础地址
+        api_key: API Key
+        rate_limit: 每秒最多请求数（所有线程共享）
+        burst: 令牌桶容量，默认等于 rate_limit
+        cache: ResponseCache 实例，None 表示不缓存
+        max_concurrency: 并发请求数上限（同时也是连接池大小）
+        max_retries: 失败后的最大重试次数
+        backoff: 指数退避的基础等待时间（秒）
+        target_latency: 自适应并发的目标延迟（秒）
+    """
+
+    def __init__(
+        self,
+        base_url,
+        api_key,
+        rate_limit=25,
+        burst=None,
+        cache=None,
+        max_concurrency=8,
+        max_retries=5,
+        backoff=0.5,
+        target_latency=10.0,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.headers = {"X-API-KEY": api_key}
+        self.limiter = TokenBucket(rate_limit, burst)
+        self.concurrency = AdaptiveConcurrencyLimiter(
+            max_concurrency, target_latency=target_latency
+        )
+        self.cache = cache
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0
+        self._stats_lock = threading.Lock()
+
+        # 共享连接池，复用 keep-alive 连接，避免每次请求重新握手
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(1, max_concurrency))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _count(self, name):
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _request(self, url, params, timeout):
+        """
+        实际发出请求（不经过缓存）
+
+        限流（429）、服务端错误（5xx）、超时、连接错误和传输中断会重试，
+        429/503 优先按 Retry-After 等待，否则指数退避加随机抖动。
+        其他非 200 状态码（如 400/401/404）直接抛出 MPAPIError，
+        其他异常原样抛出；无论哪种结果，并发名额都会释放。
+        """
+        error = None
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            response = None
+            latency, ok = 0.0, False
+            self.concurrency.acquire()
+            try:
+                self.limiter.acquire()
+                start = time.monotonic()
+                try:
+                    response = self.session.get(url, params=params, timeout=timeout)
+                finally:
+                    latency = time.monotonic() - start
+                ok = response.status_code not in RETRY_STATUS_CODES
+            except RETRY_EXCEPTIONS as e:
+                error = e
+            finally:
+                self.concurrency.release(latency, ok=ok)
+
+            if response is not None:
+                status = response.status_code
+                retryable = not ok
+                self._count("requests")
+                if status == 200:
+                    return response.json()
+                if not retryable:
+                    raise MPAPIError(status, url)
+                error = MPAPIError(status, url)
+                if status in (429, 503):
+                    self._count("throttled")
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+
+            if attempt == self.max_retries:
+                break
+            if retry_after is None:
+                retry_after = min(60.0, self.backoff * 2**attempt) * random.uniform(
+                    0.5, 1.0
+                )
+            self._count("retries")
+            time.sleep(retry_after)
+
+        raise error
+
+    def stats(self):
+        """返回请求统计"""
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "concurrency": int(self.concurrency.limit),
+            "concurrency_decreases": self.concurrency.decreases,
+        }
+
+    def get(self, endpoint, params, timeout=30, use_cache=True):
+        """
+        发送 GET 请求并返回解析后的 JSON
+
+        参数:
+            endpoint: API 路径，例如 "/materials/summary/"
+            params: 查询参数
+            timeout: 超时时间（秒）
+            use_cache: 是否读取缓存（False 时强制请求，但仍会更新缓存）
+        """
+        url = f"{self.base_url}{endpoint}"
+        if self.cache is not None and use_cache:
+            payload = self.cache.get(url, params)
+            if payload is not None:
+                return payload
+
+        payload = self._request(url, params, timeout)
+        if self.cache is not None:
+            self.cache.put(url, params, payload)
+        return payload
+
+    def iter_pages(self, endpoint, params, page_size=100, timeout=30, use_cache=True):
+        """
+        按 _skip/_limit 逐页请求，逐条产出记录
+
+        某页返回不足 page_size 条即视为最后一页；调用方提前停止迭代时
+        不会再请求后续页面。每页单独缓存。
+        """
+        skip = 0
+        while True:
+            page_params = {**params, "_skip": skip, "_limit": page_size}
+            data = self.get(endpoint, page_params, timeout, use_cache).get("data", [])
+            yield from data
+            if len(data) < page_size:
+                return
+            skip += page_size
+
+    def get_by_ids(
+        self,
+        endpoint,
+        ids,
+        params,
+        id_param="material_ids",
+        id_field="material_id",
+        timeout=30,
+        use_cache=True,
+    ):
+        """
+        按 ID 列表批量查询，返回 {id: 文档}
+
+        缓存以单个 ID 为粒度保存，因此批次组成变化（例如材料数量调整）后
+        已缓存的 ID 仍能命中，只有未命中的 ID 会合并请求，每次最多
+        MAX_PAGE_SIZE 个。API 未返回的 ID 也会记入缓存（空结果），避免重复请求；
+        响应被截断（meta.total_doc 多于返回条数）时不记录，下次重新请求。
+        """
+        url = f"{self.base_url}{endpoint}"
+        docs = {}
+        missing = []
+        for doc_id in ids:
+            payload = None
+            if self.cache is not None and use_cache:
+                payload = self.cache.get(url, {**params, id_param: doc_id})
+            if payload is None:
+                missing.append(doc_id)
+            else:
+                for doc in payload.get("data", []):
+                    docs[doc_id] = doc
+
+        for i in range(0, len(missing), MAX_PAGE_SIZE):
+            page = missing[i : i + MAX_PAGE_SIZE]
+            batch_params = {
+                **params,
+                id_param: ",".join(page),
+                "_limit": len(page),  # 默认分页较小，需显式放宽
+            }
+            payload = self._request(url, batch_params, timeout)
+            data = payload.get("data", [])
+            truncated = payload.get("meta", {}).get("total_doc", 0) > len(data)
+            fetched = {doc[id_field]: doc for doc in data if doc.get(id_field)}
+            docs.update(fetched)
+            if self.cache is not None:
+                for doc_id in page:
+                    if doc_id in fetched:
+                        self.cache.put(
+                            url,
+                            {**params, id_param: doc_id},
+                            {"data": [fetched[doc_id]]},
+                        )
+                    elif not truncated:
+                        self.cache.put(url, {**params, id_param: doc_id}, {"data": []})
+
+        return docs
@@ -0,0 +1,511 @@
+"""
+半导体材料筛选规则引擎
+作者: Luffy.Solution
+功能: 从配置文件（TOML / YAML / JSON）加载筛选条件与评分等级，
+      编译为对整张材料表的向量化布尔运算
+
+规则表达式使用 Python 表达式语法的一个子集：
+    字段名（API 字段，如 band_gap、cbm、energy_above_hull）、数字、True/False
+    比较运算（可连写，如 1.1 <= band_gap <= 1.8）
+    and / or / not、+ - * /、isna(x) / notna(x) / abs(x)
+
+缺失值为 NaN：参与比较时结果为假；单独作为条件时 NaN 和 0 都视为假
+（与原先逐条判断时的 Python 真值规则一致，如 "cbm and vbm"）。
+
+编译结果按表达式文本缓存；同一次评估中多个规则共用的子表达式只计算一次。
+搜索条件中能表达为 API 过滤参数的部分（带隙范围、is_metal 等）会下推到查询参数，
+服务端先行过滤，本地仍按完整条件再筛选一遍。
+
+规则文件格式见 screening_rules_example.toml。
+"""
+
+import ast
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# 可下推为 API 范围过滤（<field>_min / <field>_max）的字段
+PUSHDOWN_RANGE_FIELDS = {
+    "band_gap",
+    "energy_above_hull",
+    "density",
+    "volume",
+    "nsites",
+    "nelements",
+}
+# 可下推为 API 布尔过滤的字段
+PUSHDOWN_BOOLEAN_FIELDS = {"is_stable", "is_metal", "is_gap_direct"}
+
+# 内置默认规则（未提供规则文件时使用，与原先硬编码的阈值一致）
+DEFAULT_RULES = {
+    "search": {
+        "band_gap": [0.1, 6.0],  # 带隙筛选范围（排除金属和绝缘体）
+        "where": "not is_metal",
+        "pushdown": True,
+    },
+    "screens": {
+        "photovoltaic": {
+            "column": "光电应用潜力",
+            "default": "较低",
+            "tiers": [
+                {"label": "未知", "when": "not band_gap"},
+                {
+                    "label": "优秀",
+                    "when": "1.1 <= band_gap <= 1.8 and energy_above_hull < 0.05",
+                },
+                {
+                    "label": "良好",
+                    "when": "0.8 <= band_gap <= 2.5 and energy_above_hull < 0.1",
+                },
+                {"label": "一般", "when": "0.5 <= band_gap <= 3.0"},
+            ],
+        },
+        "photocatalytic": {
+            "column": "光催化应用潜力",
+            "default": "较低",
+            "tiers": [
+                {"label": "未知", "when": "not band_gap"},
+                # 水分解需要带隙 > 1.23 eV，且能带位置合适：CBM 要足够负，VBM 要足够正
+                {
+                    "label": "优秀",
+                    "when": "1.8 < band_gap < 3.5 and cbm and vbm"
+                    " and cbm < 0 and vbm > -2.5",
+                },
+                {
+                    "label": "良好",
+                    "when": "1.8 < band_gap < 3.5 and cbm and vbm and cbm < 0.5",
+                },
+                {"label": "一般", "when": "1.8 < band_gap < 3.5"},
+                {"label": "一般", "when": "1.5 <= band_gap <= 4.0"},
+            ],
+        },
+    },
+}
+
+
+class RuleError(ValueError):
+    """规则文件或规则表达式无效"""
+
+
+# ============================================================================
+# 表达式编译
+# ============================================================================
+_COMPARE_OPS = {
+    ast.Lt: np.less,
+    ast.LtE: np.less_equal,
+    ast.Gt: np.greater,
+    ast.GtE: np.greater_equal,
+    ast.Eq: np.equal,
+    ast.NotEq: np.not_equal,
+}
+_BINARY_OPS = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: np.divide,
+}
+_FUNCTIONS = {
+    "isna": lambda x: np.isnan(np.asarray(x, dtype=float)),
+    "notna": lambda x: ~np.isnan(np.asarray(x, dtype=float)),
+    "abs": np.abs,
+}
+# 比较运算翻转方向（常量在左侧时）
+_FLIPPED = {ast.Lt: ast.Gt, ast.LtE: ast.GtE, ast.Gt: ast.Lt, ast.GtE: ast.LtE}
+
+
+def _truth(value):
+    """条件上下文中的真值：NaN 与 0 为假"""
+    if isinstance(value, np.ndarray):
+        if value.dtype == bool:
+            return value
+        return ~np.isnan(value) & (value != 0)
+    return bool(value) and value == value
+
+
+def _constant(node):
+    """常量节点的值（含负数），不是常量时返回 None"""
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        value = _constant(node.operand)
+        return -value if value is not None else None
+    if type(node).__name__ in ("Constant", "Num", "NameConstant"):
+        value = getattr(node, "value", getattr(node, "n", None))
+        if isinstance(value, (bool, int, float)):
+            return value
+    return None
+
+
+class Expression:
+    """
+    编译后的规则表达式
+
+    evaluate(columns) 对 {字段名: 数组} 计算结果，返回布尔数组；
+    memo 字典可在多个表达式之间共享，相同的子表达式只计算一次。
+    """
+
+    def __init__(self, source):
+        self.source = source
+        try:
+            tree = ast.parse(source.strip(), mode="eval")
+        except SyntaxError as e:
+            raise RuleError(f"规则表达式语法错误: {source!r} ({e.msg})") from None
+        self.fields = set()
+        self._root = tree.body
+        self._evaluate = self._compile(self._root)
+
+    def __repr__(self):
+        return f"Expression({self.source!r})"
+
+    def evaluate(self, columns, memo=None):
+        """计算表达式，返回与输入等长的布尔数组"""
+        if memo is None:
+            memo = {}
+        missing = self.fields - set(columns)
+        if missing:
+            raise RuleError(
+                f"规则 {self.source!r} 缺少字段: {', '.join(sorted(missing))}"
+            )
+        result = _truth(self._evaluate(columns, memo))
+        if not isinstance(result, np.ndarray):
+            length = len(next(iter(columns.values()))) if columns else 0
+            result = np.full(length, result)
+        return result
+
+    def _compile(self, node):
+        """把 AST 节点编译为 (columns, memo) -> 值 的函数，按节点结构缓存结果"""
+        key = ast.dump(node)
+        compute = self._compile_node(node)
+
+        def evaluate(columns, memo):
+            if key not in memo:
+                memo[key] = compute(columns, memo)
+            return memo[key]
+
+        return evaluate
+
+    def _compile_node(self, node):
+        value = _constant(node)
+        if value is not None:
+            return lambda columns, memo: value
+
+        if isinstance(node, ast.Name):
+            name = node.id
+            self.fields.add(name)
+            return lambda columns, memo: columns[name]
+
+        if isinstance(node, ast.BoolOp):
+            parts = [self._compile(value) for value in node.values]
+            combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+
+            def bool_op(columns, memo):
+                result = _truth(parts[0](columns, memo))
+                for part in parts[1:]:
+                    result = combine(result, _truth(part(columns, memo)))
+                return result
+
+            return bool_op
+
+        if isinstance(node, ast.UnaryOp):
+            operand = self._compile(node.operand)
+            if isinstance(node.op, ast.Not):
+                return lambda columns, memo: np.logical_not(
+                    _truth(operand(columns, memo))
+                )
+            if isinstance(node.op, ast.USub):
+                return lambda columns, memo: np.negative(operand(columns, memo))
+
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPS:
+            op = _BINARY_OPS[type(node.op)]
+            left, right = self._compile(node.left), self._compile(node.right)
+            return lambda columns, memo: op(left(columns, memo), right(columns, memo))
+
+        if isinstance(node, ast.Compare) and all(
+            type(op) in _COMPARE_OPS for op in node.ops
+        ):
+            operands = [self._compile(node.left)] + [
+                self._compile(c) for c in node.comparators
+            ]
+            ops = [_COMPARE_OPS[type(op)] for op in node.ops]
+
+            def compare(columns, memo):
+                # 连写比较 a < b < c 等价于 (a < b) and (b < c)
+                values = [operand(columns, memo) for operand in operands]
+                result = ops[0](values[0], values[1])
+                for i, op in enumerate(ops[1:], 1):
+                    result = np.logical_and(result, op(values[i], values[i + 1]))
+                return result
+
+            return compare
+
+        if (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Name)
+            and node.func.id in _FUNCTIONS
+            and len(node.args) == 1
+            and not node.keywords
+        ):
+            func = _FUNCTIONS[node.func.id]
+            arg = self._compile(node.args[0])
+            return lambda columns, memo: func(arg(columns, memo))
+
+        raise RuleError(f"规则 {self.source!r} 中不支持的语法: {type(node).__name__}")
+
+    def pushdown(self):
+        """
+        可下推为 API 查询参数的过滤条件
+
+        只分析顶层 and 连接的条件：字段与常量的范围比较转为 <field>_min/_max，
+        布尔字段（或 not 字段、字段 == True/False）转为 <field>=True/False。
+        下推条件只会放宽不会收紧（严格不等号按闭区间下推），本地仍需完整筛选。
+        """
+        node = self._root
+        conjuncts = (
+            node.values
+            if isinstance(node, ast.BoolOp) and isinstance(node.op, ast.And)
+            else [node]
+        )
+        params = {}
+        for conjunct in conjuncts:
+            if isinstance(conjunct, ast.Name):
+                if conjunct.id in PUSHDOWN_BOOLEAN_FIELDS:
+                    params[conjunct.id] = True
+            elif (
+                isinstance(conjunct, ast.UnaryOp)
+                and isinstance(conjunct.op, ast.Not)
+                and isinstance(conjunct.operand, ast.Name)
+            ):
+                if conjunct.operand.id in PUSHDOWN_BOOLEAN_FIELDS:
+                    params[conjunct.operand.id] = False
+            elif isinstance(conjunct, ast.Compare):
+                items = [conjunct.left] + list(conjunct.comparators)
+                for left, op, right in zip(items, conjunct.ops, items[1:]):
+                    _pushdown_compare(params, left, type(op), right)
+        return params
+
+
+def _pushdown_compare(params, left, op, right):
+    """把一个 字段-常量 比较并入下推参数（取最严格的范围）"""
+    if isinstance(right, ast.Name) and _constant(left) is not None:
+        left, right = right, left
+        op = _FLIPPED.get(op, op)
+    if not isinstance(left, ast.Name):
+        return
+    field, value = left.id, _constant(right)
+    if value is None:
+        return
+
+    if field in PUSHDOWN_BOOLEAN_FIELDS and isinstance(value, bool):
+        if op is ast.Eq:
+            params[field] = value
+        elif op is ast.NotEq:
+            params[field] = not value
+    elif field in PUSHDOWN_RANGE_FIELDS and not isinstance(value, bool):
+        if op in (ast.Gt, ast.GtE, ast.Eq):
+            key = f"{field}_min"
+            params[key] = max(params.get(key, value), value)
+        if op in (ast.Lt, ast.LtE, ast.Eq):
+            key = f"{field}_max"
+            params[key] = min(params.get(key, value), value)
+
+
+@lru_cache(maxsize=256)
+def compile_expression(source):
+    """编译规则表达式（按表达式文本缓存）"""
+    return Expression(source)
+
+
+# ============================================================================
+# 规则集
+# ============================================================================
+def to_float_array(values):
+    """把字段值列表转为 float 数组：None 与无法解析的值为 NaN，布尔值为 1/0"""
+    try:
+        return np.array(values, dtype=float)
+    except (TypeError, ValueError):
+        series = pd.to_numeric(pd.Series(values, dtype=object), errors="coerce")
+        return series.astype(float).to_numpy()
+
+
+def columns_from_records(records, fields):
+    """从材料记录列表中一次性取出规则需要的字段列 {字段名: float 数组}"""
+    return {
+        field: to_float_array([record.get(field) for record in records])
+        for field in fields
+    }
+
+
+class Screen:
+    """
+    一个应用筛选：按顺序匹配的评分等级（首个满足的等级生效），或单个布尔条件
+
+    参数:
+        name: 筛选名称
+        tiers: [(等级标签, Expression)]，与 where 二选一
+        default: 所有等级都不满足时的标签
+        where: 布尔筛选条件（Expression），结果为布尔数组
+        column: 输出到数据表时的列名，None 表示不输出
+    """
+
+    def __init__(self, name, tiers=None, default="", where=None, column=None):
+        self.name = name
+        self.tiers = tiers or []
+        self.default = default
+        self.where = where
+        self.column = column
+
+    @property
+    def fields(self):
+        expressions = [self.where] if self.where is not None else []
+        expressions += [expression for _, expression in self.tiers]
+        return set().union(*(expression.fields for expression in expressions))
+
+    def evaluate(self, columns, memo=None):
+        """对整张表评估：评分筛选返回标签数组，布尔筛选返回布尔数组"""
+        if memo is None:
+            memo = {}
+        if self.where is not None:
+            return self.where.evaluate(columns, memo)
+        conditions = [
+            expression.evaluate(columns, memo) for _, expression in self.tiers
+        ]
+        labels = [label for label, _ in self.tiers]
+        return np.select(conditions, labels, default=self.default)
+
+
+class RuleSet:
+    """
+    一组筛选规则：搜索条件 + 任意多个应用筛选
+
+    参数:
+        band_gap_range: 搜索阶段的带隙范围 (最小, 最大)
+        search_where: 搜索阶段的附加条件（表达式文本），可为 None
+        pushdown: 是否把搜索条件下推为 API 查询参数
+        screens: {名称: Screen}
+    """
+
+    def __init__(self, band_gap_range, search_where=None, pushdown=True, screens=None):
+        self.band_gap_range = tuple(band_gap_range)
+        self.search_where = search_where
+        self.pushdown = pushdown
+        self.screens = screens or {}
+
+    @classmethod
+    def from_dict(cls, data):
+        """从规则字典（规则文件解析结果）创建，未给出的部分使用内置默认值"""
+        search = {**DEFAULT_RULES["search"], **(data.get("search") or {})}
+        screens_data = data.get("screens", DEFAULT_RULES["screens"])
+
+        try:
+            band_gap_range = tuple(float(v) for v in search["band_gap"])
+            if len(band_gap_range) != 2:
+                raise ValueError
+        except (TypeError, ValueError):
+            raise RuleError("[search] band_gap 应为 [最小, 最大]") from None
+
+        screens = {}
+        for name, spec in screens_data.items():
+            if "tiers" in spec:
+                tiers = [
+                    (str(tier["label"]), compile_expression(tier["when"]))
+                    for tier in spec["tiers"]
+                ]
+                screens[name] = Screen(
+                    name, tiers, str(spec.get("default", "")), column=spec.get("column")
+                )
+            elif "where" in spec:
+                screens[name] = Screen(
+                    name,
+                    where=compile_expression(spec["where"]),
+                    column=spec.get("column"),
+                )
+            else:
+                raise RuleError(f"筛选 {name!r} 需要 tiers 或 where")
+
+        rules = cls(
+            band_gap_range, search.get("where"), bool(search["pushdown"]), screens
+        )
+        rules.search_expression()  # 提前检查语法
+        return rules
+
+    @property
+    def fields(self):
+        """所有应用筛选用到的字段"""
+        return set().union(*(screen.fields for screen in self.screens.values()))
+
+    def search_expression(self, band_gap_range=None):
+        """搜索阶段的完整筛选条件，band_gap_range 给定时覆盖规则文件中的带隙范围"""
+        bg_min, bg_max = band_gap_range or self.band_gap_range
+        source = f"{float(bg_min)!r} <= band_gap <= {float(bg_max)!r}"
+        if self.search_where:
+            source += f" and ({self.search_where})"
+        return compile_expression(source)
+
+    def search_params(self, band_gap_range=None):
+        """搜索条件中可下推为 API 查询参数的部分（关闭下推时为空）"""
+        if not self.pushdown:
+            return {}
+        return self.search_expression(band_gap_range).pushdown()
+
+    def evaluate(self, columns, names=None):
+        """
+        一次评估多个应用筛选，返回 {名称: 结果数组}
+
+        参数:
+            columns: {字段名: 数组}，可用 columns_from_records 构造
+            names: 要评估的筛选名称，None 表示全部
+        """
+        memo = {}
+        names = list(self.screens) if names is None else names
+        return {name: self.screens[name].evaluate(columns, memo) for name in names}
+
+
+def _read_rules_file(path):
+    """按扩展名解析规则文件，返回字典"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".toml":
+        try:
+            import tomllib
+        except ImportError:  # Python < 3.11
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise RuleError(
+                    "读取 TOML 规则文件需要 Python 3.11+ 或 tomli 包（pip install tomli）"
+                ) from None
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    if ext in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise RuleError(
+                "读取 YAML 规则文件需要 PyYAML 包（pip install pyyaml）"
+            ) from None
+        with open(path, encoding="utf-8") as f:
+            return yaml.safe_load(f) or {}
+    if ext == ".json":
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    raise RuleError(
+        f"不支持的规则文件格式: {path}（支持 .toml / .yaml / .yml / .json）"
+    )
+
+
+def load_rules(path=None):
+    """
+    加载筛选规则
+
+    参数:
+        path: 规则文件路径；为 None 或文件不存在时使用内置默认规则
+    """
+    if path is None or not os.path.exists(path):
+        return RuleSet.from_dict(DEFAULT_RULES)
+    try:
+        data = _read_rules_file(path)
+    except RuleError:
+        raise
+    except Exception as e:
+        raise RuleError(f"规则文件 {path} 解析失败: {e}") from None
+    return RuleSet.from_dict(data or {})
@@ -0,0 +1,28 @@
+"""测试公共部分：导入项目根目录的模块，模拟服务器上获取的材料记录"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import 获取主流半导体材料数据 as fetcher  # noqa: E402
+from mp_client import MPClient  # noqa: E402
+from 模拟MP服务器 import MockMPServer  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def fetched_materials():
+    """在模拟服务器上搜索一个类别，返回获取到的材料记录"""
+    categories = {"氮化物": fetcher.SEMICONDUCTOR_CATEGORIES["氮化物"]}
+    client = fetcher.client
+    with MockMPServer(per_chemsys=20) as server:
+        fetcher.client = MPClient(server.url, None, rate_limit=1000)
+        try:
+            results = fetcher.search_all_categories(
+                categories, None, max_workers=2, use_cache=False
+            )
+        finally:
+            fetcher.client = client
+    return [mat for mats in results.values() for mat in mats]
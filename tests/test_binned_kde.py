@@ -0,0 +1,26 @@
+"""快速核密度估计：与 scipy.stats.gaussian_kde 的差异不超过 DENSITY_TOLERANCE"""
+
+import numpy as np
+import pytest
+from scipy.stats import gaussian_kde
+
+from binned_kde import DENSITY_TOLERANCE, BinnedKDE
+
+
+def samples(rng, n=5000):
+    """双峰样本（与带隙分布相近）"""
+    return np.concatenate([rng.normal(1.5, 0.4, n // 2), rng.normal(3.2, 0.8, n // 2)])
+
+
+@pytest.mark.parametrize("weighted", [False, True])
+@pytest.mark.parametrize("bw_method", ["scott", "silverman"])
+def test_matches_gaussian_kde(weighted, bw_method):
+    rng = np.random.default_rng(0)
+    values = samples(rng)
+    weights = rng.uniform(0.1, 2.0, len(values)) if weighted else None
+    points = np.linspace(values.min() - 1, values.max() + 1, 500)
+
+    expected = gaussian_kde(values, bw_method=bw_method, weights=weights)(points)
+    actual = BinnedKDE(values, weights=weights, bw_method=bw_method)(points)
+
+    assert np.abs(actual - expected).max() <= DENSITY_TOLERANCE * expected.max()
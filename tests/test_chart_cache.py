@@ -0,0 +1,27 @@
+"""图表输出缓存：缺少数据列的图表被跳过，其余图表正常绘制"""
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import 数据可视化分析 as visualizer  # noqa: E402
+from materials_loader import dataframe_from_records  # noqa: E402
+
+
+def test_cache_skips_chart_with_missing_column(fetched_materials, tmp_path):
+    df = dataframe_from_records(fetched_materials).drop(columns=["光电应用潜力"])
+    output_dir = tmp_path / "figures"
+
+    timings = visualizer.render_charts(
+        df,
+        charts=[5, 8],
+        output_dir=str(output_dir),
+        workers=1,
+        cache_dir=str(tmp_path / "cache"),
+    )
+
+    chart5, chart8 = visualizer.get_charts([5, 8])
+    assert (output_dir / chart8.filename).exists()
+    assert not (output_dir / chart5.filename).exists()
+    # 被跳过的图表不计入生成结果
+    assert list(timings) == [chart8.filename]
@@ -0,0 +1,33 @@
+"""获取脚本：导入时不读取筛选规则文件"""
+
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_import_survives_malformed_rules_file(tmp_path):
+    (tmp_path / "config.py").write_text(
+        'SCREENING_RULES_FILE = "bad_rules.toml"\n', encoding="utf-8"
+    )
+    (tmp_path / "bad_rules.toml").write_text("[search\n", encoding="utf-8")
+    script = (
+        "import 获取主流半导体材料数据 as fetcher\n"
+        "from screening_rules import RuleError\n"
+        "try:\n"
+        "    fetcher.get_screening_rules()\n"
+        "except RuleError:\n"
+        "    print('rule error')\n"
+    )
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(tmp_path), ROOT]))
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=tmp_path,
+        env=env,
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "rule error"
@@ -0,0 +1,18 @@
+"""多指标排名：流式 top_k 与 DataFrame 上的 rank 结果一致"""
+
+import pandas as pd
+
+from materials_ranking import Criterion, rank, top_k
+from materials_store import MaterialsStore
+
+
+def test_top_k_over_stable_store_records(fetched_materials):
+    # README 中的示例：对本地数据库中的稳定材料流式取前 10
+    criteria = [Criterion("band_gap", target=1.34)]
+    with MaterialsStore(":memory:") as store:
+        store.upsert(fetched_materials)
+        best = top_k(store.query(is_stable=True), criteria, k=10)
+
+    assert len(best) == min(10, len(fetched_materials))
+    expected = rank(pd.DataFrame(fetched_materials), criteria, k=10)
+    assert [mat["material_id"] for mat in best] == list(expected["material_id"])
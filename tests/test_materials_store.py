@@ -0,0 +1,25 @@
+"""本地索引数据库：获取到的记录写入后可按索引字段查询"""
+
+from materials_store import MaterialsStore
+
+
+def test_fetched_records_round_trip_is_stable(fetched_materials):
+    assert fetched_materials
+    with MaterialsStore(":memory:") as store:
+        store.upsert(fetched_materials)
+        # 搜索只要稳定相，写入的每条记录都应带有 is_stable
+        assert store.count(is_stable=True) == len(fetched_materials)
+        stable = store.query(is_stable=True, limit=1)[0]
+        assert stable["is_stable"] is True
+
+
+def test_replace_all_removes_materials_not_in_run(fetched_materials):
+    first, second = fetched_materials[:5], fetched_materials[3:8]
+    with MaterialsStore(":memory:") as store:
+        store.upsert(first)
+        removed = store.replace_all(second)
+        assert removed == 3
+        assert len(store) == len(second)
+        assert store.get(first[0]["material_id"]) is None
+        ids = {mat["material_id"] for mat in store.query()}
+        assert ids == {mat["material_id"] for mat in second}
@@ -0,0 +1,96 @@
+"""API 请求客户端：异常时释放并发名额，传输中断可重试，按 ID 查询分页"""
+
+import pytest
+import requests
+
+from mp_client import MAX_PAGE_SIZE, MPClient, ResponseCache
+
+
+class FakeResponse:
+    status_code = 200
+    headers = {}
+
+    def __init__(self, payload=None):
+        self.payload = payload or {"data": []}
+
+    def json(self):
+        return self.payload
+
+
+def capped_get(limit, calls):
+    """模拟 API：每页最多返回 limit 条（_limit 超过时截断）"""
+
+    def get(url, params, timeout):
+        ids = params["material_ids"].split(",")
+        calls.append(len(ids))
+        page = ids[: min(int(params["_limit"]), limit)]
+        return FakeResponse({
+            "data": [{"material_id": mid} for mid in page],
+            "meta": {"total_doc": len(ids)},
+        })
+
+    return get
+
+
+def make_client(get, max_retries=1):
+    client = MPClient(
+        "http://mp.invalid", None, rate_limit=1000, max_concurrency=2, backoff=0
+    )
+    client.max_retries = max_retries
+    client.session.get = get
+    return client
+
+
+@pytest.mark.parametrize(
+    "exc",
+    [
+        requests.exceptions.TooManyRedirects,
+        requests.exceptions.ContentDecodingError,
+        requests.exceptions.InvalidURL,
+    ],
+)
+def test_other_request_errors_release_slot(exc):
+    def get(url, params, timeout):
+        raise exc("boom")
+
+    client = make_client(get)
+    # 次数超过并发上限：名额泄漏时后续调用会永久阻塞
+    for _ in range(client.concurrency.max_limit + 2):
+        with pytest.raises(exc):
+            client.get("/materials/summary/", {}, use_cache=False)
+    assert client.concurrency.in_flight == 0
+
+
+def test_chunked_encoding_error_is_retried():
+    calls = []
+
+    def get(url, params, timeout):
+        calls.append(url)
+        if len(calls) == 1:
+            raise requests.exceptions.ChunkedEncodingError("connection broken")
+        return FakeResponse()
+
+    client = make_client(get)
+    assert client.get("/materials/summary/", {}, use_cache=False) == {"data": []}
+    assert len(calls) == 2
+    assert client.concurrency.in_flight == 0
+
+
+def test_get_by_ids_paginates_above_page_limit():
+    calls = []
+    client = make_client(capped_get(MAX_PAGE_SIZE, calls))
+    ids = [f"mp-{i}" for i in range(MAX_PAGE_SIZE + 500)]
+    docs = client.get_by_ids("/materials/summary/", ids, {}, use_cache=False)
+    assert set(docs) == set(ids)
+    assert max(calls) <= MAX_PAGE_SIZE
+
+
+def test_truncated_page_is_not_cached_as_missing():
+    calls = []
+    client = make_client(capped_get(2, calls))
+    client.cache = ResponseCache(":memory:")
+    ids = ["mp-1", "mp-2", "mp-3"]
+    assert set(client.get_by_ids("/materials/summary/", ids, {})) == {"mp-1", "mp-2"}
+    # 被截断的 ID 没有记为空结果，再次查询时重新请求
+    client.get_by_ids("/materials/summary/", ids, {})
+    assert calls == [3, 1]
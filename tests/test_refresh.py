@@ -0,0 +1,67 @@
+"""增量刷新：请求失败的材料沿用上次记录"""
+
+import 获取主流半导体材料数据 as fetcher
+from mp_client import MPAPIError
+
+RUN_PARAMS = {"limit_per_system": None, "band_gap_range": [0.5, 6.0]}
+
+
+class FakeClient:
+    """summary 接口对 fail_summary 中的材料失败，电子结构接口对 fail_es 中的材料失败"""
+
+    def __init__(self, fail_summary=(), fail_es=()):
+        self.fail = {
+            "/materials/summary/": set(fail_summary),
+            "/materials/electronic_structure/": set(fail_es),
+        }
+
+    def get_by_ids(self, endpoint, ids, params, timeout=60, use_cache=True):
+        if self.fail[endpoint] & set(ids):
+            raise MPAPIError(f"{endpoint} 请求失败")
+        if endpoint == "/materials/summary/":
+            return {mid: {"material_id": mid, "band_gap": 2.0} for mid in ids}
+        return {mid: {"cbm": 1.0, "vbm": -1.0} for mid in ids}
+
+
+def run_refresh(monkeypatch, previous, current, client):
+    monkeypatch.setattr(fetcher, "client", client)
+    monkeypatch.setattr(
+        fetcher, "search_all_categories", lambda *args, **kwargs: {"氮化物": current}
+    )
+    result = fetcher.refresh_materials(
+        previous, RUN_PARAMS, chunk_size=1, max_workers=1
+    )
+    return {mat["material_id"]: mat for mat in result}
+
+
+def make_records(ids, last_updated):
+    return [
+        {
+            "material_id": mid,
+            "category": "氮化物",
+            "chemsys": "Ga-N",
+            "last_updated": last_updated,
+        }
+        for mid in ids
+    ]
+
+
+def test_failed_batches_keep_previous_records(monkeypatch):
+    previous = [
+        {**mat, "band_gap": 3.0, "cbm": 2.0, "vbm": -2.0}
+        for mat in make_records(["mp-1", "mp-2", "mp-3"], "2024-01-01")
+    ]
+    current = make_records(["mp-1", "mp-2", "mp-3", "mp-4"], "2025-01-01")
+    client = FakeClient(fail_summary=["mp-1", "mp-4"], fail_es=["mp-2"])
+
+    by_id = run_refresh(monkeypatch, previous, current, client)
+
+    # summary 或电子结构失败：沿用上次记录，能带边不丢失
+    for mid in ["mp-1", "mp-2"]:
+        assert by_id[mid]["cbm"] == 2.0 and by_id[mid]["vbm"] == -2.0
+        assert by_id[mid]["last_updated"] == "2024-01-01"
+    # 全部成功：使用新数据
+    assert by_id["mp-3"]["cbm"] == 1.0 and by_id["mp-3"]["band_gap"] == 2.0
+    # 没有上次记录的新材料保留已获取的字段
+    assert by_id["mp-4"]["last_updated"] == "2025-01-01"
+    assert list(by_id) == ["mp-1", "mp-2", "mp-3", "mp-4"]
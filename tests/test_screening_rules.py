@@ -0,0 +1,94 @@
+"""筛选规则：内置默认规则及批量评估函数与原逐条评估的结果一致"""
+
+import random
+
+import numpy as np
+import pytest
+
+import 获取主流半导体材料数据 as fetcher
+from screening_rules import columns_from_records, load_rules
+
+
+def photovoltaic_reference(mat):
+    """原逐条评估的光伏应用潜力"""
+    bg = mat.get("band_gap")
+    energy_hull = mat.get("energy_above_hull", 1)
+    if not bg:
+        return "未知"
+    if 1.1 <= bg <= 1.8 and energy_hull < 0.05:
+        return "优秀"
+    elif 0.8 <= bg <= 2.5 and energy_hull < 0.1:
+        return "良好"
+    elif 0.5 <= bg <= 3.0:
+        return "一般"
+    return "较低"
+
+
+def photocatalytic_reference(mat):
+    """原逐条评估的光催化应用潜力"""
+    bg = mat.get("band_gap")
+    cbm = mat.get("cbm")
+    vbm = mat.get("vbm")
+    if not bg:
+        return "未知"
+    if 1.8 < bg < 3.5:
+        if cbm and vbm:
+            if cbm < 0 and vbm > -2.5:
+                return "优秀"
+            elif cbm < 0.5:
+                return "良好"
+        return "一般"
+    elif 1.5 <= bg <= 4.0:
+        return "一般"
+    return "较低"
+
+
+def sample_materials(n=2000, seed=0):
+    rng = random.Random(seed)
+    boundaries = [0, 0.5, 0.8, 1.1, 1.5, 1.8, 2.5, 3.0, 3.5, 4.0]
+    materials = []
+    for _ in range(n):
+        mat = {
+            "band_gap": rng.choice([rng.uniform(0, 5), rng.choice(boundaries)]),
+            "energy_above_hull": rng.choice([0.0, 0.05, 0.1, rng.uniform(0, 0.3)]),
+            "cbm": rng.choice([None, 0.0, 0.5, rng.uniform(-2, 2)]),
+            "vbm": rng.choice([None, -2.5, rng.uniform(-4, 0)]),
+        }
+        for field in ("energy_above_hull", "cbm", "vbm"):
+            if rng.random() < 0.1:
+                del mat[field]
+        materials.append(mat)
+    return materials
+
+
+@pytest.mark.parametrize(
+    "screen, reference",
+    [
+        ("photovoltaic", photovoltaic_reference),
+        ("photocatalytic", photocatalytic_reference),
+    ],
+)
+def test_default_rules_match_reference(screen, reference):
+    rules = load_rules()
+    materials = sample_materials()
+    columns = columns_from_records(materials, rules.screens[screen].fields)
+    labels = rules.screens[screen].evaluate(columns)
+    expected = np.array([reference(mat) for mat in materials])
+    assert (labels == expected).all()
+
+
+def test_batch_assessors_match_reference():
+    materials = sample_materials()
+    columns = columns_from_records(
+        materials, ["band_gap", "energy_above_hull", "cbm", "vbm"]
+    )
+    photovoltaic = fetcher.assess_photovoltaic_potential_batch(
+        columns["band_gap"], columns["energy_above_hull"]
+    )
+    photocatalytic = fetcher.assess_photocatalytic_potential_batch(
+        columns["band_gap"], columns["cbm"], columns["vbm"]
+    )
+    assert (photovoltaic == [photovoltaic_reference(mat) for mat in materials]).all()
+    assert (
+        photocatalytic == [photocatalytic_reference(mat) for mat in materials]
+    ).all()
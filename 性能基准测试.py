@@ -0,0 +1,567 @@
+"""
+半导体材料数据流水线 - 端到端性能基准测试
+作者: Luffy.Solution
+功能: 在 100 ~ 1,000,000 个材料规模下分阶段测量耗时与峰值内存，
+      给出各阶段的规模曲线，并与基线文件对比检测性能回退
+
+测试阶段:
+    search     并发搜索（本地模拟服务器）
+    enrich     批量获取电子结构（本地模拟服务器）
+    dataframe  create_dataframe
+    excel      write_excel（写出美化的 Excel）
+    report     save_summary_report
+    chart1~8   数据可视化分析.py 中的 8 个图表
+    charts     render_charts 多进程并行绘制全部图表（峰值内存不含工作进程）
+
+每次测量在独立的子进程中进行：输入数据在计时前构造完毕，
+峰值内存取子进程的 ru_maxrss（包含输入数据本身，输入占用单独列出）。
+
+使用方法:
+    python 性能基准测试.py                                  # 默认 100,1000,10000
+    python 性能基准测试.py --sizes 100,1000,10000,100000,1000000 --timeout 3600
+    python 性能基准测试.py --stages dataframe,excel,chart3
+    python 性能基准测试.py --save-baseline                  # 记录基线
+    python 性能基准测试.py --baseline benchmark_baseline.json --tolerance 0.2
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+from contextlib import redirect_stdout
+from datetime import datetime
+from queue import Empty
+
+import numpy as np
+import requests
+
+try:
+    import resource
+except ImportError:  # Windows 无 resource 模块，不记录峰值内存
+    resource = None
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVER_SCRIPT = os.path.join(SCRIPT_DIR, "模拟MP服务器.py")
+
+NETWORK_STAGES = ["search", "enrich"]
+LOCAL_STAGES = ["dataframe", "excel", "report"]
+CHART_STAGES = [f"chart{i}" for i in range(1, 9)] + ["charts"]
+ALL_STAGES = NETWORK_STAGES + LOCAL_STAGES + CHART_STAGES
+
+DEFAULT_SIZES = "100,1000,10000"
+# 合成数据中通过搜索条件（稳定相、非金属、带隙在范围内）的比例约为 0.53
+SEARCH_YIELD = 0.53
+DB_VERSION = "sim-2025.01"
+
+
+# ============================================================================
+# 测试输入
+# ============================================================================
+def per_chemsys_for(size, n_chemsys):
+    """使搜索结果约为 size 个材料的每化学系统生成数"""
+    return max(1, math.ceil(size / (n_chemsys * SEARCH_YIELD)))
+
+
+def synthetic_materials(fetcher, per_chemsys, seed=0):
+    """
+    在本地生成与模拟服务器一致的材料记录（等价于搜索 + 电子结构合并后的结果）
+    """
+    from 模拟MP服务器 import generate_chemsys_materials
+
+    bg_min, bg_max = fetcher.get_screening_rules().band_gap_range
+    materials = []
+    for category_name, category_info in fetcher.SEMICONDUCTOR_CATEGORIES.items():
+        for chemsys in category_info["elements"]:
+            for mat in generate_chemsys_materials(
+                chemsys, per_chemsys, seed, DB_VERSION
+            ):
+                if (
+                    mat["is_stable"]
+                    and not mat["is_metal"]
+                    and bg_min <= mat["band_gap"] <= bg_max
+                ):
+                    materials.append({
+                        **mat,
+                        "category": category_name,
+                        "chemsys": chemsys,
+                    })
+    return materials
+
+
+def current_rss_mb():
+    """当前进程的常驻内存（MB），无法获取时返回 None"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss_mb():
+    """进程的峰值常驻内存（MB），无法获取时返回 None"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+# ============================================================================
+# 子进程：单次测量
+# ============================================================================
+def prepare_stage(stage, options, workdir):
+    """构造阶段输入（不计时），返回待测函数（无参数，返回处理的材料数）"""
+    import 获取主流半导体材料数据 as fetcher
+    from mp_client import MPClient
+
+    if stage in NETWORK_STAGES:
+        fetcher.client = MPClient(
+            options["url"],
+            None,
+            rate_limit=options["rate"],
+            max_concurrency=options["workers"],
+        )
+
+    if stage == "search":
+
+        def run():
+            results = fetcher.search_all_categories(
+                fetcher.SEMICONDUCTOR_CATEGORIES,
+                None,
+                max_workers=options["workers"],
+                use_cache=False,
+            )
+            return sum(len(materials) for materials in results.values())
+
+        return run
+
+    materials = synthetic_materials(fetcher, options["per_chemsys"], options["seed"])
+
+    if stage == "enrich":
+        fields = set(fetcher.SUMMARY_FIELDS.split(",")) | {"category", "chemsys"}
+        materials = [{k: v for k, v in mat.items() if k in fields} for mat in materials]
+
+        def run():
+            fetcher.enrich_material_data(
+                materials, max_workers=options["workers"], use_cache=False
+            )
+            return len(materials)
+
+        return run
+
+    if stage == "dataframe":
+
+        def run():
+            return len(fetcher.create_dataframe(materials))
+
+        return run
+
+    df = fetcher.create_dataframe(materials)
+
+    if stage == "excel":
+        excel_file = os.path.join(workdir, "benchmark.xlsx")
+
+        def run():
+            fetcher.write_excel(df, excel_file)
+            return len(df)
+
+        return run
+
+    if stage == "report":
+        report_file = os.path.join(workdir, "benchmark_report.txt")
+
+        def run():
+            fetcher.save_summary_report(df, report_file)
+            return len(df)
+
+        return run
+
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import 数据可视化分析 as visualizer
+
+    # create_dataframe 与 load_materials 使用同一列定义，数值列已是 float64，
+    # 与可视化脚本读取到的数据表一致
+    chart_df = df
+    visualizer.setup_plot_style()
+
+    if stage == "charts":
+
+        def run():
+            visualizer.render_charts(chart_df, output_dir=workdir)
+            return len(chart_df)
+
+        return run
+
+    (chart,) = visualizer.get_charts([int(stage[len("chart") :])])
+
+    def run():
+        # 计时包含该图表的数据准备（分组、列数组与统计量）
+        chart.render(visualizer.ChartData(chart_df), output_dir=workdir)
+        return len(chart_df)
+
+    return run
+
+
+def measure_stage(stage, options, queue):
+    """在子进程中执行一次测量，结果通过 queue 返回"""
+    sys.path.insert(0, SCRIPT_DIR)
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            with open(os.devnull, "w", encoding="utf-8") as devnull:
+                with redirect_stdout(devnull):
+                    run = prepare_stage(stage, options, workdir)
+                    input_rss = current_rss_mb()
+                    start = time.perf_counter()
+                    count = run()
+                    seconds = time.perf_counter() - start
+        queue.put({
+            "status": "ok",
+            "n": count,
+            "seconds": seconds,
+            "peak_rss_mb": peak_rss_mb(),
+            "input_rss_mb": input_rss,
+        })
+    except Exception as e:
+        queue.put({
+            "status": "error",
+            "error": f"{type(e).__name__}: {e}",
+            "traceback": traceback.format_exc(),
+        })
+
+
+def run_measurement(stage, options, timeout):
+    """启动独立子进程测量一个阶段，超时或崩溃时返回对应状态"""
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    process = ctx.Process(target=measure_stage, args=(stage, options, queue))
+    process.start()
+
+    result = None
+    deadline = time.time() + timeout
+    while result is None and time.time() < deadline:
+        alive = process.is_alive()
+        try:
+            result = queue.get(timeout=1)
+        except Empty:
+            if not alive:
+                break
+
+    process.join(5)
+    if process.is_alive():
+        process.terminate()
+        process.join()
+    if result is not None:
+        return result
+    if time.time() >= deadline:
+        return {"status": "timeout", "error": f"超过 {timeout} 秒"}
+    return {"status": "error", "error": f"子进程异常退出（退出码 {process.exitcode}）"}
+
+
+# ============================================================================
+# 模拟服务器
+# ============================================================================
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_mock_server(per_chemsys, seed, chemsys_list):
+    """以独立进程启动模拟服务器并预先生成数据，返回 (进程, URL)"""
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            SERVER_SCRIPT,
+            "--port",
+            str(port),
+            "--per-chemsys",
+            str(per_chemsys),
+            "--seed",
+            str(seed),
+            "--db-version",
+            DB_VERSION,
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 30
+    while True:
+        try:
+            requests.get(f"{url}/heartbeat", timeout=1).raise_for_status()
+            break
+        except requests.RequestException:
+            if process.poll() is not None or time.time() > deadline:
+                process.kill()
+                raise RuntimeError("模拟服务器启动失败")
+            time.sleep(0.2)
+
+    # 预先生成全部化学系统的数据，使 enrich 可以单独测量
+    requests.get(
+        f"{url}/materials/summary/",
+        params={"chemsys": ",".join(chemsys_list), "_limit": 1},
+        timeout=600,
+    ).raise_for_status()
+    return process, url
+
+
+# ============================================================================
+# 结果分析
+# ============================================================================
+def scaling_exponent(points):
+    """对 (材料数, 耗时) 做对数线性拟合，返回 耗时 ∝ N^k 中的 k"""
+    points = [(n, s) for n, s in points if n and s and n > 0 and s > 0]
+    if len({n for n, _ in points}) < 2:
+        return None
+    log_n = np.log([n for n, _ in points])
+    log_s = np.log([s for _, s in points])
+    return float(np.polyfit(log_n, log_s, 1)[0])
+
+
+def compare_baseline(results, baseline, tolerance):
+    """返回超过基线 (1 + tolerance) 倍的 [(阶段, 规模, 指标, 基线值, 当前值)]"""
+    regressions = []
+    for stage, by_size in results.items():
+        for size, result in by_size.items():
+            base = baseline.get("results", {}).get(stage, {}).get(size)
+            if not base or base.get("status") != "ok" or result.get("status") != "ok":
+                continue
+            for metric in ("seconds", "peak_rss_mb"):
+                old, new = base.get(metric), result.get(metric)
+                if old and new and new > old * (1 + tolerance):
+                    regressions.append((stage, size, metric, old, new))
+    return regressions
+
+
+def print_table(results, sizes, stages):
+    """打印耗时与峰值内存表"""
+    header = f"{'阶段':<12}" + "".join(f"{f'N={size}':>22}" for size in sizes)
+    print(header + f"{'规模指数':>10}")
+    print("-" * (len(header) + 14))
+    for stage in stages:
+        cells = []
+        points = []
+        for size in sizes:
+            result = results.get(stage, {}).get(str(size), {})
+            if result.get("status") == "ok":
+                rss = result.get("peak_rss_mb")
+                rss_text = f"{rss:.0f}MB" if rss is not None else "-"
+                cells.append(f"{result['seconds']:>10.3f}s {rss_text:>9}")
+                points.append((result["n"], result["seconds"]))
+            else:
+                cells.append(f"{result.get('status', '-'):>21}")
+        exponent = scaling_exponent(points)
+        exponent_text = f"{exponent:.2f}" if exponent is not None else "-"
+        print(
+            f"{stage:<12}"
+            + "".join(f"{cell:>22}" for cell in cells)
+            + f"{exponent_text:>10}"
+        )
+
+
+def plot_scaling(results, stages, filename):
+    """绘制各阶段耗时随材料数变化的对数曲线"""
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(10, 7))
+    for stage in stages:
+        points = sorted(
+            (r["n"], r["seconds"])
+            for r in results.get(stage, {}).values()
+            if r.get("status") == "ok" and r.get("n")
+        )
+        if points:
+            ax.plot(*zip(*points), marker="o", label=stage)
+    ax.set_xscale("log")
+    ax.set_yscale("log")
+    ax.set_xlabel("Materials (N)")
+    ax.set_ylabel("Wall time (s)")
+    ax.grid(True, which="both", alpha=0.3)
+    ax.legend(ncol=2)
+    plt.tight_layout()
+    plt.savefig(filename, dpi=150)
+    plt.close()
+
+
+# ============================================================================
+# 主程序
+# ============================================================================
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="半导体材料数据流水线性能基准测试")
+    parser.add_argument(
+        "--sizes",
+        default=DEFAULT_SIZES,
+        help=f"逗号分隔的材料规模（默认 {DEFAULT_SIZES}，最大可到 1000000）",
+    )
+    parser.add_argument(
+        "--stages",
+        default=",".join(ALL_STAGES),
+        help="逗号分隔的测试阶段（默认全部）",
+    )
+    parser.add_argument("--workers", type=int, default=8, help="网络阶段的并发数")
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=1000.0,
+        help="网络阶段的每秒请求上限（模拟服务器无配额，默认 1000）",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="合成数据随机种子")
+    parser.add_argument(
+        "--timeout", type=float, default=1800, help="单次测量的超时时间（秒）"
+    )
+    parser.add_argument(
+        "--output", default="benchmark_results.json", help="本次结果输出文件"
+    )
+    parser.add_argument(
+        "--baseline", default="benchmark_baseline.json", help="用于回退检测的基线文件"
+    )
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="将本次结果保存为基线"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="允许相对基线变慢/变大的比例（默认 0.2，即 20%%）",
+    )
+    parser.add_argument("--plot", help="输出规模曲线图（PNG 文件名）")
+    return parser.parse_args()
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    unknown = [stage for stage in stages if stage not in ALL_STAGES]
+    if unknown:
+        print(f"❌ 未知的测试阶段: {', '.join(unknown)}")
+        print(f"   可选: {', '.join(ALL_STAGES)}")
+        sys.exit(2)
+
+    sys.path.insert(0, SCRIPT_DIR)
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        with redirect_stdout(devnull):
+            import 获取主流半导体材料数据 as fetcher
+    chemsys_list = sorted({
+        fetcher.normalize_chemsys(chemsys)
+        for category_info in fetcher.SEMICONDUCTOR_CATEGORIES.values()
+        for chemsys in category_info["elements"]
+    })
+
+    print("=" * 80)
+    print("半导体材料数据流水线 - 性能基准测试")
+    print("=" * 80)
+    print(f"规模: {', '.join(map(str, sizes))}")
+    print(f"阶段: {', '.join(stages)}")
+    print(f"化学系统: {len(chemsys_list)} 个")
+    print()
+
+    results = {stage: {} for stage in stages}
+    for size in sizes:
+        per_chemsys = per_chemsys_for(size, len(chemsys_list))
+        options = {
+            "per_chemsys": per_chemsys,
+            "seed": args.seed,
+            "workers": args.workers,
+            "rate": args.rate,
+            "url": None,
+        }
+        print(f"\n{'=' * 80}")
+        print(f"规模 N≈{size}（每个化学系统生成 {per_chemsys} 个材料）")
+        print(f"{'=' * 80}")
+
+        server = None
+        if any(stage in NETWORK_STAGES for stage in stages):
+            server, options["url"] = start_mock_server(
+                per_chemsys, args.seed, chemsys_list
+            )
+        try:
+            for stage in stages:
+                result = run_measurement(stage, options, args.timeout)
+                results[stage][str(size)] = result
+                if result["status"] == "ok":
+                    rss = result["peak_rss_mb"]
+                    print(
+                        f"  ✓ {stage:<10} N={result['n']:<8} {result['seconds']:9.3f}s"
+                        + (f"  峰值内存 {rss:.0f} MB" if rss is not None else "")
+                    )
+                else:
+                    print(f"  ✗ {stage:<10} {result['status']}: {result['error']}")
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+    print(f"\n{'=' * 80}")
+    print("汇总（耗时 / 峰值内存，规模指数 k 表示 耗时 ∝ N^k）")
+    print(f"{'=' * 80}")
+    print_table(results, sizes, stages)
+
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "sizes": sizes,
+        "results": results,
+        "scaling": {
+            stage: scaling_exponent([
+                (r["n"], r["seconds"])
+                for r in results[stage].values()
+                if r.get("status") == "ok"
+            ])
+            for stage in stages
+        },
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n✓ 结果已保存: {args.output}")
+
+    if args.plot:
+        plot_scaling(results, stages, args.plot)
+        print(f"✓ 规模曲线已保存: {args.plot}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"✓ 基线已保存: {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(
+            f"⚠ 未找到基线文件 {args.baseline}，跳过回退检测（可用 --save-baseline 记录）"
+        )
+        return
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare_baseline(results, baseline, args.tolerance)
+    if not regressions:
+        print(f"✓ 与基线相比无回退（容差 {args.tolerance:.0%}）")
+        return
+
+    print(f"\n❌ 检测到 {len(regressions)} 项性能回退（容差 {args.tolerance:.0%}）:")
+    for stage, size, metric, old, new in regressions:
+        print(
+            f"  {stage} N={size} {metric}: {old:.3f} → {new:.3f} ({new / old - 1:+.0%})"
+        )
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,62 +5,152 @@ Materials Project - 半导体材料数据可视化分析（终极版 - 彻底解
 功能: 对获取的半导体材料数据进行可视化分析，彻底解决中文显示问题
 """
 
+import argparse
+import functools
+import hashlib
+import json
 import os
+import shutil
+import subprocess
+import sys
+import time
 import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
+import matplotlib
 import matplotlib.font_manager as fm
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import seaborn as sns
+from matplotlib.cbook import violin_stats
 from matplotlib.font_manager import FontProperties
+from scipy.stats import linregress
+from sklearn.preprocessing import StandardScaler
 
-warnings.filterwarnings("ignore")
+from binned_kde import BinnedKDE, violin_kde
+from materials_loader import load_materials
+from materials_ranking import PV_RANKING, rank
+from materials_stats import compute_stats
+from screening_rules import load_rules
 
+# 可选配置（config.py），与获取脚本共用
+try:
+    import config
+except ImportError:
+    config = None
 
 # ============================================================================
-# 字体配置 - 终极解决方案
+# 字体配置 - 查找一次中文字体并记住选择，只注册该字体文件
 # ============================================================================
-def setup_chinese_fonts_ultimate():
-    """终极中文字体配置方案 - 直接指定字体文件路径"""
-
-    print("正在配置中文字体...")
-
-    # Windows系统中文字体文件路径
-    font_paths = [
-        r"C:\Windows\Fonts\msyh.ttc",  # 微软雅黑
-        r"C:\Windows\Fonts\msyhbd.ttc",  # 微软雅黑 Bold
-        r"C:\Windows\Fonts\simhei.ttf",  # 黑体
-        r"C:\Windows\Fonts\simsun.ttc",  # 宋体
-        r"C:\Windows\Fonts\simkai.ttf",  # 楷体
-        r"C:\Windows\Fonts\simfang.ttf",  # 仿宋
-    ]
+# 常见中文字体文件（按优先级）
+CJK_FONT_PATHS = [
+    # Windows
+    r"C:\Windows\Fonts\msyh.ttc",  # 微软雅黑
+    r"C:\Windows\Fonts\msyhbd.ttc",  # 微软雅黑 Bold
+    r"C:\Windows\Fonts\simhei.ttf",  # 黑体
+    r"C:\Windows\Fonts\simsun.ttc",  # 宋体
+    r"C:\Windows\Fonts\simkai.ttf",  # 楷体
+    r"C:\Windows\Fonts\simfang.ttf",  # 仿宋
+    # macOS
+    "/System/Library/Fonts/PingFang.ttc",
+    "/System/Library/Fonts/STHeiti Medium.ttc",
+    "/System/Library/Fonts/Hiragino Sans GB.ttc",
+    "/Library/Fonts/Arial Unicode.ttf",
+    # Linux
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/google-noto-cjk/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/truetype/wqy/wqy-microhei.ttc",
+    "/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc",
+    "/usr/share/fonts/wenquanyi/wqy-microhei/wqy-microhei.ttc",
+]
 
-    # 查找第一个存在的字体文件
-    chinese_font_path = None
-    for font_path in font_paths:
-        if os.path.exists(font_path):
-            chinese_font_path = font_path
-            print(f"✓ 找到中文字体文件: {font_path}")
-            break
-
-    if chinese_font_path is None:
-        print("⚠ 警告: 未找到标准中文字体文件")
-        # 尝试从系统字体管理器获取
-        font_list = [
-            f.fname
-            for f in fm.fontManager.ttflist
-            if "Microsoft YaHei" in f.name or "SimHei" in f.name or "SimSun" in f.name
-        ]
-        if font_list:
-            chinese_font_path = font_list[0]
-            print(f"✓ 从字体管理器找到: {chinese_font_path}")
-        else:
-            print("✗ 无法找到中文字体，将使用系统默认字体")
-            return None, None
+# 在 matplotlib 字体列表中按名称查找时使用的中文字体族
+CJK_FONT_FAMILIES = [
+    "Microsoft YaHei",
+    "SimHei",
+    "SimSun",
+    "PingFang SC",
+    "Heiti SC",
+    "Noto Sans CJK SC",
+    "Source Han Sans SC",
+    "WenQuanYi Micro Hei",
+    "WenQuanYi Zen Hei",
+]
 
-    # 创建FontProperties对象
-    chinese_font_prop = FontProperties(fname=chinese_font_path)
+# 记住上次找到的字体文件（位于 matplotlib 缓存目录）
+FONT_CHOICE_FILE = "semiconductor_cjk_font.json"
+
+
+def _font_choice_path():
+    return os.path.join(matplotlib.get_cachedir(), FONT_CHOICE_FILE)
+
+
+def _fontconfig_cjk_font():
+    """通过 fontconfig（fc-list）查找支持中文的字体，未安装 fontconfig 时返回 None"""
+    try:
+        result = subprocess.run(
+            ["fc-list", ":lang=zh", "file"],
+            capture_output=True,
+            text=True,
+            timeout=10,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    # 输出格式为 "路径: "，按路径排序保证结果稳定
+    paths = sorted(line.split(":")[0].strip() for line in result.stdout.splitlines())
+    return next((path for path in paths if os.path.exists(path)), None)
+
+
+def find_cjk_font():
+    """
+    查找中文字体文件，返回路径，找不到时返回 None
+
+    查找顺序：上次记住的字体 -> 常见字体路径 -> fontconfig -> matplotlib 字体列表。
+    找到后写入 matplotlib 缓存目录，之后的运行直接使用。
+    """
+    choice_path = _font_choice_path()
+    try:
+        with open(choice_path, encoding="utf-8") as f:
+            cached = json.load(f).get("path")
+        if cached and os.path.exists(cached):
+            return cached
+    except (OSError, ValueError):
+        pass
+
+    font_path = next((path for path in CJK_FONT_PATHS if os.path.exists(path)), None)
+    if font_path is None:
+        font_path = _fontconfig_cjk_font()
+    if font_path is None:
+        font_path = next(
+            (f.fname for f in fm.fontManager.ttflist if f.name in CJK_FONT_FAMILIES),
+            None,
+        )
+    if font_path is not None:
+        try:
+            with open(choice_path, "w", encoding="utf-8") as f:
+                json.dump({"path": font_path}, f, ensure_ascii=False)
+        except OSError:
+            pass
+    return font_path
+
+
+@functools.lru_cache(maxsize=None)
+def setup_chinese_fonts():
+    """
+    配置中文字体（每个进程只执行一次），返回 (FontProperties, 字体名)，
+    找不到中文字体时返回 (None, None)
+
+    只向 matplotlib 注册找到的字体文件，不重建整个字体缓存。
+    """
+    font_path = find_cjk_font()
+    if font_path is None:
+        print("✗ 无法找到中文字体，将使用系统默认字体")
+        return None, None
+
+    fm.fontManager.addfont(font_path)
+    chinese_font_prop = FontProperties(fname=font_path)
     font_name = chinese_font_prop.get_name()
 
     # 配置matplotlib全局字体 - 多重保险
@@ -74,26 +164,15 @@ def setup_chinese_fonts_ultimate():
     plt.rcParams["font.family"] = "sans-serif"
     plt.rcParams["axes.unicode_minus"] = False  # 解决负号显示问题
 
-    # 强制刷新字体缓存
-    fm._load_fontmanager(try_read_cache=False)
-
-    print(f"✓ 字体配置完成: {font_name}")
-    print(f"✓ 字体文件: {chinese_font_path}")
-
+    print(f"✓ 中文字体: {font_name}（{font_path}）")
     return chinese_font_prop, font_name
 
 
-# 初始化字体
-chinese_font_prop, font_name = setup_chinese_fonts_ultimate()
-
 # ============================================================================
 # 美化配置 - 专业学术风格
 # ============================================================================
-sns.set_style("whitegrid")
-sns.set_context("notebook", font_scale=1.15)
-
 # 高质量输出配置
-plt.rcParams.update({
+PLOT_RC_PARAMS = {
     "figure.dpi": 300,
     "savefig.dpi": 300,
     "savefig.bbox": "tight",
@@ -110,7 +189,19 @@ plt.rcParams.update({
     "grid.linewidth": 0.8,
     "grid.alpha": 0.4,
     "lines.linewidth": 2.5,
-})
+}
+
+
+@functools.lru_cache(maxsize=None)
+def setup_plot_style():
+    """配置绘图样式与中文字体（每个进程只执行一次，绘图前调用）"""
+    warnings.filterwarnings("ignore")
+    sns.set_style("whitegrid")
+    sns.set_context("notebook", font_scale=1.15)
+    plt.rcParams.update(PLOT_RC_PARAMS)
+    # seaborn 样式会重置 font.sans-serif，字体需在其后配置
+    setup_chinese_fonts()
+
 
 # 材料类别配色方案
 CATEGORY_COLORS = {
@@ -126,567 +217,1241 @@ CATEGORY_COLORS = {
     "砷化物": "#E74C3C",
 }
 
-print("=" * 80)
-print("Materials Project - 半导体材料数据可视化分析（终极版）")
-print("=" * 80)
-print()
-
-# 读取数据
-print("正在读取数据...")
-df = pd.read_excel("H:\material project\半导体信息查询\主流半导体材料数据库.xlsx")
-print(f"✓ 已加载 {len(df)} 个材料的数据\n")
-
-# 数据预处理
-for col in df.columns:
-    df[col] = df[col].replace("N/A", np.nan)
-
-numeric_cols = [
-    "带隙 (eV)",
-    "导带底 CBM (eV)",
-    "价带顶 VBM (eV)",
-    "费米能级 (eV)",
-    "形成能 (eV/atom)",
-    "能量高于凸包 (eV/atom)",
-    "密度 (g/cm³)",
-    "体积 (Ų)",
+# 数据文件：命令行 --data 或 config.py 中的 DATA_FILE 指定，
+# 否则按 DATA_SOURCES 的顺序使用第一个存在的获取脚本输出（读取由快到慢，Excel 仅作后备）
+DATA_FILE = getattr(config, "DATA_FILE", None)
+DATA_SOURCES = [
+    "主流半导体材料数据库.parquet",
+    "主流半导体材料数据库.json",
+    getattr(config, "STORE_FILE", "主流半导体材料数据库.sqlite"),
+    "主流半导体材料数据库.xlsx",
 ]
-for col in numeric_cols:
-    if col in df.columns:
-        df[col] = pd.to_numeric(df[col], errors="coerce")
+# 从 JSON / SQLite 读取时按该规则文件计算应用潜力列（与获取脚本一致）
+SCREENING_RULES_FILE = getattr(config, "SCREENING_RULES_FILE", "screening_rules.toml")
+
 
 # ============================================================================
-# 1. 带隙分布 - 小提琴图
+# 大数据量绘图：点数超过阈值时改用按类别着色的密度栅格或分层抽样，
+# 绘图耗时与文件大小不再随材料数增长
 # ============================================================================
-print("正在生成图表 1: 带隙分布（按类别）...")
-
-fig, ax = plt.subplots(figsize=(16, 9))
-bg_data = df[df["带隙 (eV)"].notna()].copy()
-categories = sorted(bg_data["分类"].unique())
-
-# 准备数据
-plot_data = []
-for cat in categories:
-    cat_data = bg_data[bg_data["分类"] == cat]
-    for val in cat_data["带隙 (eV)"]:
-        plot_data.append({"分类": cat, "带隙": val})
-
-plot_df = pd.DataFrame(plot_data)
-
-# 创建小提琴图
-parts = ax.violinplot(
-    [bg_data[bg_data["分类"] == cat]["带隙 (eV)"].values for cat in categories],
-    positions=range(len(categories)),
-    showmeans=True,
-    showmedians=True,
-    widths=0.7,
-)
-
-# 美化小提琴图
-for i, pc in enumerate(parts["bodies"]):
-    color = CATEGORY_COLORS.get(categories[i], "#95A5A6")
-    pc.set_facecolor(color)
-    pc.set_alpha(0.7)
-    pc.set_edgecolor("black")
-    pc.set_linewidth(1.5)
-
-# 美化其他元素
-for partname in ("cbars", "cmins", "cmaxes", "cmedians", "cmeans"):
-    if partname in parts:
-        vp = parts[partname]
-        vp.set_edgecolor("black")
-        vp.set_linewidth(2)
-
-# 添加散点
-for i, cat in enumerate(categories):
-    cat_data = bg_data[bg_data["分类"] == cat]["带隙 (eV)"]
-    y = cat_data.values
-    x = np.random.normal(i, 0.04, size=len(y))
-    ax.scatter(
-        x, y, alpha=0.5, s=40, color="white", edgecolors="black", linewidths=1, zorder=3
-    )
-
-ax.set_xticks(range(len(categories)))
-ax.set_xticklabels(categories, rotation=45, ha="right", fontsize=12, fontweight="bold")
-ax.set_ylabel("带隙 (eV)", fontsize=14, fontweight="bold")
-ax.set_xlabel("材料类别", fontsize=14, fontweight="bold")
-ax.set_title("主流半导体材料带隙分布（按类别）", fontsize=18, fontweight="bold", pad=20)
-
-# 添加网格
-ax.grid(True, alpha=0.3, linestyle="--", linewidth=0.8)
-ax.set_axisbelow(True)
-
-# 添加样本数标注
-for i, cat in enumerate(categories):
-    n = len(bg_data[bg_data["分类"] == cat])
-    y_max = bg_data[bg_data["分类"] == cat]["带隙 (eV)"].max()
+LARGE_N_THRESHOLD = 20000  # 散点数超过该值时切换到大数据量模式
+MAX_SCATTER_POINTS = 5000  # 分层抽样后的散点总数上限
+DENSITY_BINS = (400, 300)  # 密度栅格的 (横向, 纵向) 像素数
+
+
+def stratified_sample(groups, max_points=MAX_SCATTER_POINTS, seed=0):
+    """
+    按类别分层抽样：各类别按原有比例分配名额（每类至少保留 min(数量, 50) 个），
+    随机种子固定，结果可复现
+
+    参数:
+        groups: ChartData.grouped 的结果 {分类: {列名: 数组}}
+        max_points: 抽样后的总数上限（近似）
+        seed: 随机种子
+    """
+    total = group_size(groups)
+    if total <= max_points:
+        return groups
+    rng = np.random.default_rng(seed)
+    sampled = {}
+    for cat, arrays in groups.items():
+        size = len(next(iter(arrays.values())))
+        quota = max(round(size * max_points / total), min(size, 50))
+        if quota < size:
+            keep = np.sort(rng.choice(size, quota, replace=False))
+            arrays = {col: values[keep] for col, values in arrays.items()}
+        sampled[cat] = arrays
+    return sampled
+
+
+def _bin_index(values, bins):
+    """数值 -> (箱序号, 箱边界)"""
+    low, high = values.min(), values.max()
+    if high <= low:
+        high = low + 1e-9
+    edges = np.linspace(low, high, bins + 1)
+    index = np.clip(np.searchsorted(edges, values, side="right") - 1, 0, bins - 1)
+    return index, edges
+
+
+def plot_category_density(ax, groups, x_col, y_col, bins=DENSITY_BINS, marker_size=150):
+    """
+    按类别着色的密度栅格：每个像素取数量最多的类别的颜色（CATEGORY_COLORS），
+    不透明度随该像素的材料数（对数）增加；图例与散点模式一致
+
+    参数:
+        ax: 坐标轴
+        groups: ChartData.grouped 的结果（x_col、y_col 无缺失）
+        x_col, y_col: 横纵坐标列
+        bins: 栅格的 (横向, 纵向) 像素数
+        marker_size: 图例标记大小
+    """
+    nx, ny = bins
+    categories = list(groups)
+    x = np.concatenate([arrays[x_col] for arrays in groups.values()])
+    y = np.concatenate([arrays[y_col] for arrays in groups.values()])
+    sizes = [len(arrays[x_col]) for arrays in groups.values()]
+    xi, x_edges = _bin_index(x, nx)
+    yi, y_edges = _bin_index(y, ny)
+    flat = yi * nx + xi
+    del xi, yi
+
+    # 逐个类别计数，只保留当前最多的类别及其计数，不同时持有所有类别的计数层
+    total = np.zeros(ny * nx, dtype=np.uint32)
+    best = np.zeros(ny * nx, dtype=np.uint32)
+    best_code = np.zeros(ny * nx, dtype=np.intp)
+    start = 0
+    for code, size in enumerate(sizes):
+        counts = np.bincount(flat[start : start + size], minlength=ny * nx)
+        counts = counts.astype(np.uint32)
+        start += size
+        total += counts
+        # 数量相同时保留先出现的类别（与 argmax 一致）
+        more = counts > best
+        best[more] = counts[more]
+        best_code[more] = code
+    del flat, best
+
+    palette = np.array([
+        matplotlib.colors.to_rgb(CATEGORY_COLORS.get(cat, "#95A5A6"))
+        for cat in categories
+    ])
+    image = np.zeros((ny, nx, 4))
+    image[..., :3] = palette[best_code].reshape(ny, nx, 3)
+    shade = np.log1p(total) / np.log1p(total.max())
+    image[..., 3] = np.where(total > 0, 0.25 + 0.75 * shade, 0.0).reshape(ny, nx)
+
+    # 每个像素绘制为一个四边形：imshow 保存时会按输出分辨率（300 dpi）重采样整幅图像，
+    # 峰值内存达数百 MB，网格绘制只需栅格本身的大小
+    ax.pcolormesh(x_edges, y_edges, image, zorder=2)
+    for cat in categories:
+        ax.scatter(
+            [],
+            [],
+            s=marker_size,
+            label=cat,
+            color=CATEGORY_COLORS.get(cat, "#95A5A6"),
+            edgecolors="black",
+            linewidths=1.5,
+        )
     ax.text(
-        i,
-        y_max + 0.2,
-        f"n={n}",
-        ha="center",
-        va="bottom",
+        0.01,
+        0.01,
+        f"共 {len(x)} 个材料：颜色为数量最多的类别，深浅表示数量",
+        transform=ax.transAxes,
         fontsize=10,
-        fontweight="bold",
-        bbox=dict(
-            boxstyle="round,pad=0.5",
-            facecolor="white",
-            alpha=0.9,
-            edgecolor="gray",
-            linewidth=1.5,
-        ),
+        va="bottom",
+        bbox=dict(boxstyle="round,pad=0.4", facecolor="white", alpha=0.85),
     )
 
-plt.tight_layout()
-plt.savefig("01_带隙分布按类别_终极版.png", facecolor="white", dpi=300)
-print("✓ 已保存: 01_带隙分布按类别_终极版.png")
-plt.close()
+
+def find_data_file():
+    """DATA_SOURCES 中第一个存在的文件，都不存在时返回 None"""
+    for path in DATA_SOURCES:
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def load_data(path=None, columns=None):
+    """
+    读取获取脚本的输出（格式按扩展名判断，见 materials_loader），数值列为 float64
+
+    参数:
+        path: 数据文件，None 时使用 DATA_FILE 或 DATA_SOURCES 中第一个存在的文件
+        columns: 只读取的列（列投影），None 表示全部
+    """
+    path = path or DATA_FILE or find_data_file()
+    if path is None:
+        raise FileNotFoundError(
+            f"未找到数据文件（{', '.join(DATA_SOURCES)}），"
+            "请先运行获取脚本或用 --data 指定"
+        )
+    print(f"正在读取数据: {path}")
+    df = load_materials(path, columns=columns, rules=load_rules(SCREENING_RULES_FILE))
+    print(f"✓ 已加载 {len(df)} 个材料的数据（{df.shape[1]} 列）\n")
+    return df
+
 
 # ============================================================================
-# 2. 带隙分布直方图 - 应用分区
+# 图表数据准备：分类只分组一次，各图表需要的列数组与缺失值掩码按需计算并缓存，
+# 多张图表共用，准备数据的总耗时为 O(N)
 # ============================================================================
-print("正在生成图表 2: 带隙分布直方图（光电应用分区）...")
+class ChartData:
+    """
+    各图表共用的预处理数据
+
+    参数:
+        df: 材料数据表（load_materials 的结果，数值列为 float64）
+        stats: compute_stats(df) 的结果，None 时首次使用时计算
+    """
+
+    def __init__(self, df, stats=None):
+        self.df = df
+        self._stats = stats
+        # 一次分组得到各分类的行位置（按分类名排序，缺失分类不计入）
+        if "分类" in df.columns:
+            self._positions = df.groupby("分类", sort=True).indices
+        else:
+            self._positions = {}
+        self._columns = {}
+        self._masks = {}
+        self._grouped = {}
+
+    def __len__(self):
+        return len(self.df)
+
+    @property
+    def stats(self):
+        if self._stats is None:
+            self._stats = compute_stats(self.df)
+        return self._stats
+
+    def column(self, name):
+        """数值列 -> float 数组（缺失为 NaN）"""
+        if name not in self._columns:
+            self._columns[name] = self.df[name].to_numpy(dtype=float, na_value=np.nan)
+        return self._columns[name]
+
+    def mask(self, columns):
+        """这些数值列都不缺失的行（bool 数组）"""
+        columns = tuple(columns)
+        if columns not in self._masks:
+            valid = np.ones(len(self.df), dtype=bool)
+            for col in columns:
+                valid &= ~np.isnan(self.column(col))
+            self._masks[columns] = valid
+        return self._masks[columns]
+
+    def values(self, columns):
+        """这些列都不缺失的行上的各列数组: {列名: 数组}"""
+        valid = self.mask(columns)
+        return {col: self.column(col)[valid] for col in columns}
+
+    def grouped(self, columns, optional=()):
+        """
+        按分类分组的列数组: {分类: {列名: 数组}}，按分类名排列，只含有数据的分类
+
+        参数:
+            columns: 需要的数值列，只保留这些列都不缺失的行
+            optional: 一并取出、但允许缺失的列
+        """
+        key = (tuple(columns), tuple(optional))
+        if key not in self._grouped:
+            valid = self.mask(columns)
+            groups = {}
+            for cat, positions in self._positions.items():
+                positions = positions[valid[positions]]
+                if len(positions):
+                    groups[cat] = {
+                        col: self.column(col)[positions] for col in key[0] + key[1]
+                    }
+            self._grouped[key] = groups
+        return self._grouped[key]
+
+
+def group_size(groups):
+    """分组数据的总行数"""
+    return sum(len(next(iter(arrays.values()))) for arrays in groups.values())
 
-fig, ax = plt.subplots(figsize=(14, 8))
-bg_values = bg_data["带隙 (eV)"].values
 
-# 绘制直方图
-n, bins, patches = ax.hist(
-    bg_values, bins=35, alpha=0.8, edgecolor="black", linewidth=1.5, color="#3498db"
-)
+# ============================================================================
+# 图表注册表：每个图表声明输出文件名、标题和需要的数据列
+# ============================================================================
+class Chart:
+    """
+    已注册的图表
+
+    参数:
+        number: 图表编号（从 1 开始，按注册顺序）
+        filename: 输出文件名
+        title: 图表说明
+        columns: 绘图需要的数据列
+        plot: 绘图函数 plot(data)，data 为 ChartData，返回 Figure（无可绘制数据时返回 None）
+    """
+
+    def __init__(self, number, filename, title, columns, plot):
+        self.number = number
+        self.filename = filename
+        self.title = title
+        self.columns = list(columns)
+        self.plot = plot
+
+    def missing_columns(self, df):
+        """数据表中缺少的列"""
+        return [col for col in self.columns if col not in df.columns]
+
+    def cache_key(self, df, column_digests=None):
+        """
+        输出缓存的键：图表编号与文件名、绘图代码与样式、以及声明的数据列内容的哈希
+
+        只哈希图表用到的列，其它列变化不会使缓存失效。
+
+        参数:
+            df: 材料数据表
+            column_digests: 各列哈希的缓存 dict，多张图表共用同一列时只计算一次
+        """
+        if column_digests is None:
+            column_digests = {}
+        digest = hashlib.sha256()
+        meta = {
+            "version": CHART_CACHE_VERSION,
+            "number": self.number,
+            "filename": self.filename,
+            "code": _code_fingerprint(),
+            "font": find_cjk_font(),
+            "matplotlib": matplotlib.__version__,
+            "seaborn": sns.__version__,
+        }
+        digest.update(json.dumps(meta, sort_keys=True, ensure_ascii=False).encode())
+        for col in self.columns:
+            if col not in column_digests:
+                column_digests[col] = _column_digest(df[col])
+            digest.update(f"{col}\0{column_digests[col]}\0".encode())
+        return digest.hexdigest()
+
+    def render(self, data, output_dir="."):
+        """
+        绘制并保存，返回输出文件路径（无可绘制数据时返回 None）
+
+        参数:
+            data: ChartData（多张图表共用同一个，分组与列数组只计算一次）
+            output_dir: 输出目录
+        """
+        print(f"正在生成图表 {self.number}: {self.title}...")
+        missing = self.missing_columns(data.df)
+        if missing:
+            print(f"⚠ 跳过图表 {self.number}: 缺少数据列 {', '.join(missing)}")
+            return None
+        fig = self.plot(data)
+        if fig is None:
+            print(f"⚠ 跳过图表 {self.number}: 没有可绘制的数据")
+            return None
+        fig.tight_layout()
+        path = os.path.join(output_dir, self.filename)
+        fig.savefig(path, facecolor="white", dpi=300)
+        plt.close(fig)
+        print(f"✓ 已保存: {self.filename}")
+        return path
+
+
+# 按编号排列的全部图表
+CHARTS = []
+
+# 图表输出缓存目录：以 Chart.cache_key 命名保存 PNG，输入不变时直接复用
+CHART_CACHE_DIR = ".chart_cache"
+# 缓存格式或绘图行为有不体现在代码中的变化时递增
+CHART_CACHE_VERSION = 1
+# 每张图表保留最近使用的缓存条数，更早的自动删除
+CHART_CACHE_KEEP = 3
+
+
+def _column_digest(series):
+    """一列数据（类型、长度与内容）的哈希"""
+    digest = hashlib.sha256(f"{series.dtype}\0{len(series)}\0".encode())
+    if isinstance(series.dtype, np.dtype) and series.dtype.kind in "biufcmM":
+        digest.update(series.to_numpy().tobytes())
+    else:
+        # 文本等列：哈希编码数组与取值列表，比逐个哈希字符串快（这些列取值种类少）
+        codes, uniques = pd.factorize(series)
+        digest.update(codes.tobytes())
+        digest.update(json.dumps(list(map(str, uniques)), ensure_ascii=False).encode())
+    return digest.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def _code_fingerprint():
+    """绘图代码（本脚本及其使用的统计、排名、核密度估计模块）与样式配置的哈希"""
+    digest = hashlib.sha256()
+    for name in (
+        __name__,
+        compute_stats.__module__,
+        rank.__module__,
+        BinnedKDE.__module__,
+    ):
+        with open(sys.modules[name].__file__, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def register_chart(filename, title, columns):
+    """注册图表的装饰器，编号按注册顺序分配"""
+
+    def decorator(plot):
+        CHARTS.append(Chart(len(CHARTS) + 1, filename, title, columns, plot))
+        return plot
+
+    return decorator
+
+
+def get_charts(numbers=None):
+    """
+    按编号取图表，None 表示全部
+
+    参数:
+        numbers: 图表编号列表，如 [3, 8]
+    """
+    if numbers is None:
+        return list(CHARTS)
+    unknown = [n for n in numbers if not 1 <= n <= len(CHARTS)]
+    if unknown:
+        raise ValueError(
+            f"未知的图表编号: {', '.join(map(str, unknown))}（可选 1-{len(CHARTS)}）"
+        )
+    return [CHARTS[n - 1] for n in numbers]
+
 
-# 添加密度曲线
-from scipy import stats
-
-kde = stats.gaussian_kde(bg_values)
-x_range = np.linspace(bg_values.min(), bg_values.max(), 200)
-ax2 = ax.twinx()
-ax2.plot(
-    x_range,
-    kde(x_range) * len(bg_values) * (bins[1] - bins[0]),
-    color="#e74c3c",
-    linewidth=3.5,
-    label="密度曲线",
-    alpha=0.8,
+# ============================================================================
+# 1. 带隙分布 - 小提琴图
+# ============================================================================
+@register_chart(
+    "01_带隙分布按类别_终极版.png",
+    "带隙分布（按类别）",
+    columns=["分类", "带隙 (eV)"],
 )
-ax2.set_ylabel("密度", fontsize=14, fontweight="bold")
-ax2.grid(False)
+def plot_bandgap_violin(data):
+    """图表 1: 带隙分布 - 小提琴图"""
+    fig, ax = plt.subplots(figsize=(16, 9))
+    groups = data.grouped(["带隙 (eV)"])
+    categories = list(groups)
+
+    # 创建小提琴图（密度用分箱 FFT 核密度估计，耗时不随样本数平方增长）
+    vpstats = violin_stats(
+        [arrays["带隙 (eV)"] for arrays in groups.values()], violin_kde
+    )
+    parts = ax.violin(
+        vpstats,
+        positions=range(len(categories)),
+        showmeans=True,
+        showmedians=True,
+        widths=0.7,
+    )
 
-# 添加应用区域标记
-ax.axvspan(1.1, 1.8, alpha=0.15, color="green", label="光伏最佳区 (1.1-1.8 eV)")
-ax.axvspan(2.0, 3.5, alpha=0.15, color="purple", label="光催化候选区 (2.0-3.5 eV)")
+    # 美化小提琴图
+    for i, pc in enumerate(parts["bodies"]):
+        color = CATEGORY_COLORS.get(categories[i], "#95A5A6")
+        pc.set_facecolor(color)
+        pc.set_alpha(0.7)
+        pc.set_edgecolor("black")
+        pc.set_linewidth(1.5)
+
+    # 美化其他元素
+    for partname in ("cbars", "cmins", "cmaxes", "cmedians", "cmeans"):
+        if partname in parts:
+            vp = parts[partname]
+            vp.set_edgecolor("black")
+            vp.set_linewidth(2)
+
+    # 添加散点（数据量大时只画分层抽样的点，并缩小标记）
+    large = group_size(groups) > LARGE_N_THRESHOLD
+    dots = stratified_sample(groups) if large else groups
+    for i, cat in enumerate(categories):
+        y = dots[cat]["带隙 (eV)"]
+        x = np.random.normal(i, 0.04, size=len(y))
+        ax.scatter(
+            x,
+            y,
+            alpha=0.5,
+            s=8 if large else 40,
+            color="white",
+            edgecolors="black",
+            linewidths=0.5 if large else 1,
+            zorder=3,
+        )
+
+    ax.set_xticks(range(len(categories)))
+    ax.set_xticklabels(
+        categories, rotation=45, ha="right", fontsize=12, fontweight="bold"
+    )
+    ax.set_ylabel("带隙 (eV)", fontsize=14, fontweight="bold")
+    ax.set_xlabel("材料类别", fontsize=14, fontweight="bold")
+    ax.set_title(
+        "主流半导体材料带隙分布（按类别）", fontsize=18, fontweight="bold", pad=20
+    )
+
+    # 添加网格
+    ax.grid(True, alpha=0.3, linestyle="--", linewidth=0.8)
+    ax.set_axisbelow(True)
+
+    # 添加样本数标注
+    by_category = data.stats.by_category
+    for i, cat in enumerate(categories):
+        n = by_category.at[cat, "带隙数"]
+        y_max = by_category.at[cat, "最大带隙"]
+        ax.text(
+            i,
+            y_max + 0.2,
+            f"n={n}",
+            ha="center",
+            va="bottom",
+            fontsize=10,
+            fontweight="bold",
+            bbox=dict(
+                boxstyle="round,pad=0.5",
+                facecolor="white",
+                alpha=0.9,
+                edgecolor="gray",
+                linewidth=1.5,
+            ),
+        )
+
+    return fig
 
-# 添加关键分界线
-ax.axvline(
-    1.0, color="red", linestyle="--", linewidth=2.5, alpha=0.7, label="红外/可见光分界"
-)
-ax.axvline(
-    3.0, color="blue", linestyle="--", linewidth=2.5, alpha=0.7, label="可见光/紫外分界"
-)
 
-ax.set_xlabel("带隙 (eV)", fontsize=14, fontweight="bold")
-ax.set_ylabel("材料数量", fontsize=14, fontweight="bold")
-ax.set_title("半导体材料带隙分布与应用分区", fontsize=18, fontweight="bold", pad=20)
-
-# 合并图例
-lines1, labels1 = ax.get_legend_handles_labels()
-lines2, labels2 = ax2.get_legend_handles_labels()
-ax.legend(
-    lines1 + lines2,
-    labels1 + labels2,
-    loc="upper right",
-    fontsize=11,
-    framealpha=0.95,
-    edgecolor="gray",
-    shadow=True,
+# ============================================================================
+# 2. 带隙分布直方图 - 应用分区
+# ============================================================================
+@register_chart(
+    "02_带隙分布直方图与应用分区_终极版.png",
+    "带隙分布直方图（光电应用分区）",
+    columns=["带隙 (eV)"],
 )
+def plot_bandgap_histogram(data):
+    """图表 2: 带隙分布直方图 - 应用分区"""
+    fig, ax = plt.subplots(figsize=(14, 8))
+    bg_values = data.values(["带隙 (eV)"])["带隙 (eV)"]
+
+    # 绘制直方图
+    n, bins, patches = ax.hist(
+        bg_values, bins=35, alpha=0.8, edgecolor="black", linewidth=1.5, color="#3498db"
+    )
+
+    # 添加密度曲线
+    kde = BinnedKDE(bg_values)
+    x_range = np.linspace(bg_values.min(), bg_values.max(), 200)
+    ax2 = ax.twinx()
+    ax2.plot(
+        x_range,
+        kde(x_range) * len(bg_values) * (bins[1] - bins[0]),
+        color="#e74c3c",
+        linewidth=3.5,
+        label="密度曲线",
+        alpha=0.8,
+    )
+    ax2.set_ylabel("密度", fontsize=14, fontweight="bold")
+    ax2.grid(False)
+
+    # 添加应用区域标记
+    ax.axvspan(1.1, 1.8, alpha=0.15, color="green", label="光伏最佳区 (1.1-1.8 eV)")
+    ax.axvspan(2.0, 3.5, alpha=0.15, color="purple", label="光催化候选区 (2.0-3.5 eV)")
+
+    # 添加关键分界线
+    ax.axvline(
+        1.0,
+        color="red",
+        linestyle="--",
+        linewidth=2.5,
+        alpha=0.7,
+        label="红外/可见光分界",
+    )
+    ax.axvline(
+        3.0,
+        color="blue",
+        linestyle="--",
+        linewidth=2.5,
+        alpha=0.7,
+        label="可见光/紫外分界",
+    )
+
+    ax.set_xlabel("带隙 (eV)", fontsize=14, fontweight="bold")
+    ax.set_ylabel("材料数量", fontsize=14, fontweight="bold")
+    ax.set_title("半导体材料带隙分布与应用分区", fontsize=18, fontweight="bold", pad=20)
+
+    # 合并图例
+    lines1, labels1 = ax.get_legend_handles_labels()
+    lines2, labels2 = ax2.get_legend_handles_labels()
+    ax.legend(
+        lines1 + lines2,
+        labels1 + labels2,
+        loc="upper right",
+        fontsize=11,
+        framealpha=0.95,
+        edgecolor="gray",
+        shadow=True,
+    )
+
+    return fig
 
-plt.tight_layout()
-plt.savefig("02_带隙分布直方图与应用分区_终极版.png", facecolor="white", dpi=300)
-print("✓ 已保存: 02_带隙分布直方图与应用分区_终极版.png")
-plt.close()
 
 # ============================================================================
 # 3. 能带位置图
 # ============================================================================
-print("正在生成图表 3: 能带位置图（CBM vs VBM）...")
-
-fig, ax = plt.subplots(figsize=(14, 10))
-band_data = df[(df["导带底 CBM (eV)"].notna()) & (df["价带顶 VBM (eV)"].notna())].copy()
-
-# 按类别绘制散点
-for cat in sorted(band_data["分类"].unique()):
-    cat_data = band_data[band_data["分类"] == cat]
-    ax.scatter(
-        cat_data["价带顶 VBM (eV)"],
-        cat_data["导带底 CBM (eV)"],
-        s=150,
-        alpha=0.7,
-        label=cat,
-        color=CATEGORY_COLORS.get(cat, "#95A5A6"),
-        edgecolors="black",
-        linewidths=1.5,
-    )
-
-# 添加水分解能级参考线
-ax.axhline(
-    y=0,
-    color="#3498db",
-    linestyle="--",
-    linewidth=3.5,
-    label="H₂/H⁺ 还原电位 (0 eV)",
-    alpha=0.8,
-)
-ax.axhline(
-    y=-1.23,
-    color="#e74c3c",
-    linestyle="--",
-    linewidth=3.5,
-    label="O₂/H₂O 氧化电位 (-1.23 eV)",
-    alpha=0.8,
+@register_chart(
+    "03_能带位置图_终极版.png",
+    "能带位置图（CBM vs VBM）",
+    columns=["分类", "导带底 CBM (eV)", "价带顶 VBM (eV)"],
 )
+def plot_band_positions(data):
+    """图表 3: 能带位置图"""
+    fig, ax = plt.subplots(figsize=(14, 10))
+    groups = data.grouped(["导带底 CBM (eV)", "价带顶 VBM (eV)"])
+
+    # 按类别绘制散点（数据量大时改为按类别着色的密度栅格）
+    if group_size(groups) > LARGE_N_THRESHOLD:
+        plot_category_density(ax, groups, "价带顶 VBM (eV)", "导带底 CBM (eV)")
+    else:
+        for cat, arrays in groups.items():
+            ax.scatter(
+                arrays["价带顶 VBM (eV)"],
+                arrays["导带底 CBM (eV)"],
+                s=150,
+                alpha=0.7,
+                label=cat,
+                color=CATEGORY_COLORS.get(cat, "#95A5A6"),
+                edgecolors="black",
+                linewidths=1.5,
+            )
 
-# 添加理想区域阴影
-ax.axhspan(-3, -1.23, alpha=0.1, color="red", label="VBM理想区")
-ax.axhspan(0, 2, alpha=0.1, color="blue", label="CBM理想区")
+    # 添加水分解能级参考线
+    ax.axhline(
+        y=0,
+        color="#3498db",
+        linestyle="--",
+        linewidth=3.5,
+        label="H₂/H⁺ 还原电位 (0 eV)",
+        alpha=0.8,
+    )
+    ax.axhline(
+        y=-1.23,
+        color="#e74c3c",
+        linestyle="--",
+        linewidth=3.5,
+        label="O₂/H₂O 氧化电位 (-1.23 eV)",
+        alpha=0.8,
+    )
 
-ax.set_xlabel("价带顶 VBM (eV)", fontsize=14, fontweight="bold")
-ax.set_ylabel("导带底 CBM (eV)", fontsize=14, fontweight="bold")
-ax.set_title("半导体材料能带位置与水分解能级", fontsize=18, fontweight="bold", pad=20)
-ax.legend(
-    loc="best", fontsize=10, ncol=2, framealpha=0.95, edgecolor="gray", shadow=True
-)
-ax.grid(True, alpha=0.3, linestyle="--")
+    # 添加理想区域阴影
+    ax.axhspan(-3, -1.23, alpha=0.1, color="red", label="VBM理想区")
+    ax.axhspan(0, 2, alpha=0.1, color="blue", label="CBM理想区")
+
+    ax.set_xlabel("价带顶 VBM (eV)", fontsize=14, fontweight="bold")
+    ax.set_ylabel("导带底 CBM (eV)", fontsize=14, fontweight="bold")
+    ax.set_title(
+        "半导体材料能带位置与水分解能级", fontsize=18, fontweight="bold", pad=20
+    )
+    ax.legend(
+        loc="best", fontsize=10, ncol=2, framealpha=0.95, edgecolor="gray", shadow=True
+    )
+    ax.grid(True, alpha=0.3, linestyle="--")
+
+    return fig
 
-plt.tight_layout()
-plt.savefig("03_能带位置图_终极版.png", facecolor="white", dpi=300)
-print("✓ 已保存: 03_能带位置图_终极版.png")
-plt.close()
 
 # ============================================================================
 # 4. 稳定性气泡图
 # ============================================================================
-print("正在生成图表 4: 形成能与稳定性关系...")
-
-fig, ax = plt.subplots(figsize=(14, 8))
-stability_data = df[
-    (df["形成能 (eV/atom)"].notna()) & (df["能量高于凸包 (eV/atom)"].notna())
-].copy()
-
-for cat in sorted(stability_data["分类"].unique()):
-    cat_data = stability_data[stability_data["分类"] == cat]
-    sizes = cat_data["带隙 (eV)"].fillna(1) * 60
-    ax.scatter(
-        cat_data["形成能 (eV/atom)"],
-        cat_data["能量高于凸包 (eV/atom)"],
-        s=sizes,
-        alpha=0.6,
-        label=cat,
-        color=CATEGORY_COLORS.get(cat, "#95A5A6"),
-        edgecolors="black",
-        linewidths=1.5,
-    )
-
-# 添加稳定性参考线
-ax.axhline(
-    y=0.05,
-    color="orange",
-    linestyle="--",
-    linewidth=2.5,
-    label="稳定性阈值 (0.05 eV/atom)",
-    alpha=0.8,
-)
-ax.axhline(
-    y=0.1,
-    color="red",
-    linestyle="--",
-    linewidth=2.5,
-    label="不稳定阈值 (0.1 eV/atom)",
-    alpha=0.8,
+@register_chart(
+    "04_形成能与稳定性_终极版.png",
+    "形成能与稳定性关系",
+    columns=["分类", "形成能 (eV/atom)", "能量高于凸包 (eV/atom)", "带隙 (eV)"],
 )
+def plot_stability_bubbles(data):
+    """图表 4: 稳定性气泡图"""
+    fig, ax = plt.subplots(figsize=(14, 8))
+    groups = data.grouped(
+        ["形成能 (eV/atom)", "能量高于凸包 (eV/atom)"], optional=["带隙 (eV)"]
+    )
 
-# 添加稳定区域阴影
-ax.axhspan(0, 0.05, alpha=0.1, color="green", label="高度稳定区")
+    # 气泡大小表示带隙，密度栅格无法表达，数据量大时按类别分层抽样
+    total = group_size(groups)
+    if total > LARGE_N_THRESHOLD:
+        groups = stratified_sample(groups)
+        ax.text(
+            0.01,
+            0.01,
+            f"按类别分层抽样 {group_size(groups)} / {total} 个材料",
+            transform=ax.transAxes,
+            fontsize=10,
+            va="bottom",
+            bbox=dict(boxstyle="round,pad=0.4", facecolor="white", alpha=0.85),
+        )
+
+    for cat, arrays in groups.items():
+        sizes = np.where(np.isnan(arrays["带隙 (eV)"]), 1, arrays["带隙 (eV)"]) * 60
+        ax.scatter(
+            arrays["形成能 (eV/atom)"],
+            arrays["能量高于凸包 (eV/atom)"],
+            s=sizes,
+            alpha=0.6,
+            label=cat,
+            color=CATEGORY_COLORS.get(cat, "#95A5A6"),
+            edgecolors="black",
+            linewidths=1.5,
+        )
+
+    # 添加稳定性参考线
+    ax.axhline(
+        y=0.05,
+        color="orange",
+        linestyle="--",
+        linewidth=2.5,
+        label="稳定性阈值 (0.05 eV/atom)",
+        alpha=0.8,
+    )
+    ax.axhline(
+        y=0.1,
+        color="red",
+        linestyle="--",
+        linewidth=2.5,
+        label="不稳定阈值 (0.1 eV/atom)",
+        alpha=0.8,
+    )
 
-ax.set_xlabel("形成能 (eV/atom)", fontsize=14, fontweight="bold")
-ax.set_ylabel("能量高于凸包 (eV/atom)", fontsize=14, fontweight="bold")
-ax.set_title(
-    "半导体材料热力学稳定性分析\n（气泡大小 ∝ 带隙）",
-    fontsize=18,
-    fontweight="bold",
-    pad=20,
-)
-ax.legend(
-    loc="upper right",
-    fontsize=10,
-    ncol=2,
-    framealpha=0.95,
-    edgecolor="gray",
-    shadow=True,
-)
-ax.grid(True, alpha=0.3, linestyle="--")
+    # 添加稳定区域阴影
+    ax.axhspan(0, 0.05, alpha=0.1, color="green", label="高度稳定区")
+
+    ax.set_xlabel("形成能 (eV/atom)", fontsize=14, fontweight="bold")
+    ax.set_ylabel("能量高于凸包 (eV/atom)", fontsize=14, fontweight="bold")
+    ax.set_title(
+        "半导体材料热力学稳定性分析\n（气泡大小 ∝ 带隙）",
+        fontsize=18,
+        fontweight="bold",
+        pad=20,
+    )
+    ax.legend(
+        loc="upper right",
+        fontsize=10,
+        ncol=2,
+        framealpha=0.95,
+        edgecolor="gray",
+        shadow=True,
+    )
+    ax.grid(True, alpha=0.3, linestyle="--")
+
+    return fig
 
-plt.tight_layout()
-plt.savefig("04_形成能与稳定性_终极版.png", facecolor="white", dpi=300)
-print("✓ 已保存: 04_形成能与稳定性_终极版.png")
-plt.close()
 
 # ============================================================================
 # 5. 材料分布双饼图
 # ============================================================================
-print("正在生成图表 5: 材料类别分布饼图...")
-
-fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(18, 8))
-
-# 左图：材料数量分布
-category_counts = df["分类"].value_counts()
-colors1 = [CATEGORY_COLORS.get(cat, "#95A5A6") for cat in category_counts.index]
-
-wedges, texts, autotexts = ax1.pie(
-    category_counts.values,
-    labels=category_counts.index,
-    autopct="%1.1f%%",
-    colors=colors1,
-    startangle=90,
-    textprops={"fontsize": 12, "fontweight": "bold"},
-    explode=[0.05] * len(category_counts),
-    shadow=True,
+@register_chart(
+    "05_材料类别与应用潜力分布_终极版.png",
+    "材料类别分布饼图",
+    columns=["分类", "光电应用潜力"],
 )
+def plot_category_pies(data):
+    """图表 5: 材料分布双饼图"""
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(18, 8))
+    stats = data.stats
+
+    # 左图：材料数量分布
+    category_counts = stats.category_counts
+    colors1 = [CATEGORY_COLORS.get(cat, "#95A5A6") for cat in category_counts.index]
+
+    wedges, texts, autotexts = ax1.pie(
+        category_counts.values,
+        labels=category_counts.index,
+        autopct="%1.1f%%",
+        colors=colors1,
+        startangle=90,
+        textprops={"fontsize": 12, "fontweight": "bold"},
+        explode=[0.05] * len(category_counts),
+        shadow=True,
+    )
 
-ax1.set_title("材料类别分布（按数量）", fontsize=16, fontweight="bold", pad=20)
-
-for autotext in autotexts:
-    autotext.set_color("white")
-    autotext.set_fontweight("bold")
-    autotext.set_fontsize(11)
-
-# 右图：应用潜力分布
-potential_counts = df["光电应用潜力"].value_counts()
-colors2 = {
-    "优秀": "#27AE60",
-    "良好": "#3498DB",
-    "一般": "#F39C12",
-    "较低": "#E74C3C",
-    "未知": "#95A5A6",
-}
-pie_colors = [colors2.get(label, "#95A5A6") for label in potential_counts.index]
-
-wedges, texts, autotexts = ax2.pie(
-    potential_counts.values,
-    labels=potential_counts.index,
-    autopct="%1.1f%%",
-    colors=pie_colors,
-    startangle=90,
-    textprops={"fontsize": 12, "fontweight": "bold"},
-    explode=[0.05] * len(potential_counts),
-    shadow=True,
-)
+    ax1.set_title("材料类别分布（按数量）", fontsize=16, fontweight="bold", pad=20)
+
+    for autotext in autotexts:
+        autotext.set_color("white")
+        autotext.set_fontweight("bold")
+        autotext.set_fontsize(11)
+
+    # 右图：应用潜力分布
+    potential_counts = stats.counts("光电应用潜力")
+    colors2 = {
+        "优秀": "#27AE60",
+        "良好": "#3498DB",
+        "一般": "#F39C12",
+        "较低": "#E74C3C",
+        "未知": "#95A5A6",
+    }
+    pie_colors = [colors2.get(label, "#95A5A6") for label in potential_counts.index]
+
+    wedges, texts, autotexts = ax2.pie(
+        potential_counts.values,
+        labels=potential_counts.index,
+        autopct="%1.1f%%",
+        colors=pie_colors,
+        startangle=90,
+        textprops={"fontsize": 12, "fontweight": "bold"},
+        explode=[0.05] * len(potential_counts),
+        shadow=True,
+    )
+
+    ax2.set_title("光电应用潜力分布", fontsize=16, fontweight="bold", pad=20)
 
-ax2.set_title("光电应用潜力分布", fontsize=16, fontweight="bold", pad=20)
+    for autotext in autotexts:
+        autotext.set_color("white")
+        autotext.set_fontweight("bold")
+        autotext.set_fontsize(11)
 
-for autotext in autotexts:
-    autotext.set_color("white")
-    autotext.set_fontweight("bold")
-    autotext.set_fontsize(11)
+    return fig
 
-plt.tight_layout()
-plt.savefig("05_材料类别与应用潜力分布_终极版.png", facecolor="white", dpi=300)
-print("✓ 已保存: 05_材料类别与应用潜力分布_终极版.png")
-plt.close()
 
 # ============================================================================
 # 6. 带隙类型分组柱状图
 # ============================================================================
-print("正在生成图表 6: 直接/间接带隙对比...")
-
-fig, ax = plt.subplots(figsize=(14, 8))
-gap_type_data = df[df["带隙 (eV)"].notna()].copy()
-gap_type_grouped = (
-    gap_type_data.groupby(["分类", "直接带隙"]).size().unstack(fill_value=0)
+@register_chart(
+    "06_带隙类型分布_终极版.png",
+    "直接/间接带隙对比",
+    columns=["分类", "带隙 (eV)", "直接带隙"],
 )
+def plot_gap_type_bars(data):
+    """图表 6: 带隙类型分组柱状图"""
+    fig, ax = plt.subplots(figsize=(14, 8))
+    # 只统计有带隙数据的类别，按类别名排序
+    by_category = data.stats.by_category
+    gap_type_grouped = by_category[by_category["带隙数"] > 0].sort_index()
+    gap_type_grouped = gap_type_grouped.rename(
+        columns={"间接带隙数": "否", "直接带隙数": "是"}
+    )
 
-# 绘制分组柱状图
-x = np.arange(len(gap_type_grouped.index))
-width = 0.35
-
-bars1 = ax.bar(
-    x - width / 2,
-    gap_type_grouped["否"],
-    width,
-    label="间接带隙",
-    color="#E74C3C",
-    edgecolor="black",
-    linewidth=1.5,
-)
-bars2 = ax.bar(
-    x + width / 2,
-    gap_type_grouped["是"],
-    width,
-    label="直接带隙",
-    color="#3498DB",
-    edgecolor="black",
-    linewidth=1.5,
-)
+    # 绘制分组柱状图
+    x = np.arange(len(gap_type_grouped.index))
+    width = 0.35
+
+    bars1 = ax.bar(
+        x - width / 2,
+        gap_type_grouped["否"],
+        width,
+        label="间接带隙",
+        color="#E74C3C",
+        edgecolor="black",
+        linewidth=1.5,
+    )
+    bars2 = ax.bar(
+        x + width / 2,
+        gap_type_grouped["是"],
+        width,
+        label="直接带隙",
+        color="#3498DB",
+        edgecolor="black",
+        linewidth=1.5,
+    )
 
-# 添加数值标签
-for bars in [bars1, bars2]:
-    for bar in bars:
-        height = bar.get_height()
-        if height > 0:
-            ax.text(
-                bar.get_x() + bar.get_width() / 2.0,
-                height + 0.3,
-                f"{int(height)}",
-                ha="center",
-                va="bottom",
-                fontsize=10,
-                fontweight="bold",
-            )
+    # 添加数值标签
+    for bars in [bars1, bars2]:
+        for bar in bars:
+            height = bar.get_height()
+            if height > 0:
+                ax.text(
+                    bar.get_x() + bar.get_width() / 2.0,
+                    height + 0.3,
+                    f"{int(height)}",
+                    ha="center",
+                    va="bottom",
+                    fontsize=10,
+                    fontweight="bold",
+                )
+
+    ax.set_ylabel("材料数量", fontsize=14, fontweight="bold")
+    ax.set_xlabel("材料类别", fontsize=14, fontweight="bold")
+    ax.set_title(
+        "半导体材料带隙类型分布（直接 vs 间接）", fontsize=18, fontweight="bold", pad=20
+    )
+    ax.set_xticks(x)
+    ax.set_xticklabels(gap_type_grouped.index, rotation=45, ha="right", fontsize=11)
+    ax.legend(
+        loc="upper right", fontsize=13, framealpha=0.95, edgecolor="gray", shadow=True
+    )
+    ax.grid(True, alpha=0.3, axis="y", linestyle="--")
 
-ax.set_ylabel("材料数量", fontsize=14, fontweight="bold")
-ax.set_xlabel("材料类别", fontsize=14, fontweight="bold")
-ax.set_title(
-    "半导体材料带隙类型分布（直接 vs 间接）", fontsize=18, fontweight="bold", pad=20
-)
-ax.set_xticks(x)
-ax.set_xticklabels(gap_type_grouped.index, rotation=45, ha="right", fontsize=11)
-ax.legend(
-    loc="upper right", fontsize=13, framealpha=0.95, edgecolor="gray", shadow=True
-)
-ax.grid(True, alpha=0.3, axis="y", linestyle="--")
+    return fig
 
-plt.tight_layout()
-plt.savefig("06_带隙类型分布_终极版.png", facecolor="white", dpi=300)
-print("✓ 已保存: 06_带隙类型分布_终极版.png")
-plt.close()
 
 # ============================================================================
 # 7. TOP材料热力图
 # ============================================================================
-print("正在生成图表 7: TOP材料性能热力图...")
-
-top_materials = df[df["光电应用潜力"].isin(["优秀", "良好"])].head(20)
-
-if len(top_materials) > 0:
-    # 选择关键指标
-    heatmap_data = top_materials[
-        [
-            "化学式",
-            "带隙 (eV)",
-            "形成能 (eV/atom)",
-            "能量高于凸包 (eV/atom)",
-            "密度 (g/cm³)",
-        ]
-    ].copy()
-    heatmap_data = heatmap_data.set_index("化学式")
-
-    # 标准化数据
-    from sklearn.preprocessing import StandardScaler
-
-    scaler = StandardScaler()
-    heatmap_normalized = pd.DataFrame(
-        scaler.fit_transform(heatmap_data.fillna(0)),
-        index=heatmap_data.index,
-        columns=heatmap_data.columns,
-    )
-
-    fig, ax = plt.subplots(figsize=(11, 15))
-
-    sns.heatmap(
-        heatmap_normalized,
-        annot=heatmap_data,
-        fmt=".3f",
-        cmap="RdYlGn_r",
-        linewidths=2,
-        linecolor="white",
-        cbar_kws={"label": "标准化值"},
-        ax=ax,
-        vmin=-2,
-        vmax=2,
-        center=0,
-        annot_kws={"fontsize": 10, "fontweight": "bold"},
+@register_chart(
+    "07_TOP材料性能热力图_终极版.png",
+    "TOP材料性能热力图",
+    columns=[
+        "化学式",
+        "光电应用潜力",
+        "带隙 (eV)",
+        "形成能 (eV/atom)",
+        "能量高于凸包 (eV/atom)",
+        "密度 (g/cm³)",
+        "直接带隙",
+    ],
+)
+def plot_top_heatmap(data):
+    """图表 7: TOP材料热力图"""
+    df = data.df
+    candidates = df[df["光电应用潜力"].isin(["优秀", "良好"])]
+    top_materials = rank(candidates, PV_RANKING, k=20)
+
+    if len(top_materials) > 0:
+        # 选择关键指标
+        heatmap_data = top_materials[
+            [
+                "化学式",
+                "带隙 (eV)",
+                "形成能 (eV/atom)",
+                "能量高于凸包 (eV/atom)",
+                "密度 (g/cm³)",
+            ]
+        ].copy()
+        heatmap_data = heatmap_data.set_index("化学式")
+
+        # 标准化数据
+        scaler = StandardScaler()
+        heatmap_normalized = pd.DataFrame(
+            scaler.fit_transform(heatmap_data.fillna(0)),
+            index=heatmap_data.index,
+            columns=heatmap_data.columns,
+        )
+
+        fig, ax = plt.subplots(figsize=(11, 15))
+
+        sns.heatmap(
+            heatmap_normalized,
+            annot=heatmap_data,
+            fmt=".3f",
+            cmap="RdYlGn_r",
+            linewidths=2,
+            linecolor="white",
+            cbar_kws={"label": "标准化值"},
+            ax=ax,
+            vmin=-2,
+            vmax=2,
+            center=0,
+            annot_kws={"fontsize": 10, "fontweight": "bold"},
+        )
+
+        ax.set_title(
+            "TOP 20 光伏候选材料性能热力图\n（数值为实际值，颜色为标准化值）",
+            fontsize=16,
+            fontweight="bold",
+            pad=20,
+        )
+        ax.set_ylabel("材料", fontsize=14, fontweight="bold")
+        ax.set_xlabel("性能指标", fontsize=14, fontweight="bold")
+
+        return fig
+
+
+# ============================================================================
+# 8. 密度-带隙关系散点图
+# ============================================================================
+@register_chart(
+    "08_密度与带隙关系_终极版.png",
+    "密度与带隙关系",
+    columns=["分类", "密度 (g/cm³)", "带隙 (eV)"],
+)
+def plot_density_vs_gap(data):
+    """图表 8: 密度-带隙关系散点图"""
+    fig, ax = plt.subplots(figsize=(14, 8))
+    columns = ["密度 (g/cm³)", "带隙 (eV)"]
+    groups = data.grouped(columns)
+
+    # 数据量大时改为按类别着色的密度栅格
+    if group_size(groups) > LARGE_N_THRESHOLD:
+        plot_category_density(ax, groups, *columns, marker_size=130)
+    else:
+        for cat, arrays in groups.items():
+            ax.scatter(
+                arrays["密度 (g/cm³)"],
+                arrays["带隙 (eV)"],
+                s=130,
+                alpha=0.7,
+                label=cat,
+                color=CATEGORY_COLORS.get(cat, "#95A5A6"),
+                edgecolors="black",
+                linewidths=1.5,
+            )
+
+    # 添加趋势线（使用全部数据）
+    valid = data.values(columns)
+    x, y = valid["密度 (g/cm³)"], valid["带隙 (eV)"]
+    slope, intercept, r_value, p_value, std_err = linregress(x, y)
+    line_x = np.linspace(x.min(), x.max(), 100)
+    line_y = slope * line_x + intercept
+    ax.plot(
+        line_x,
+        line_y,
+        "r--",
+        linewidth=3,
+        alpha=0.8,
+        label=f"趋势线 (R²={r_value**2:.3f})",
     )
 
-    ax.set_title(
-        "TOP 20 光伏候选材料性能热力图\n（数值为实际值，颜色为标准化值）",
-        fontsize=16,
-        fontweight="bold",
-        pad=20,
+    ax.set_xlabel("密度 (g/cm³)", fontsize=14, fontweight="bold")
+    ax.set_ylabel("带隙 (eV)", fontsize=14, fontweight="bold")
+    ax.set_title("半导体材料密度与带隙关系", fontsize=18, fontweight="bold", pad=20)
+    ax.legend(
+        loc="best", fontsize=10, ncol=2, framealpha=0.95, edgecolor="gray", shadow=True
     )
-    ax.set_ylabel("材料", fontsize=14, fontweight="bold")
-    ax.set_xlabel("性能指标", fontsize=14, fontweight="bold")
+    ax.grid(True, alpha=0.3, linestyle="--")
+
+    return fig
 
-    plt.tight_layout()
-    plt.savefig("07_TOP材料性能热力图_终极版.png", facecolor="white", dpi=300)
-    print("✓ 已保存: 07_TOP材料性能热力图_终极版.png")
-    plt.close()
 
 # ============================================================================
-# 8. 密度-带隙关系散点图
+# 并行绘图：数据在工作进程启动时传入一次，之后每个任务只传图表序号
 # ============================================================================
-print("正在生成图表 8: 密度与带隙关系...")
+_worker_data = None
 
-fig, ax = plt.subplots(figsize=(14, 8))
-density_data = df[(df["密度 (g/cm³)"].notna()) & (df["带隙 (eV)"].notna())].copy()
 
-for cat in sorted(density_data["分类"].unique()):
-    cat_data = density_data[density_data["分类"] == cat]
-    ax.scatter(
-        cat_data["密度 (g/cm³)"],
-        cat_data["带隙 (eV)"],
-        s=130,
-        alpha=0.7,
-        label=cat,
-        color=CATEGORY_COLORS.get(cat, "#95A5A6"),
-        edgecolors="black",
-        linewidths=1.5,
-    )
+def _init_worker(data):
+    """工作进程初始化：保存数据，使用非交互式后端"""
+    global _worker_data
+    plt.switch_backend("Agg")
+    setup_plot_style()
+    _worker_data = data
 
-# 添加趋势线
-from scipy.stats import linregress
 
-x = density_data["密度 (g/cm³)"].values
-y = density_data["带隙 (eV)"].values
-slope, intercept, r_value, p_value, std_err = linregress(x, y)
-line_x = np.linspace(x.min(), x.max(), 100)
-line_y = slope * line_x + intercept
-ax.plot(
-    line_x, line_y, "r--", linewidth=3, alpha=0.8, label=f"趋势线 (R²={r_value**2:.3f})"
-)
+def _render_in_worker(number, output_dir):
+    """在工作进程中绘制一张图表，返回 (耗时, 输出文件路径)"""
+    start = time.perf_counter()
+    path = CHARTS[number - 1].render(_worker_data, output_dir=output_dir)
+    return time.perf_counter() - start, path
 
-ax.set_xlabel("密度 (g/cm³)", fontsize=14, fontweight="bold")
-ax.set_ylabel("带隙 (eV)", fontsize=14, fontweight="bold")
-ax.set_title("半导体材料密度与带隙关系", fontsize=18, fontweight="bold", pad=20)
-ax.legend(
-    loc="best", fontsize=10, ncol=2, framealpha=0.95, edgecolor="gray", shadow=True
-)
-ax.grid(True, alpha=0.3, linestyle="--")
 
-plt.tight_layout()
-plt.savefig("08_密度与带隙关系_终极版.png", facecolor="white", dpi=300)
-print("✓ 已保存: 08_密度与带隙关系_终极版.png")
-plt.close()
+def _cache_path(cache_dir, chart, key):
+    return os.path.join(cache_dir, f"{chart.number:02d}_{key}.png")
+
+
+def _store_in_cache(path, cache_dir, chart, key):
+    """将绘制结果复制到缓存目录（先写临时文件再改名），并清理该图表较早的缓存"""
+    if path is None or cache_dir is None:
+        return
+    os.makedirs(cache_dir, exist_ok=True)
+    target = _cache_path(cache_dir, chart, key)
+    tmp = f"{target}.{os.getpid()}.tmp"
+    shutil.copyfile(path, tmp)
+    os.replace(tmp, target)
+
+    prefix = f"{chart.number:02d}_"
+    entries = [
+        os.path.join(cache_dir, name)
+        for name in os.listdir(cache_dir)
+        if name.startswith(prefix) and name.endswith(".png")
+    ]
+    entries.sort(key=os.path.getmtime, reverse=True)
+    for stale in entries[CHART_CACHE_KEEP:]:
+        try:
+            os.remove(stale)
+        except OSError:
+            pass
+
+
+def render_charts(
+    df, charts=None, output_dir=".", workers=None, stats=None, cache_dir=None
+):
+    """
+    绘制图表，返回 {文件名: 耗时（秒）}，命中缓存的图表耗时为 None；
+    被跳过（缺少数据列或没有可绘制数据）的图表不在结果中
+
+    参数:
+        df: 材料数据表
+        charts: 图表编号列表（从 1 开始），None 表示全部
+        output_dir: 输出目录（不存在时自动创建）
+        workers: 并行进程数，None 为 CPU 核数（不超过图表数），1 为在当前进程中依次绘制
+        stats: compute_stats(df) 的结果，None 时在此计算
+        cache_dir: 输出缓存目录，None 表示不使用缓存；
+                   图表的输入数据与样式未变化时直接从缓存复制，不重新绘制
+    """
+    charts = get_charts(charts)
+    os.makedirs(output_dir, exist_ok=True)
+
+    timings = {}
+    keys = {}
+    if cache_dir is not None:
+        hits, pending = [], []
+        column_digests = {}
+        for chart in charts:
+            if chart.missing_columns(df):
+                # 缺少数据列的图表无法计算缓存键，由 render 提示并跳过
+                pending.append(chart)
+                continue
+            keys[chart.number] = chart.cache_key(df, column_digests)
+            cached = _cache_path(cache_dir, chart, keys[chart.number])
+            if os.path.exists(cached):
+                shutil.copyfile(cached, os.path.join(output_dir, chart.filename))
+                os.utime(cached)  # 记录最近使用时间，清理时保留
+                timings[chart.filename] = None
+                hits.append(chart)
+            else:
+                pending.append(chart)
+        print(
+            f"图表缓存: 命中 {len(hits)} 张"
+            f"{'（' + ', '.join(str(c.number) for c in hits) + '）' if hits else ''}，"
+            f"需要绘制 {len(pending)} 张"
+            f"{'（' + ', '.join(str(c.number) for c in pending) + '）' if pending else ''}"
+        )
+        charts = pending
+    if not charts:
+        return timings
+
+    # 分组与统计在分发到各图表（及工作进程）之前完成一次
+    # 只读取了部分列、没有分类列时，所选图表都不需要统计量
+    if stats is None and "分类" in df.columns:
+        stats = compute_stats(df)
+    data = ChartData(df, stats)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(charts)))
+
+    if workers == 1:
+        setup_plot_style()
+        for chart in charts:
+            start = time.perf_counter()
+            path = chart.render(data, output_dir=output_dir)
+            if path is not None:
+                timings[chart.filename] = time.perf_counter() - start
+            _store_in_cache(path, cache_dir, chart, keys.get(chart.number))
+        return timings
+
+    print(f"使用 {workers} 个进程并行绘制 {len(charts)} 张图表...")
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(data,)
+    ) as pool:
+        futures = {
+            pool.submit(_render_in_worker, chart.number, output_dir): chart
+            for chart in charts
+        }
+        for future in as_completed(futures):
+            chart = futures[future]
+            try:
+                seconds, path = future.result()
+            except Exception as e:
+                print(f"✗ {chart.filename} 绘制失败: {e}")
+                continue
+            if path is not None:
+                timings[chart.filename] = seconds
+            _store_in_cache(path, cache_dir, chart, keys.get(chart.number))
+    return timings
+
 
 # ============================================================================
-# 完成
+# 主程序
 # ============================================================================
-print()
-print("=" * 80)
-print("✅ 所有可视化图表生成完成！（终极版 - 彻底解决中文乱码）")
-print("=" * 80)
-print("\n生成的图表:")
-print("  1. 01_带隙分布按类别_终极版.png")
-print("  2. 02_带隙分布直方图与应用分区_终极版.png")
-print("  3. 03_能带位置图_终极版.png")
-print("  4. 04_形成能与稳定性_终极版.png")
-print("  5. 05_材料类别与应用潜力分布_终极版.png")
-print("  6. 06_带隙类型分布_终极版.png")
-print("  7. 07_TOP材料性能热力图_终极版.png")
-print("  8. 08_密度与带隙关系_终极版.png")
-print()
-print("特点:")
-print("  ✓ 直接使用系统字体文件路径")
-print("  ✓ 强制刷新字体缓存")
-print("  ✓ 多重字体配置保险")
-print("  ✓ 彻底解决中文乱码问题")
-print("  ✓ 300 DPI高分辨率输出")
-print("=" * 80)
+
+
+def parse_chart_numbers(text):
+    """解析 --charts 参数，如 "3,8" 或 "1-4,7" """
+    numbers = []
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            if "-" in part:
+                first, last = (int(x) for x in part.split("-", 1))
+                numbers.extend(range(first, last + 1))
+            else:
+                numbers.append(int(part))
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"无效的图表编号: {part}")
+    return list(dict.fromkeys(numbers))
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="半导体材料数据可视化分析")
+    parser.add_argument(
+        "--data",
+        default=None,
+        help="数据文件：Parquet 数据集、.sqlite 本地数据库、.json、.arrow 或 .xlsx"
+        "（默认使用获取脚本输出中第一个存在的，顺序见 DATA_SOURCES）",
+    )
+    parser.add_argument(
+        "--list", action="store_true", help="列出所有图表及其需要的数据列后退出"
+    )
+    parser.add_argument(
+        "--charts",
+        type=parse_chart_numbers,
+        default=None,
+        help="只生成指定编号的图表，逗号分隔，可用范围（如 3,8 或 1-4）；默认全部",
+    )
+    parser.add_argument(
+        "--output-dir", default=".", help="图表输出目录（默认当前目录）"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="并行绘图的进程数（默认 CPU 核数，1 表示依次绘制）",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=CHART_CACHE_DIR,
+        help=f"图表输出缓存目录（默认 {CHART_CACHE_DIR}），输入数据与样式未变化的图表直接复用",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="不使用图表缓存，全部重新绘制"
+    )
+    return parser.parse_args()
+
+
+def list_charts():
+    """打印图表列表"""
+    print("可用图表:")
+    for chart in CHARTS:
+        print(f"  {chart.number}. {chart.title}")
+        print(f"     文件: {chart.filename}")
+        print(f"     数据列: {', '.join(chart.columns)}")
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    if args.list:
+        list_charts()
+        return
+    try:
+        charts = get_charts(args.charts)
+    except ValueError as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+
+    print("=" * 80)
+    print("Materials Project - 半导体材料数据可视化分析（终极版）")
+    print("=" * 80)
+    print()
+
+    # 只读取所选图表用到的列
+    columns = list(dict.fromkeys(col for chart in charts for col in chart.columns))
+    try:
+        df = load_data(args.data, columns=columns)
+    except (OSError, ValueError, ImportError) as e:
+        print(f"✗ 读取数据失败: {e}")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    timings = render_charts(
+        df,
+        charts=[chart.number for chart in charts],
+        output_dir=args.output_dir,
+        workers=args.workers,
+        cache_dir=None if args.no_cache else args.cache_dir,
+    )
+    elapsed = time.perf_counter() - start
+
+    print()
+    print("=" * 80)
+    print("✅ 所有可视化图表生成完成！（终极版 - 彻底解决中文乱码）")
+    print("=" * 80)
+    print(f"\n生成的图表（{os.path.abspath(args.output_dir)}）:")
+    for chart in charts:
+        if chart.filename not in timings:
+            continue
+        elapsed_chart = timings[chart.filename]
+        note = "缓存" if elapsed_chart is None else f"{elapsed_chart:.1f} 秒"
+        print(f"  {chart.number}. {chart.filename}（{note}）")
+    print(f"\n总耗时: {elapsed:.1f} 秒")
+    print()
+    print("特点:")
+    print("  ✓ 自动查找中文字体（Windows / macOS / Linux fontconfig）")
+    print("  ✓ 记住字体选择，无需重建字体缓存")
+    print("  ✓ 多重字体配置保险")
+    print("  ✓ 彻底解决中文乱码问题")
+    print("  ✓ 300 DPI高分辨率输出")
+    print("  ✓ 多进程并行绘图")
+    print("  ✓ 输入未变化的图表直接复用缓存")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
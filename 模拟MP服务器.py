@@ -0,0 +1,442 @@
+"""
+Materials Project API - 本地模拟服务器
+作者: Luffy.Solution
+功能: 在本地模拟 Materials Project API，用于离线测试和性能基准测试
+
+支持的接口:
+    /materials/summary/              按 chemsys（可逗号分隔）或 material_ids 查询
+    /materials/electronic_structure/ 按 material_ids 查询
+    /heartbeat                       返回数据库版本
+    /_stats                          返回模拟服务器自身的请求统计
+
+数据来源:
+    - 合成数据：按化学系统确定性生成任意规模的材料记录（--per-chemsys）
+    - 回放数据：加载之前保存的 主流半导体材料数据库.json（--replay）
+
+故障注入:
+    --latency-ms / --jitter-ms 响应延迟，--throttle-rate 随机 429，
+    --error-rate 随机 500，--quota 服务端每秒请求配额（超出返回 429 + Retry-After）
+
+使用方法:
+    python 模拟MP服务器.py --port 8000 --per-chemsys 50
+    python 获取主流半导体材料数据.py --base-url http://127.0.0.1:8000
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from mp_client import TokenBucket
+
+CRYSTAL_SYSTEMS = [
+    "Cubic",
+    "Hexagonal",
+    "Tetragonal",
+    "Orthorhombic",
+    "Trigonal",
+    "Monoclinic",
+    "Triclinic",
+]
+SPACEGROUPS = {
+    "Cubic": ["F-43m", "Fm-3m", "Pm-3m", "Ia-3"],
+    "Hexagonal": ["P6_3mc", "P6_3/mmc", "P-6m2"],
+    "Tetragonal": ["I4_1/amd", "P4/nmm", "I-42d"],
+    "Orthorhombic": ["Pnma", "Cmcm", "Pbca"],
+    "Trigonal": ["R-3m", "P-3m1", "R3c"],
+    "Monoclinic": ["P2_1/c", "C2/m", "C2/c"],
+    "Triclinic": ["P-1", "P1"],
+}
+
+BOOLEAN_FILTERS = ("is_stable", "is_metal", "is_gap_direct")
+MAX_LIMIT = 1000  # 与官方 API 一致的单页上限
+DEFAULT_LIMIT = 100
+
+
+def normalize_chemsys(chemsys):
+    """化学系统的标准写法（元素按字母排序）"""
+    return "-".join(sorted(chemsys.split("-")))
+
+
+def generate_chemsys_materials(chemsys, count, seed=0, db_version="sim"):
+    """
+    按化学系统确定性生成合成材料记录
+
+    同一 (chemsys, count, seed) 总是生成相同的数据，记录同时包含
+    summary 与 electronic_structure 两个接口需要的字段。
+    """
+    key = normalize_chemsys(chemsys)
+    elements = key.split("-")
+    rng = random.Random(f"{seed}:{key}")
+    id_base = zlib.crc32(key.encode("utf-8"))
+
+    materials = []
+    for i in range(count):
+        is_metal = rng.random() < 0.1
+        band_gap = 0.0 if is_metal else round(min(7.0, rng.lognormvariate(0.6, 0.6)), 4)
+        is_stable = rng.random() < 0.6
+        vbm = round(-rng.uniform(0.5, 3.0), 4)
+        crystal_system = rng.choice(CRYSTAL_SYSTEMS)
+        formula = "".join(
+            f"{el}{n if n > 1 else ''}"
+            for el, n in ((el, rng.randint(1, 4)) for el in elements)
+        )
+        materials.append({
+            "material_id": f"mp-{id_base}{i:06d}",
+            "formula_pretty": formula,
+            "chemsys": key,
+            "elements": elements,
+            "nelements": len(elements),
+            "nsites": rng.randint(2, 40),
+            "band_gap": band_gap,
+            "is_gap_direct": (not is_metal) and rng.random() < 0.4,
+            "is_metal": is_metal,
+            "cbm": round(vbm + band_gap, 4),
+            "vbm": vbm,
+            "efermi": round(vbm + band_gap / 2, 4),
+            "energy_above_hull": 0.0 if is_stable else round(rng.expovariate(10), 4),
+            "is_stable": is_stable,
+            "formation_energy_per_atom": round(-rng.uniform(0.05, 3.0), 4),
+            "density": round(rng.uniform(2.0, 10.0), 4),
+            "volume": round(rng.uniform(30.0, 600.0), 3),
+            "crystal_system": crystal_system,
+            "spacegroup_symbol": rng.choice(SPACEGROUPS[crystal_system]),
+            "symmetry": {"crystal_system": crystal_system},
+            "last_updated": f"{db_version}T00:00:00",
+        })
+    return materials
+
+
+class MaterialsDatabase:
+    """
+    模拟服务器的数据源
+
+    合成模式下按需生成化学系统的数据并缓存；回放模式下使用加载的记录。
+    """
+
+    def __init__(self, per_chemsys=20, seed=0, records=None, db_version="sim"):
+        self.per_chemsys = per_chemsys
+        self.seed = seed
+        self.db_version = db_version
+        self.replay = records is not None
+        self._by_chemsys = {}
+        self._by_id = {}
+        self._query_cache = {}
+        self._lock = threading.Lock()
+
+        if records is not None:
+            for record in records:
+                record = dict(record)
+                record["chemsys"] = normalize_chemsys(
+                    record.get("chemsys") or "-".join(record.get("elements", []))
+                )
+                record.setdefault("is_stable", True)
+                self._by_chemsys.setdefault(record["chemsys"], []).append(record)
+                self._by_id[record["material_id"]] = record
+
+    def chemsys_materials(self, chemsys):
+        key = normalize_chemsys(chemsys)
+        with self._lock:
+            if key not in self._by_chemsys:
+                if self.replay:
+                    return []
+                materials = generate_chemsys_materials(
+                    key, self.per_chemsys, self.seed, self.db_version
+                )
+                self._by_chemsys[key] = materials
+                self._by_id.update((mat["material_id"], mat) for mat in materials)
+            return self._by_chemsys[key]
+
+    def by_ids(self, material_ids):
+        with self._lock:
+            return [self._by_id[mid] for mid in material_ids if mid in self._by_id]
+
+    def query(self, params):
+        """按查询参数筛选并排序（结果按过滤/排序条件缓存，分页请求不重复排序）"""
+        filter_key = tuple(
+            sorted(
+                (k, v)
+                for k, v in params.items()
+                if k not in ("_skip", "_limit", "_fields", "_all_fields")
+            )
+        )
+        with self._lock:
+            if filter_key in self._query_cache:
+                return self._query_cache[filter_key]
+
+        if "material_ids" in params:
+            records = self.by_ids(params["material_ids"].split(","))
+        elif "chemsys" in params:
+            records = [
+                mat
+                for chemsys in params["chemsys"].split(",")
+                for mat in self.chemsys_materials(chemsys)
+            ]
+        else:
+            records = []
+
+        for name in BOOLEAN_FILTERS:
+            if name in params:
+                wanted = params[name].lower() == "true"
+                records = [mat for mat in records if bool(mat.get(name)) == wanted]
+        for name, value in params.items():
+            if name.endswith("_min") or name.endswith("_max"):
+                field, bound = name[:-4], float(value)
+                if name.endswith("_min"):
+                    records = [m for m in records if (m.get(field) or 0) >= bound]
+                else:
+                    records = [m for m in records if (m.get(field) or 0) <= bound]
+
+        if params.get("_sort_fields"):
+            # 多字段排序：从最后一个字段开始稳定排序
+            for field in reversed(params["_sort_fields"].split(",")):
+                reverse = field.startswith("-")
+                field = field.lstrip("-+")
+                records = sorted(
+                    records,
+                    key=lambda m: (m.get(field) is None, m.get(field) or 0),
+                    reverse=reverse,
+                )
+
+        with self._lock:
+            if len(self._query_cache) > 256:
+                self._query_cache.clear()
+            self._query_cache[filter_key] = records
+        return records
+
+
+class MockMPServer:
+    """
+    可在进程内启动的模拟服务器（供基准测试脚本使用）
+
+    参数:
+        host, port: 监听地址，port=0 时自动选择空闲端口
+        per_chemsys: 合成模式下每个化学系统的材料数
+        seed: 合成数据随机种子
+        replay: 回放的材料记录列表（给定时不生成合成数据）
+        latency_ms, jitter_ms: 每个请求的平均延迟与抖动（毫秒）
+        throttle_rate: 随机返回 429 的概率
+        error_rate: 随机返回 500 的概率
+        quota: 服务端每秒请求配额，None 表示不限
+        retry_after: 429 响应中的 Retry-After（秒）
+        db_version: /heartbeat 返回的数据库版本
+    """
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=0,
+        per_chemsys=20,
+        seed=0,
+        replay=None,
+        latency_ms=0.0,
+        jitter_ms=0.0,
+        throttle_rate=0.0,
+        error_rate=0.0,
+        quota=None,
+        retry_after=1.0,
+        db_version="sim-2025.01",
+    ):
+        self.db = MaterialsDatabase(per_chemsys, seed, replay, db_version)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.quota = TokenBucket(quota) if quota else None
+        self.retry_after = retry_after
+        self.db_version = db_version
+        self.counters = {"requests": 0, "ok": 0, "throttled": 0, "errors": 0}
+        self._counter_lock = threading.Lock()
+        self._rng = random.Random(seed)
+
+        handler = type("Handler", (MockMPHandler,), {"mock": self})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, name):
+        with self._counter_lock:
+            self.counters[name] += 1
+
+    def start(self):
+        """在后台线程中启动"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class MockMPHandler(BaseHTTPRequestHandler):
+    """模拟 API 请求处理"""
+
+    protocol_version = "HTTP/1.1"  # 支持 keep-alive
+    mock = None  # 由 MockMPServer 注入
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body, headers=None):
+        payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        mock = self.mock
+        url = urlparse(self.path)
+        path = url.path.rstrip("/")
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        if path == "/_stats":
+            self._send_json(200, dict(mock.counters))
+            return
+
+        mock.count("requests")
+
+        # 故障注入
+        if mock.latency_ms or mock.jitter_ms:
+            delay = max(0.0, mock._rng.gauss(mock.latency_ms, mock.jitter_ms))
+            time.sleep(delay / 1000)
+        if (mock.quota is not None and not mock.quota.try_acquire()) or (
+            mock._rng.random() < mock.throttle_rate
+        ):
+            mock.count("throttled")
+            self._send_json(
+                429,
+                {"detail": "Too Many Requests"},
+                {"Retry-After": f"{mock.retry_after:g}"},
+            )
+            return
+        if mock._rng.random() < mock.error_rate:
+            mock.count("errors")
+            self._send_json(500, {"detail": "Internal Server Error"})
+            return
+
+        if path == "/heartbeat":
+            mock.count("ok")
+            self._send_json(200, {"status": "OK", "db_version": mock.db_version})
+            return
+        if path not in ("/materials/summary", "/materials/electronic_structure"):
+            self._send_json(404, {"detail": "Not Found"})
+            return
+
+        records = mock.db.query(params)
+        skip = int(params.get("_skip", 0))
+        limit = min(int(params.get("_limit", DEFAULT_LIMIT)), MAX_LIMIT)
+        page = records[skip : skip + limit]
+
+        if params.get("_fields") and params.get("_all_fields", "").lower() != "true":
+            fields = params["_fields"].split(",")
+            page = [{f: mat[f] for f in fields if f in mat} for mat in page]
+
+        mock.count("ok")
+        self._send_json(
+            200,
+            {
+                "data": page,
+                "meta": {"total_doc": len(records), "max_limit": MAX_LIMIT},
+            },
+        )
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="Materials Project API 本地模拟服务器")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=8000, help="监听端口")
+    parser.add_argument(
+        "--per-chemsys", type=int, default=20, help="合成模式下每个化学系统的材料数"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="合成数据随机种子")
+    parser.add_argument(
+        "--replay", help="回放已保存的材料数据（获取脚本输出的 JSON 文件）"
+    )
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="平均响应延迟")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="响应延迟抖动")
+    parser.add_argument(
+        "--throttle-rate", type=float, default=0.0, help="随机返回 429 的概率"
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="随机返回 500 的概率"
+    )
+    parser.add_argument("--quota", type=float, help="服务端每秒请求配额，超出返回 429")
+    parser.add_argument(
+        "--retry-after", type=float, default=1.0, help="429 响应的 Retry-After（秒）"
+    )
+    parser.add_argument(
+        "--db-version", default="sim-2025.01", help="/heartbeat 返回的数据库版本"
+    )
+    return parser.parse_args()
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+
+    replay = None
+    if args.replay:
+        with open(args.replay, encoding="utf-8") as f:
+            replay = json.load(f)
+
+    server = MockMPServer(
+        host=args.host,
+        port=args.port,
+        per_chemsys=args.per_chemsys,
+        seed=args.seed,
+        replay=replay,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        throttle_rate=args.throttle_rate,
+        error_rate=args.error_rate,
+        quota=args.quota,
+        retry_after=args.retry_after,
+        db_version=args.db_version,
+    )
+
+    print("=" * 80)
+    print("Materials Project API - 本地模拟服务器")
+    print("=" * 80)
+    if replay is not None:
+        print(f"数据来源: 回放 {args.replay}（{len(replay)} 个材料）")
+    else:
+        print(f"数据来源: 合成数据（每个化学系统 {args.per_chemsys} 个材料）")
+    print(f"监听地址: {server.url}")
+    print()
+    print("使用方法:")
+    print(f"  python 获取主流半导体材料数据.py --base-url {server.url}")
+    print("按 Ctrl+C 停止")
+    print("=" * 80)
+
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(f"\n请求统计: {server.counters}")
+
+
+if __name__ == "__main__":
+    main()
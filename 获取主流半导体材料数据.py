@@ -8,38 +8,93 @@ Materials Project 数据使用 CC BY 4.0 许可。
 数据来源: https://materialsproject.org/
 """
 
+import argparse
+import functools
 import json
+import os
+import threading
 import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
 import pandas as pd
-import requests
-from openpyxl import load_workbook
-from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
-
-# API配置
+from openpyxl import Workbook
+from openpyxl.cell import Cell, WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+
+from materials_dataset import HAS_PYARROW, write_dataset
+from materials_loader import dataframe_from_records
+from materials_ranking import PC_RANKING, PV_RANKING, rank
+from materials_stats import compute_stats
+from materials_store import MaterialsStore
+from mp_client import MPAPIError, MPClient, ResponseCache
+from screening_rules import (
+    DEFAULT_RULES,
+    RuleError,
+    columns_from_records,
+    load_rules,
+    to_float_array,
+)
+
+# API配置：环境变量 MP_API_KEY / MP_BASE_URL 优先，其次读取 config.py
+# （缺少配置时在 main() 中提示，导入本模块不会退出，便于基准测试等脚本复用）
 try:
-    from config import API_KEY, BASE_URL
-
-    headers = {"X-API-KEY": API_KEY}
+    import config
 except ImportError:
-    print("=" * 80)
-    print("错误: 找不到 config.py 文件")
-    print("=" * 80)
-    print()
-    print("请按照以下步骤配置:")
-    print("1. 复制 config_example.py 为 config.py")
-    print("2. 在 config.py 中填入您的 Materials Project API Key")
-    print("   获取 API Key: https://materialsproject.org/api")
-    print("3. 重新运行此脚本")
-    print()
-    print("=" * 80)
-    exit(1)
+    config = None
+
+DEFAULT_BASE_URL = "https://api.materialsproject.org"
+API_KEY = os.environ.get("MP_API_KEY") or getattr(config, "API_KEY", None)
+BASE_URL = os.environ.get("MP_BASE_URL") or getattr(
+    config, "BASE_URL", DEFAULT_BASE_URL
+)
+
+# 并发与限速配置（可在 config.py 中覆盖）
+RATE_LIMIT = getattr(config, "RATE_LIMIT", 25)  # 每秒最多请求数（API 配额）
+MAX_WORKERS = getattr(config, "MAX_WORKERS", 8)  # 最大并发请求数
+MAX_RETRIES = getattr(config, "MAX_RETRIES", 5)  # 请求失败后的最大重试次数
+TARGET_LATENCY = getattr(config, "TARGET_LATENCY", 10.0)  # 自适应并发的目标延迟（秒）
+ES_CHUNK_SIZE = getattr(config, "ES_CHUNK_SIZE", 50)  # 电子结构每批请求的材料数
+CHEMSYS_PER_QUERY = getattr(config, "CHEMSYS_PER_QUERY", 20)  # 每次搜索合并的化学系统数
+
+# 本地响应缓存配置（可在 config.py 中覆盖）
+CACHE_FILE = getattr(config, "CACHE_FILE", ".mp_cache.sqlite")
+CACHE_TTL_DAYS = getattr(config, "CACHE_TTL_DAYS", 30)  # 缓存有效期（天）
+CACHE_MAX_MB = getattr(config, "CACHE_MAX_MB", 512)  # 缓存大小上限（MB）
+
+# 断点续传检查点文件（可在 config.py 中覆盖）
+CHECKPOINT_FILE = getattr(
+    config, "CHECKPOINT_FILE", "主流半导体材料数据库.checkpoint.jsonl"
+)
+
+# 筛选规则文件（TOML / YAML / JSON，可在 config.py 中覆盖），文件不存在时使用内置默认规则
+SCREENING_RULES_FILE = getattr(config, "SCREENING_RULES_FILE", "screening_rules.toml")
+
+
+@functools.lru_cache(maxsize=None)
+def get_screening_rules():
+    """
+    筛选规则，首次使用时读取 SCREENING_RULES_FILE
 
-print("=" * 80)
-print("Materials Project API - 主流半导体材料数据获取系统")
-print("=" * 80)
-print()
+    导入本模块时不读取规则文件，规则文件有误（或缺少解析依赖）不影响只使用
+    create_dataframe 等函数的脚本；解析失败时抛出 RuleError。
+    """
+    return load_rules(SCREENING_RULES_FILE)
+
+
+# 本地索引数据库（SQLite，可在 config.py 中覆盖），每次运行按 material_id 插入或更新
+STORE_FILE = getattr(config, "STORE_FILE", "主流半导体材料数据库.sqlite")
+
+# 所有请求共享同一个客户端（令牌桶、连接池与自适应并发控制）
+client = MPClient(
+    BASE_URL,
+    API_KEY,
+    rate_limit=RATE_LIMIT,
+    max_concurrency=MAX_WORKERS,
+    max_retries=MAX_RETRIES,
+    target_latency=TARGET_LATENCY,
+)
 
 # 定义主流半导体材料类别和搜索元素
 SEMICONDUCTOR_CATEGORIES = {
@@ -107,362 +162,859 @@ SEMICONDUCTOR_CATEGORIES = {
 }
 
 
-def search_semiconductors_by_category(category_name, chemsys_list, limit_per_system=3):
+class CheckpointJournal:
     """
-    按类别搜索半导体材料
+    只追加的检查点日志（JSON Lines）
+
+    每完成一个化学系统的搜索或一批电子结构请求就追加一行并立即落盘，
+    进程中断后可用 --resume 读取日志，跳过已完成的工作。
+
+    记录类型:
+        run: 本次运行的参数（续传时用于校验）
+        search: 已完成的化学系统及其筛选结果
+        enrich: 已完成的电子结构数据 {material_id: 数据}
+    """
+
+    def __init__(self, path, run_params, resume=False):
+        self.path = path
+        self.completed_searches = {}
+        self.enriched = {}
+        self._lock = threading.Lock()
+
+        if resume and os.path.exists(path):
+            if self._load(run_params):
+                self._file = open(path, "a", encoding="utf-8")
+                return
+        elif resume:
+            print(f"⚠ 未找到检查点文件 {path}，将从头开始")
+
+        self.completed_searches = {}
+        self.enriched = {}
+        self._file = open(path, "w", encoding="utf-8")
+        self._append({"type": "run", "params": run_params})
+
+    def _load(self, run_params):
+        """读取已有日志，参数不一致时返回 False"""
+        path = self.path
+        with open(path, encoding="utf-8") as f:
+            lines = f.readlines()
+
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # 进程中断时最后一行可能不完整
+                continue
+            if record["type"] == "run":
+                if record["params"] != run_params:
+                    print(f"⚠ 检查点 {path} 的运行参数与本次不同，将从头开始")
+                    print(f"  检查点参数: {record['params']}")
+                    print(f"  本次参数:   {run_params}")
+                    return False
+            elif record["type"] == "search":
+                key = (record["category"], record["chemsys"])
+                self.completed_searches[key] = record["materials"]
+            elif record["type"] == "enrich":
+                self.enriched.update(record["data"])
+
+        print(
+            f"✓ 从检查点恢复: {len(self.completed_searches)} 个化学系统，"
+            f"{len(self.enriched)} 个材料的电子结构"
+        )
+        return True
+
+    def _append(self, record):
+        with self._lock:
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def record_search(self, category_name, chemsys, materials):
+        """记录一个已完成的化学系统搜索"""
+        self.completed_searches[(category_name, chemsys)] = materials
+        self._append({
+            "type": "search",
+            "category": category_name,
+            "chemsys": chemsys,
+            "materials": materials,
+        })
+
+    def record_enrich(self, elec_by_id):
+        """记录一批已完成的电子结构数据"""
+        self.enriched.update(elec_by_id)
+        self._append({"type": "enrich", "data": elec_by_id})
+
+    def close(self):
+        self._file.close()
+
+
+SEARCH_PAGE_SIZE = 100  # 搜索分页大小（每次请求的记录数）
+
+SUMMARY_FIELDS = (
+    "material_id,formula_pretty,band_gap,is_gap_direct,energy_above_hull,"
+    + "formation_energy_per_atom,density,volume,nsites,elements,nelements,"
+    + "symmetry,efermi,is_metal,is_stable,crystal_system,spacegroup_symbol,"
+    + "last_updated"
+)
+
+# 增量刷新时只请求判断变化所需的轻量字段
+CHANGE_FIELDS = "material_id,band_gap,is_metal,last_updated"
+
+
+def normalize_chemsys(chemsys):
+    """化学系统的标准写法（元素按字母排序），与 API 返回的 chemsys 字段一致"""
+    return "-".join(sorted(chemsys.split("-")))
+
+
+def iter_chemsys_materials(
+    tasks,
+    limit_per_system=3,
+    band_gap_range=None,
+    fields=SUMMARY_FIELDS,
+    use_cache=True,
+):
+    """
+    流式搜索一组化学系统，逐条产出 (类别名称, 化学系统, 材料)
+
+    所有化学系统合并为一次 summary 查询（逗号分隔的 chemsys），按 _skip/_limit
+    逐页请求，记录到达即筛选并产出。每个化学系统达到 limit_per_system 后
+    不再收录，全部达到上限时停止翻页；limit_per_system 为 None 时不设上限。
+
+    筛选条件来自筛选规则中的搜索规则（带隙范围由 band_gap_range 覆盖），
+    其中能表达为 API 过滤参数的部分下推到请求参数，记录到达后再按完整条件
+    批量筛选。请求参数与 limit_per_system 无关，数量限制在本地执行；规则中
+    pushdown = false 时带隙范围也只在本地筛选，调整后仍能命中本地缓存。
+    请求失败时抛出异常，由调用方决定如何处理。
+
+    参数:
+        tasks: [(类别名称, 化学系统)] 列表
+        limit_per_system: 每个系统的材料数量限制
+        band_gap_range: 带隙筛选范围 (最小, 最大)，None 表示使用筛选规则中的范围
+        fields: 请求的字段（会自动补充 chemsys 用于区分化学系统）
+        use_cache: 是否读取本地缓存
+    """
+    tasks_by_chemsys = {}
+    for task in tasks:
+        tasks_by_chemsys.setdefault(normalize_chemsys(task[1]), []).append(task)
+    counts = dict.fromkeys(tasks, 0)
+    remaining = len(counts)
+
+    rules = get_screening_rules()
+    criteria = rules.search_expression(band_gap_range)
+    for field in sorted(criteria.fields | {"chemsys"}):
+        if field not in fields.split(","):
+            fields += f",{field}"
+    params = {
+        "chemsys": ",".join(tasks_by_chemsys),
+        "is_stable": True,  # 只要稳定相
+        "_fields": fields,
+        # 按稳定性排序，material_id 保证分页顺序确定
+        "_sort_fields": "energy_above_hull,material_id",
+        **rules.search_params(band_gap_range),
+    }
+
+    pages = client.iter_pages(
+        "/materials/summary/", params, SEARCH_PAGE_SIZE, use_cache=use_cache
+    )
+    for mat in iter_matching(pages, criteria, SEARCH_PAGE_SIZE):
+        key = mat.get("chemsys")
+        if key not in tasks_by_chemsys and len(tasks_by_chemsys) == 1:
+            key = next(iter(tasks_by_chemsys))
+        for task in tasks_by_chemsys.get(key, []):
+            if limit_per_system is not None and counts[task] >= limit_per_system:
+                continue
+            counts[task] += 1
+            if counts[task] == limit_per_system:
+                remaining -= 1
+            yield task[0], task[1], {**mat, "category": task[0], "chemsys": task[1]}
+
+        if limit_per_system is not None and remaining == 0:
+            return
+
+
+def iter_matching(records, criteria, batch_size=SEARCH_PAGE_SIZE):
+    """流式筛选记录：每 batch_size 条按规则表达式做一次向量化判断，保持原顺序"""
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            mask = criteria.evaluate(columns_from_records(batch, criteria.fields))
+            yield from (mat for mat, keep in zip(batch, mask) if keep)
+            batch = []
+    if batch:
+        mask = criteria.evaluate(columns_from_records(batch, criteria.fields))
+        yield from (mat for mat, keep in zip(batch, mask) if keep)
+
+
+def search_chemsys_group(
+    tasks,
+    limit_per_system=3,
+    band_gap_range=None,
+    fields=SUMMARY_FIELDS,
+    use_cache=True,
+):
+    """搜索一组化学系统，返回 {(类别名称, 化学系统): 材料列表}"""
+    results = {task: [] for task in tasks}
+    for category_name, chemsys, mat in iter_chemsys_materials(
+        tasks, limit_per_system, band_gap_range, fields, use_cache
+    ):
+        results[(category_name, chemsys)].append(mat)
+    return results
+
+
+def search_chemsys(
+    category_name,
+    chemsys,
+    limit_per_system=3,
+    band_gap_range=None,
+    fields=SUMMARY_FIELDS,
+    use_cache=True,
+):
+    """
+    搜索单个化学系统，返回筛选后的材料列表
+
+    请求失败时抛出异常，由调用方决定如何处理。
+    """
+    task = (category_name, chemsys)
+    return search_chemsys_group(
+        [task], limit_per_system, band_gap_range, fields, use_cache
+    )[task]
+
+
+def search_semiconductors_by_category(
+    category_name,
+    chemsys_list,
+    limit_per_system=3,
+    band_gap_range=None,
+    journal=None,
+):
+    """
+    按类别搜索半导体材料（逐个化学系统顺序请求）
 
     参数:
         category_name: 类别名称
         chemsys_list: 化学系统列表
         limit_per_system: 每个系统的材料数量限制
+        band_gap_range: 带隙筛选范围 (最小, 最大)，None 表示使用筛选规则中的范围
+        journal: CheckpointJournal 实例，已完成的化学系统直接复用
     """
     print(f"\n{'=' * 80}")
     print(f"正在搜索: {category_name}")
     print(f"{'=' * 80}")
 
     all_materials = []
+    failed = []
 
     for chemsys in chemsys_list:
         print(f"\n  → 搜索化学系统: {chemsys}...", end=" ")
 
-        url = f"{BASE_URL}/materials/summary/"
-
-        params = {
-            "chemsys": chemsys,
-            "is_stable": True,  # 只要稳定相
-            "band_gap_min": 0.1,  # 最小带隙
-            "band_gap_max": 6.0,  # 最大带隙（排除绝缘体）
-            "_fields": "material_id,formula_pretty,band_gap,is_gap_direct,energy_above_hull,"
-            + "formation_energy_per_atom,density,volume,nsites,elements,nelements,"
-            + "symmetry,efermi,is_metal,crystal_system,spacegroup_symbol",
-            "_sort_fields": "energy_above_hull",  # 按稳定性排序
-            "_limit": limit_per_system * 2,  # 多获取一些以备筛选
-        }
+        if (
+            journal is not None
+            and (category_name, chemsys) in journal.completed_searches
+        ):
+            filtered_materials = journal.completed_searches[(category_name, chemsys)]
+            all_materials.extend(filtered_materials)
+            print(f"✓ 已完成（检查点），{len(filtered_materials)} 个材料")
+            continue
 
         try:
-            response = requests.get(url, headers=headers, params=params, timeout=30)
+            filtered_materials = search_chemsys(
+                category_name, chemsys, limit_per_system, band_gap_range
+            )
+            all_materials.extend(filtered_materials)
+            print(f"✓ 找到 {len(filtered_materials)} 个材料")
+            if journal is not None:
+                journal.record_search(category_name, chemsys, filtered_materials)
+
+        except MPAPIError as e:
+            failed.append(chemsys)
+            print(f"✗ {e}")
+        except Exception as e:
+            failed.append(chemsys)
+            print(f"✗ 错误: {e}")
 
-            if response.status_code == 200:
-                data = response.json().get("data", [])
+        # 速率限制由 client 的令牌桶统一控制，无需固定 sleep
 
-                # 筛选符合条件的材料
-                filtered_materials = []
-                for mat in data:
-                    # 确保带隙在合理范围内
-                    bg = mat.get("band_gap")
-                    if bg and 0.1 <= bg <= 6.0 and not mat.get("is_metal", False):
-                        mat["category"] = category_name
-                        mat["chemsys"] = chemsys
-                        filtered_materials.append(mat)
+    print(f"\n{category_name} 共获取: {len(all_materials)} 个材料")
+    if failed:
+        print(f"⚠ 以下化学系统重试后仍失败: {', '.join(failed)}")
+    return all_materials
 
-                        if len(filtered_materials) >= limit_per_system:
-                            break
 
-                all_materials.extend(filtered_materials)
-                print(f"✓ 找到 {len(filtered_materials)} 个材料")
+def search_all_categories(
+    categories,
+    limit_per_system=3,
+    max_workers=MAX_WORKERS,
+    band_gap_range=None,
+    journal=None,
+    fields=SUMMARY_FIELDS,
+    use_cache=True,
+):
+    """
+    并发搜索所有类别的化学系统
 
-            else:
-                print(f"✗ 请求失败 (状态码: {response.status_code})")
+    每 CHEMSYS_PER_QUERY 个化学系统合并为一次分页查询，各组同时提交到线程池，
+    由共享令牌桶控制总请求速率。
+    返回 {类别名称: 材料列表}，类别顺序及类别内化学系统顺序与输入一致。
 
-        except Exception as e:
-            print(f"✗ 错误: {e}")
+    参数:
+        categories: 形如 SEMICONDUCTOR_CATEGORIES 的类别字典
+        limit_per_system: 每个系统的材料数量限制
+        max_workers: 并发线程数
+        band_gap_range: 带隙筛选范围 (最小, 最大)，None 表示使用筛选规则中的范围
+        journal: CheckpointJournal 实例，已完成的化学系统直接复用
+        fields: 请求的字段
+        use_cache: 是否读取本地缓存
+    """
+    print(f"\n{'=' * 80}")
+    print(f"正在并发搜索 {len(categories)} 个类别（最多 {max_workers} 个并发请求）")
+    print(f"{'=' * 80}\n")
 
-        # 速率限制
-        time.sleep(0.5)
+    tasks = [
+        (category_name, chemsys)
+        for category_name, category_info in categories.items()
+        for chemsys in category_info["elements"]
+    ]
+    results = {}
+    if journal is not None:
+        results.update(
+            (key, journal.completed_searches[key])
+            for key in tasks
+            if key in journal.completed_searches
+        )
+        if results:
+            print(f"  ✓ 检查点中已完成 {len(results)}/{len(tasks)} 个化学系统\n")
+        tasks = [key for key in tasks if key not in results]
+    failed = []
+
+    groups = [
+        tasks[i : i + CHEMSYS_PER_QUERY]
+        for i in range(0, len(tasks), CHEMSYS_PER_QUERY)
+    ]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(
+                search_chemsys_group,
+                group,
+                limit_per_system,
+                band_gap_range,
+                fields,
+                use_cache,
+            ): group
+            for group in groups
+        }
 
-    print(f"\n{category_name} 共获取: {len(all_materials)} 个材料")
-    return all_materials
+        for done, future in enumerate(as_completed(futures), 1):
+            group = futures[future]
+            print(f"  [{done}/{len(groups)}] 合并查询 {len(group)} 个化学系统:")
+            try:
+                group_results = future.result()
+            except Exception as e:
+                message = str(e) if isinstance(e, MPAPIError) else f"错误: {e}"
+                for category_name, chemsys in group:
+                    results[(category_name, chemsys)] = []
+                    failed.append(f"{category_name}/{chemsys}")
+                print(f"    ✗ {message}")
+                continue
+
+            for (category_name, chemsys), materials in group_results.items():
+                results[(category_name, chemsys)] = materials
+                print(
+                    f"    ✓ {category_name} / {chemsys}: 找到 {len(materials)} 个材料"
+                )
+                if journal is not None:
+                    journal.record_search(category_name, chemsys, materials)
+
+    # 按原始顺序重新组装结果
+    materials_by_category = {}
+    for category_name, category_info in categories.items():
+        materials_by_category[category_name] = [
+            mat
+            for chemsys in category_info["elements"]
+            for mat in results[(category_name, chemsys)]
+        ]
+        print(
+            f"{category_name} 共获取: {len(materials_by_category[category_name])} 个材料"
+        )
+    if failed:
+        print(f"⚠ 以下化学系统重试后仍失败: {', '.join(failed)}")
 
+    return materials_by_category
 
-def get_electronic_structure(material_id):
-    """获取电子结构信息"""
-    url = f"{BASE_URL}/materials/electronic_structure/"
-    params = {
-        "material_ids": material_id,
-        "_fields": "material_id,band_gap,cbm,vbm,is_gap_direct,efermi,is_metal",
-    }
 
-    try:
-        response = requests.get(url, headers=headers, params=params, timeout=20)
-        if response.status_code == 200:
-            data = response.json().get("data", [])
-            return data[0] if data else {}
-    except:
-        pass
-    return {}
+ES_FIELDS = "material_id,band_gap,cbm,vbm,is_gap_direct,efermi,is_metal"
+
+
+def get_electronic_structure_batch(material_ids, use_cache=True):
+    """
+    批量获取电子结构信息
 
+    一次请求多个材料（逗号分隔的 material_ids），返回 {material_id: 电子结构数据}。
+    已缓存的材料不会重复请求（use_cache=False 时强制请求）。请求失败时抛出异常。
+    """
+    return client.get_by_ids(
+        "/materials/electronic_structure/",
+        material_ids,
+        {"_fields": ES_FIELDS},
+        timeout=60,
+        use_cache=use_cache,
+    )
 
-def enrich_material_data(materials):
+
+def get_electronic_structure(material_id):
+    """获取电子结构信息（无数据时返回空字典，请求失败时抛出异常）"""
+    return get_electronic_structure_batch([material_id]).get(material_id, {})
+
+
+def enrich_material_data(
+    materials,
+    chunk_size=ES_CHUNK_SIZE,
+    journal=None,
+    use_cache=True,
+    max_workers=MAX_WORKERS,
+    failed=None,
+):
     """
     丰富材料数据，获取电子结构信息
+
+    按 chunk_size 个材料一批请求电子结构接口（多批并发），再按 material_id
+    合并回原始记录，N 个材料只需 N/chunk_size 次请求。返回结果保持输入顺序。
+    重试后仍失败的批次会在结束时列出，不会静默缺失。
+
+    参数:
+        materials: 搜索阶段得到的材料列表
+        chunk_size: 每批请求的材料数
+        journal: CheckpointJournal 实例，已完成的材料不再请求
+        use_cache: 是否读取本地缓存
+        max_workers: 并发请求的批次数
+        failed: 列表，给定时追加重试后仍失败的 material_id
     """
     print(f"\n{'=' * 80}")
     print("正在获取详细电子结构信息...")
     print(f"{'=' * 80}\n")
 
-    enriched_materials = []
+    # 去重后分批（同一材料只请求一次）
+    material_ids = list(
+        dict.fromkeys(mat["material_id"] for mat in materials if mat.get("material_id"))
+    )
 
-    for i, mat in enumerate(materials, 1):
-        material_id = mat.get("material_id")
+    elec_by_id = {}
+    if journal is not None:
+        # 检查点中记录为空的材料表示 API 无电子结构数据，同样视为已完成
+        done = {
+            mid: journal.enriched[mid]
+            for mid in material_ids
+            if mid in journal.enriched
+        }
+        elec_by_id.update((mid, doc) for mid, doc in done.items() if doc)
+        if done:
+            print(f"✓ 检查点中已完成 {len(done)}/{len(material_ids)} 个材料\n")
+        material_ids = [mid for mid in material_ids if mid not in done]
+
+    chunks = [
+        material_ids[i : i + chunk_size]
+        for i in range(0, len(material_ids), chunk_size)
+    ]
+
+    failed_ids = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(get_electronic_structure_batch, chunk, use_cache): chunk
+            for chunk in chunks
+        }
+        for completed, future in enumerate(as_completed(futures), 1):
+            chunk = futures[future]
+            prefix = f"[批次 {completed}/{len(chunks)}] {len(chunk)} 个材料:"
+            try:
+                batch = future.result()
+                elec_by_id.update(batch)
+                print(f"{prefix} ✓ 返回 {len(batch)} 条")
+                if journal is not None:
+                    journal.record_enrich({mid: batch.get(mid, {}) for mid in chunk})
+            except MPAPIError as e:
+                failed_ids.extend(chunk)
+                print(f"{prefix} ✗ {e}")
+            except Exception as e:
+                failed_ids.extend(chunk)
+                print(f"{prefix} ✗ 错误: {e}")
+
+    # 合并数据
+    enriched_materials = [
+        {**mat, **elec_by_id.get(mat.get("material_id"), {})} for mat in materials
+    ]
+
+    print(
+        f"\n电子结构数据: {sum(mat.get('material_id') in elec_by_id for mat in materials)}"
+        f"/{len(materials)} 个材料"
+    )
+    if failed_ids:
         print(
-            f"[{i}/{len(materials)}] {mat.get('formula_pretty', 'Unknown')} ({material_id})...",
-            end=" ",
+            f"⚠ {len(failed_ids)} 个材料的电子结构请求重试后仍失败: "
+            f"{', '.join(failed_ids[:10])}{' ...' if len(failed_ids) > 10 else ''}"
         )
+        print("  可使用 --resume 重新运行，只补齐这些材料")
+        if failed is not None:
+            failed.extend(failed_ids)
+    return enriched_materials
 
-        # 获取电子结构
-        elec_data = get_electronic_structure(material_id)
-
-        # 合并数据
-        enriched_mat = {**mat, **elec_data}
-        enriched_materials.append(enriched_mat)
 
-        print("✓")
+def get_database_version():
+    """查询 Materials Project 当前数据库版本，失败时返回 None"""
+    try:
+        return client.get("/heartbeat", {}, timeout=20, use_cache=False).get(
+            "db_version"
+        )
+    except Exception as e:
+        print(f"⚠ 无法获取数据库版本: {e}")
+        return None
 
-        # 速率限制
-        time.sleep(0.3)
 
-        # 每10个显示进度
-        if i % 10 == 0:
-            print(f"   进度: {i}/{len(materials)} ({i / len(materials) * 100:.1f}%)")
+def refresh_materials(
+    previous, run_params, chunk_size=ES_CHUNK_SIZE, max_workers=MAX_WORKERS
+):
+    """
+    增量刷新：只重新获取新增或上游数据有变化的材料
 
-    return enriched_materials
+    1. 用轻量字段（material_id、band_gap、is_metal、last_updated）重新搜索所有化学系统，
+       得到当前应收录的材料及其更新时间
+    2. 与上次数据集比较，last_updated 不同或新出现的材料视为有变化
+    3. 只对有变化的材料请求完整 summary 和电子结构，其余沿用上次记录
 
+    返回按本次搜索顺序排列的完整材料列表；全部请求都绕过本地缓存。
+    summary 或电子结构请求失败的材料沿用上次记录（last_updated 未更新，
+    下次刷新时会重新获取），并在结束时列出；新材料没有上次记录，保留已获取的字段。
 
-def create_dataframe(materials):
-    """
-    创建DataFrame并整理数据
+    参数:
+        previous: 上次保存的材料列表（JSON 输出）
+        run_params: 本次运行参数（limit_per_system、band_gap_range）
+        chunk_size: 每批请求的材料数
+        max_workers: 并发线程数
     """
+    previous_by_id = {mat["material_id"]: mat for mat in previous}
+
+    materials_by_category = search_all_categories(
+        SEMICONDUCTOR_CATEGORIES,
+        run_params["limit_per_system"],
+        max_workers=max_workers,
+        band_gap_range=tuple(run_params["band_gap_range"]),
+        fields=CHANGE_FIELDS,
+        use_cache=False,
+    )
+    current = [mat for mats in materials_by_category.values() for mat in mats]
+    current_ids = {mat["material_id"] for mat in current}
+
+    changed = []
+    for mat in current:
+        old = previous_by_id.get(mat["material_id"])
+        if old is None or old.get("last_updated") != mat.get("last_updated"):
+            changed.append(mat)
+    removed = [mid for mid in previous_by_id if mid not in current_ids]
+
     print(f"\n{'=' * 80}")
-    print("正在整理数据...")
-    print(f"{'=' * 80}\n")
+    print(
+        f"变化检测: 当前 {len(current)} 个材料，"
+        f"新增/更新 {len(changed)} 个，移除 {len(removed)} 个，"
+        f"未变化 {len(current) - len(changed)} 个"
+    )
+    print(f"{'=' * 80}")
 
-    df_data = []
-
-    for mat in materials:
-        row = {
-            "分类": mat.get("category", "Unknown"),
-            "化学系统": mat.get("chemsys", "Unknown"),
-            "材料ID": mat.get("material_id", ""),
-            "化学式": mat.get("formula_pretty", ""),
-            "元素组成": ", ".join(mat.get("elements", [])),
-            "元素数": mat.get("nelements", 0),
-            "原子数": mat.get("nsites", 0),
-            # 电子性质
-            "带隙 (eV)": round(mat.get("band_gap", 0), 3)
-            if mat.get("band_gap")
-            else "N/A",
-            "直接带隙": "是" if mat.get("is_gap_direct") else "否",
-            "导带底 CBM (eV)": round(mat.get("cbm", 0), 3) if mat.get("cbm") else "N/A",
-            "价带顶 VBM (eV)": round(mat.get("vbm", 0), 3) if mat.get("vbm") else "N/A",
-            "费米能级 (eV)": round(mat.get("efermi", 0), 3)
-            if mat.get("efermi")
-            else "N/A",
-            # 热力学性质
-            "形成能 (eV/atom)": round(mat.get("formation_energy_per_atom", 0), 4)
-            if mat.get("formation_energy_per_atom")
-            else "N/A",
-            "能量高于凸包 (eV/atom)": round(mat.get("energy_above_hull", 0), 4)
-            if mat.get("energy_above_hull")
-            else "N/A",
-            # 结构性质
-            "晶系": mat.get("crystal_system", "Unknown"),
-            "空间群": mat.get("spacegroup_symbol", "Unknown"),
-            "密度 (g/cm³)": round(mat.get("density", 0), 3)
-            if mat.get("density")
-            else "N/A",
-            "体积 (Ų)": round(mat.get("volume", 0), 2) if mat.get("volume") else "N/A",
-            # 应用潜力评估
-            "光电应用潜力": assess_photovoltaic_potential(mat),
-            "光催化应用潜力": assess_photocatalytic_potential(mat),
+    # 只为有变化的材料请求完整数据
+    full_by_id = {}
+    failed = []
+    changed_ids = [mat["material_id"] for mat in changed]
+    for i in range(0, len(changed_ids), chunk_size):
+        chunk = changed_ids[i : i + chunk_size]
+        try:
+            full_by_id.update(
+                client.get_by_ids(
+                    "/materials/summary/",
+                    chunk,
+                    {"_fields": SUMMARY_FIELDS},
+                    timeout=60,
+                    use_cache=False,
+                )
+            )
+        except Exception as e:
+            failed.extend(chunk)
+            print(f"✗ {len(chunk)} 个材料的 summary 请求失败: {e}")
+
+    # summary 失败且有上次记录的材料直接沿用上次记录，不再请求电子结构
+    changed = [
+        mat
+        for mat in changed
+        if mat["material_id"] in full_by_id or mat["material_id"] not in previous_by_id
+    ]
+    changed_full = [
+        {
+            **full_by_id.get(mat["material_id"], mat),
+            "category": mat["category"],
+            "chemsys": mat["chemsys"],
         }
+        for mat in changed
+    ]
+    enriched_by_id = {
+        mat["material_id"]: mat
+        for mat in enrich_material_data(
+            changed_full,
+            chunk_size,
+            use_cache=False,
+            max_workers=max_workers,
+            failed=failed,
+        )
+    }
 
-        df_data.append(row)
+    # 获取失败的材料：有上次记录的沿用上次记录（不用缺少能带边的新数据覆盖）
+    kept = [mid for mid in dict.fromkeys(failed) if mid in previous_by_id]
+    incomplete = [mid for mid in dict.fromkeys(failed) if mid not in previous_by_id]
+    for mid in kept:
+        enriched_by_id.pop(mid, None)
+    if kept:
+        print(
+            f"⚠ {len(kept)} 个材料获取失败，沿用上次记录: "
+            f"{', '.join(kept[:10])}{' ...' if len(kept) > 10 else ''}"
+        )
+    if incomplete:
+        print(
+            f"⚠ {len(incomplete)} 个新材料获取失败，数据不完整: "
+            f"{', '.join(incomplete[:10])}{' ...' if len(incomplete) > 10 else ''}"
+        )
 
-    df = pd.DataFrame(df_data)
+    # 按本次搜索顺序合并：有变化的用新数据，其余沿用上次记录
+    return [
+        enriched_by_id.get(mat["material_id"])
+        or {
+            **previous_by_id[mat["material_id"]],
+            "category": mat["category"],
+            "chemsys": mat["chemsys"],
+        }
+        for mat in current
+    ]
 
-    # 按分类和带隙排序
-    df = df.sort_values(by=["分类", "带隙 (eV)"], ascending=[True, True])
-    df = df.reset_index(drop=True)
 
-    return df
+EXCEL_NA_REP = "N/A"  # Excel 中缺失值的显示文本
 
 
-def assess_photovoltaic_potential(mat):
-    """评估光伏应用潜力"""
-    bg = mat.get("band_gap")
-    energy_hull = mat.get("energy_above_hull", 1)
+def create_dataframe(materials):
+    """
+    创建DataFrame并整理数据
 
-    if not bg or bg == "N/A":
-        return "未知"
+    列定义与转换见 materials_loader.dataframe_from_records：每个字段只遍历一遍记录列表，
+    数值列整体转换为 float 并向量化四舍五入，缺失值保存为 NaN
+    （写出 Excel 时以 EXCEL_NA_REP 显示），应用潜力按筛选规则评估。
+    """
+    print(f"\n{'=' * 80}")
+    print("正在整理数据...")
+    print(f"{'=' * 80}\n")
 
-    if 1.1 <= bg <= 1.8 and energy_hull < 0.05:
-        return "优秀"
-    elif 0.8 <= bg <= 2.5 and energy_hull < 0.1:
-        return "良好"
-    elif 0.5 <= bg <= 3.0:
-        return "一般"
-    else:
-        return "较低"
-
-
-def assess_photocatalytic_potential(mat):
-    """评估光催化应用潜力"""
-    bg = mat.get("band_gap")
-    cbm = mat.get("cbm")
-    vbm = mat.get("vbm")
-
-    if not bg or bg == "N/A":
-        return "未知"
-
-    # 水分解需要带隙 > 1.23 eV，且能带位置合适
-    if bg and bg > 1.8 and bg < 3.5:
-        if cbm and vbm:
-            # 简化评估：CBM要足够负，VBM要足够正
-            if cbm < 0 and vbm > -2.5:
-                return "优秀"
-            elif cbm < 0.5:
-                return "良好"
-        return "一般"
-    elif bg and 1.5 <= bg <= 4.0:
-        return "一般"
-    else:
-        return "较低"
+    return dataframe_from_records(materials, get_screening_rules())
 
 
-def style_excel(filename):
+def assess_photovoltaic_potential_batch(band_gap, energy_above_hull):
     """
-    美化Excel表格
+    批量评估光伏应用潜力（内置默认规则的 photovoltaic 筛选）
+
+    参数:
+        band_gap: 带隙数组，NaN 或 0 表示缺失
+        energy_above_hull: 能量高于凸包数组，NaN 表示缺失（视为不稳定）
     """
-    print(f"\n{'=' * 80}")
-    print("正在美化Excel表格...")
-    print(f"{'=' * 80}\n")
+    columns = {
+        "band_gap": to_float_array(band_gap),
+        "energy_above_hull": to_float_array(energy_above_hull),
+    }
+    return load_rules().screens["photovoltaic"].evaluate(columns)
 
-    wb = load_workbook(filename)
-    ws = wb.active
 
-    # 定义样式
-    header_fill = PatternFill(
-        start_color="4472C4", end_color="4472C4", fill_type="solid"
-    )
-    header_font = Font(name="微软雅黑", size=11, bold=True, color="FFFFFF")
-
-    category_fills = {
-        "金属硫化物": PatternFill(
-            start_color="FFE699", end_color="FFE699", fill_type="solid"
-        ),
-        "金属氧化物": PatternFill(
-            start_color="C6E0B4", end_color="C6E0B4", fill_type="solid"
-        ),
-        "金属硫氧化物": PatternFill(
-            start_color="F4B084", end_color="F4B084", fill_type="solid"
-        ),
-        "氮化物": PatternFill(
-            start_color="B4C7E7", end_color="B4C7E7", fill_type="solid"
-        ),
-        "碳化物": PatternFill(
-            start_color="D9D9D9", end_color="D9D9D9", fill_type="solid"
-        ),
-        "硒化物": PatternFill(
-            start_color="FFD966", end_color="FFD966", fill_type="solid"
-        ),
-        "碲化物": PatternFill(
-            start_color="F8CBAD", end_color="F8CBAD", fill_type="solid"
-        ),
-        "卤化物": PatternFill(
-            start_color="C9DAF8", end_color="C9DAF8", fill_type="solid"
-        ),
-        "磷化物": PatternFill(
-            start_color="D5A6BD", end_color="D5A6BD", fill_type="solid"
-        ),
-        "砷化物": PatternFill(
-            start_color="B6D7A8", end_color="B6D7A8", fill_type="solid"
-        ),
+def assess_photocatalytic_potential_batch(band_gap, cbm, vbm):
+    """
+    批量评估光催化应用潜力（内置默认规则的 photocatalytic 筛选）
+
+    参数:
+        band_gap: 带隙数组，NaN 或 0 表示缺失
+        cbm: 导带底数组，NaN 或 0 表示缺失
+        vbm: 价带顶数组，NaN 或 0 表示缺失
+    """
+    columns = {
+        "band_gap": to_float_array(band_gap),
+        "cbm": to_float_array(cbm),
+        "vbm": to_float_array(vbm),
     }
+    return load_rules().screens["photocatalytic"].evaluate(columns)
+
+
+# Excel 样式：各分类的行背景色
+CATEGORY_FILL_COLORS = {
+    "金属硫化物": "FFE699",
+    "金属氧化物": "C6E0B4",
+    "金属硫氧化物": "F4B084",
+    "氮化物": "B4C7E7",
+    "碳化物": "D9D9D9",
+    "硒化物": "FFD966",
+    "碲化物": "F8CBAD",
+    "卤化物": "C9DAF8",
+    "磷化物": "D5A6BD",
+    "砷化物": "B6D7A8",
+}
 
-    data_font = Font(name="微软雅黑", size=10)
+# 文本列左对齐（列序号从 1 开始），其余居中
+EXCEL_LEFT_ALIGNED_COLUMNS = {1, 2, 3, 4, 5, 9, 16, 17, 21, 22}
+
+EXCEL_CHUNK_ROWS = 10000  # 写出 Excel 时每次转换的行数
+
+EXCEL_COLUMN_WIDTHS = {
+    "A": 15,  # 分类
+    "B": 15,  # 化学系统
+    "C": 15,  # 材料ID
+    "D": 18,  # 化学式
+    "E": 20,  # 元素组成
+    "F": 10,  # 元素数
+    "G": 10,  # 原子数
+    "H": 12,  # 带隙
+    "I": 12,  # 直接带隙
+    "J": 15,  # CBM
+    "K": 15,  # VBM
+    "L": 15,  # 费米能级
+    "M": 18,  # 形成能
+    "N": 20,  # 能量高于凸包
+    "O": 12,  # 晶系
+    "P": 15,  # 空间群
+    "Q": 14,  # 密度
+    "R": 14,  # 体积
+    "S": 16,  # 光电应用潜力
+    "T": 16,  # 光催化应用潜力
+}
+
+
+def excel_named_styles():
+    """
+    Excel 命名样式：表头，以及每个分类（含无分类）× 左对齐/居中 的数据单元格样式
+
+    返回 (表头样式, {(分类, 是否左对齐): 数据样式})，未知分类使用键 (None, ...)
+    """
+    thin = Side(style="thin", color="000000")
+    border = Border(left=thin, right=thin, top=thin, bottom=thin)
     alignment_center = Alignment(horizontal="center", vertical="center", wrap_text=True)
     alignment_left = Alignment(horizontal="left", vertical="center", wrap_text=True)
+    data_font = Font(name="微软雅黑", size=10)
 
-    thin_border = Border(
-        left=Side(style="thin", color="000000"),
-        right=Side(style="thin", color="000000"),
-        top=Side(style="thin", color="000000"),
-        bottom=Side(style="thin", color="000000"),
+    header = NamedStyle(
+        name="表头",
+        font=Font(name="微软雅黑", size=11, bold=True, color="FFFFFF"),
+        fill=PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid"),
+        border=border,
+        alignment=alignment_center,
     )
 
-    # 设置表头样式
-    for cell in ws[1]:
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = alignment_center
-        cell.border = thin_border
-
-    # 设置数据行样式
-    for row_idx, row in enumerate(ws.iter_rows(min_row=2), start=2):
-        category = ws.cell(row=row_idx, column=1).value
-
-        for col_idx, cell in enumerate(row, start=1):
-            cell.font = data_font
-            cell.border = thin_border
-
-            # 根据分类设置背景色
-            if category in category_fills:
-                cell.fill = category_fills[category]
-
-            # 设置对齐方式
-            if col_idx in [1, 2, 3, 4, 5, 9, 16, 17, 21, 22]:  # 文本列左对齐
-                cell.alignment = alignment_left
-            else:
-                cell.alignment = alignment_center
-
-    # 调整列宽
-    column_widths = {
-        "A": 15,  # 分类
-        "B": 15,  # 化学系统
-        "C": 15,  # 材料ID
-        "D": 18,  # 化学式
-        "E": 20,  # 元素组成
-        "F": 10,  # 元素数
-        "G": 10,  # 原子数
-        "H": 12,  # 带隙
-        "I": 12,  # 直接带隙
-        "J": 15,  # CBM
-        "K": 15,  # VBM
-        "L": 15,  # 费米能级
-        "M": 18,  # 形成能
-        "N": 20,  # 能量高于凸包
-        "O": 12,  # 晶系
-        "P": 15,  # 空间群
-        "Q": 14,  # 密度
-        "R": 14,  # 体积
-        "S": 16,  # 光电应用潜力
-        "T": 16,  # 光催化应用潜力
+    data_styles = {}
+    for category in [None, *CATEGORY_FILL_COLORS]:
+        color = CATEGORY_FILL_COLORS.get(category)
+        for left in (True, False):
+            style = NamedStyle(
+                name=f"数据_{category or '默认'}_{'左' if left else '中'}",
+                font=data_font,
+                border=border,
+                alignment=alignment_left if left else alignment_center,
+            )
+            if color:
+                style.fill = PatternFill(
+                    start_color=color, end_color=color, fill_type="solid"
+                )
+            data_styles[(category, left)] = style
+    return header, data_styles
+
+
+def write_excel(df, filename):
+    """
+    写出美化的Excel表格（数据与样式一次流式写出）
+
+    使用 openpyxl 只写模式逐行写出：每个单元格引用按分类和对齐方式预先注册的
+    命名样式，行高、列宽和冻结窗格在工作表级别设置，不再重新打开文件逐格美化，
+    内存占用与行数无关。缺失值显示为 EXCEL_NA_REP。
+    """
+    print(f"\n{'=' * 80}")
+    print("正在写出Excel表格...")
+    print(f"{'=' * 80}\n")
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+
+    header_style, data_styles = excel_named_styles()
+    for style in [header_style, *data_styles.values()]:
+        wb.add_named_style(style)
+
+    # 每种命名样式对应的单元格样式索引，写出时直接引用
+    def style_array(style):
+        cell = WriteOnlyCell(ws)
+        cell.style = style.name
+        return cell._style
+
+    columns = range(1, len(df.columns) + 1)
+    row_styles = {
+        category: [
+            style_array(data_styles[(category, col in EXCEL_LEFT_ALIGNED_COLUMNS)])
+            for col in columns
+        ]
+        for category in [None, *CATEGORY_FILL_COLORS]
     }
+    header_array = style_array(header_style)
 
-    for col, width in column_widths.items():
+    # 列宽、行高与冻结首行（只写模式下需在写入数据前设置）
+    for col, width in EXCEL_COLUMN_WIDTHS.items():
         ws.column_dimensions[col].width = width
-
-    # 设置行高
+    ws.sheet_format.defaultRowHeight = 25  # 数据行高
+    ws.sheet_format.customHeight = True
     ws.row_dimensions[1].height = 30  # 表头行高
-    for row in range(2, ws.max_row + 1):
-        ws.row_dimensions[row].height = 25  # 数据行高
-
-    # 冻结首行
     ws.freeze_panes = "A2"
 
-    # 保存
+    ws.append([Cell(ws, 1, 1, name, header_array) for name in df.columns])
+
+    # 分块转换为 Python 对象，避免整表复制
+    for start in range(0, len(df), EXCEL_CHUNK_ROWS):
+        chunk = df.iloc[start : start + EXCEL_CHUNK_ROWS]
+        values = chunk.astype(object).where(chunk.notna(), EXCEL_NA_REP)
+        for row in values.itertuples(index=False, name=None):
+            styles = row_styles.get(row[0], row_styles[None])
+            ws.append([
+                Cell(ws, 1, 1, value, style) for value, style in zip(row, styles)
+            ])
+
     wb.save(filename)
-    print("✓ Excel美化完成")
+    print(f"✓ Excel数据已保存: {filename}（{len(df)} 行）")
+
+
+def pad_display(text, width):
+    """按显示宽度（中文字符占两列）右侧补齐空格"""
+    used = sum(2 if unicodedata.east_asian_width(ch) in "WF" else 1 for ch in text)
+    return text + " " * max(width - used, 1)
 
 
-def save_summary_report(df, filename="主流半导体材料数据摘要.txt"):
+def format_top_materials(materials):
+    """TOP 材料列表 -> 报告行"""
+    lines = []
+    for idx, (formula, band_gap, category) in enumerate(
+        zip(materials["化学式"], materials["带隙 (eV)"], materials["分类"]), 1
+    ):
+        band_gap = EXCEL_NA_REP if pd.isna(band_gap) else band_gap
+        lines.append(f"  {idx:>2}. {formula:<15} 带隙: {band_gap} eV ({category})")
+    return lines
+
+
+def save_summary_report(df, filename="主流半导体材料数据摘要.txt", stats=None):
     """
     生成摘要报告
+
+    参数:
+        df: 材料数据表
+        filename: 报告文件名
+        stats: compute_stats(df) 的结果，None 时在此计算
     """
     print(f"\n{'=' * 80}")
     print("正在生成数据摘要报告...")
     print(f"{'=' * 80}\n")
 
+    if stats is None:
+        stats = compute_stats(df)
+
     report = []
     report.append("=" * 80)
     report.append("Materials Project - 主流半导体材料数据摘要报告")
@@ -476,97 +1028,71 @@ def save_summary_report(df, filename="主流半导体材料数据摘要.txt"):
     # 总体统计
     report.append("📊 总体统计")
     report.append("-" * 80)
-    report.append(f"材料总数: {len(df)}")
-    report.append(f"材料类别: {df['分类'].nunique()}")
+    report.append(f"材料总数: {stats.total}")
+    report.append(f"材料类别: {stats.n_categories}")
     report.append("")
 
     # 分类统计
     report.append("📋 按分类统计")
     report.append("-" * 80)
-    category_counts = df["分类"].value_counts()
-    for category, count in category_counts.items():
+    for category, count in stats.category_counts.items():
         report.append(f"  {category:<15} {count:>3} 个材料")
     report.append("")
 
     # 带隙分布
     report.append("⚡ 带隙分布统计")
     report.append("-" * 80)
-    bg_data = df[df["带隙 (eV)"] != "N/A"]["带隙 (eV)"].astype(float)
-    if len(bg_data) > 0:
-        report.append(f"  平均带隙: {bg_data.mean():.3f} eV")
-        report.append(f"  最小带隙: {bg_data.min():.3f} eV")
-        report.append(f"  最大带隙: {bg_data.max():.3f} eV")
-        report.append(f"  中位带隙: {bg_data.median():.3f} eV")
+    if stats.band_gap is not None:
+        report.append(f"  平均带隙: {stats.band_gap['mean']:.3f} eV")
+        report.append(f"  最小带隙: {stats.band_gap['min']:.3f} eV")
+        report.append(f"  最大带隙: {stats.band_gap['max']:.3f} eV")
+        report.append(f"  中位带隙: {stats.band_gap['median']:.3f} eV")
 
         # 带隙区间分布
         report.append("")
         report.append("  带隙区间分布:")
-        report.append(
-            f"    0.0-1.0 eV (红外):        {len(bg_data[bg_data < 1.0]):>3} 个"
-        )
-        report.append(
-            f"    1.0-2.0 eV (近红外-可见): {len(bg_data[(bg_data >= 1.0) & (bg_data < 2.0)]):>3} 个"
-        )
-        report.append(
-            f"    2.0-3.0 eV (可见-紫外):   {len(bg_data[(bg_data >= 2.0) & (bg_data < 3.0)]):>3} 个"
-        )
-        report.append(
-            f"    3.0+ eV (紫外):          {len(bg_data[bg_data >= 3.0]):>3} 个"
-        )
+        for label, count in stats.band_gap_bins.items():
+            report.append(f"    {pad_display(label + ':', 26)}{count:>3} 个")
     report.append("")
 
     # 直接带隙统计
     report.append("🔬 带隙类型统计")
     report.append("-" * 80)
-    direct_counts = df["直接带隙"].value_counts()
-    for gap_type, count in direct_counts.items():
+    for gap_type, count in stats.counts("直接带隙").items():
         report.append(f"  {gap_type}直接带隙: {count} 个材料")
     report.append("")
 
     # 晶系分布
     report.append("🔷 晶系分布")
     report.append("-" * 80)
-    crystal_counts = df["晶系"].value_counts()
-    for crystal, count in crystal_counts.items():
+    for crystal, count in stats.counts("晶系").items():
         report.append(f"  {crystal:<15} {count:>3} 个材料")
     report.append("")
 
     # 应用潜力统计
     report.append("🌟 光电应用潜力统计")
     report.append("-" * 80)
-    pv_counts = df["光电应用潜力"].value_counts()
-    for potential, count in pv_counts.items():
+    for potential, count in stats.counts("光电应用潜力").items():
         report.append(f"  {potential:<10} {count:>3} 个材料")
     report.append("")
 
     report.append("💧 光催化应用潜力统计")
     report.append("-" * 80)
-    pc_counts = df["光催化应用潜力"].value_counts()
-    for potential, count in pc_counts.items():
+    for potential, count in stats.counts("光催化应用潜力").items():
         report.append(f"  {potential:<10} {count:>3} 个材料")
     report.append("")
 
-    # TOP材料推荐
-    report.append("⭐ TOP 10 光伏候选材料（按带隙排序）")
+    # TOP材料推荐：在 优秀/良好 候选中按多指标排名（见 materials_ranking）
+    report.append("⭐ TOP 10 光伏候选材料（带隙接近 1.34 eV、稳定、直接带隙优先）")
     report.append("-" * 80)
     pv_materials = df[df["光电应用潜力"].isin(["优秀", "良好"])]
-    if len(pv_materials) > 0:
-        pv_materials_sorted = pv_materials.nsmallest(10, "带隙 (eV)")
-        for idx, (_, row) in enumerate(pv_materials_sorted.iterrows(), 1):
-            report.append(
-                f"  {idx:>2}. {row['化学式']:<15} 带隙: {row['带隙 (eV)']} eV ({row['分类']})"
-            )
+    report.extend(format_top_materials(rank(pv_materials, PV_RANKING, k=10)))
     report.append("")
 
-    report.append("🌊 TOP 10 光催化候选材料")
+    report.append("🌊 TOP 10 光催化候选材料（带隙接近 2.4 eV、稳定优先）")
     report.append("-" * 80)
     pc_materials = df[df["光催化应用潜力"].isin(["优秀", "良好"])]
-    if len(pc_materials) > 0:
-        pc_materials_sorted = pc_materials.head(10)
-        for idx, (_, row) in enumerate(pc_materials_sorted.iterrows(), 1):
-            report.append(
-                f"  {idx:>2}. {row['化学式']:<15} 带隙: {row['带隙 (eV)']} eV ({row['分类']})"
-            )
+    report.extend(format_top_materials(rank(pc_materials, PC_RANKING, k=10)))
     report.append("")
 
     report.append("=" * 80)
@@ -588,60 +1114,244 @@ def save_summary_report(df, filename="主流半导体材料数据摘要.txt"):
 # ============================================================================
 
 
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="获取主流半导体材料数据")
+    parser.add_argument(
+        "--base-url",
+        help="API 基础地址，覆盖 config.py 中的 BASE_URL"
+        "（例如本地模拟服务器 http://127.0.0.1:8000）",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=MAX_WORKERS,
+        help=f"最大并发请求数，1 表示逐个顺序搜索（默认 {MAX_WORKERS}）",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=ES_CHUNK_SIZE,
+        help=f"电子结构每批请求的材料数（默认 {ES_CHUNK_SIZE}）",
+    )
+    parser.add_argument(
+        "--limit-per-system",
+        type=int,
+        default=5,
+        help="每个化学系统保留的材料数，0 表示不限（默认 5）",
+    )
+    parser.add_argument(
+        "--band-gap",
+        type=float,
+        nargs=2,
+        default=None,
+        metavar=("MIN", "MAX"),
+        help="带隙筛选范围 eV（默认取筛选规则文件中的范围，内置规则为 "
+        f"{DEFAULT_RULES['search']['band_gap'][0]} {DEFAULT_RULES['search']['band_gap'][1]}）",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="不使用本地响应缓存，全部重新下载"
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="增量刷新：只重新获取上游数据有变化的材料，并更新已有输出文件",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help=f"从检查点 {CHECKPOINT_FILE} 继续上次中断的运行",
+    )
+    return parser.parse_args()
+
+
+def check_config(base_url):
+    """检查 API 配置，访问官方 API 却没有 API Key 时提示并退出"""
+    if API_KEY or base_url != DEFAULT_BASE_URL:
+        return
+    print("=" * 80)
+    print("错误: 找不到 config.py 文件")
+    print("=" * 80)
+    print()
+    print("请按照以下步骤配置:")
+    print("1. 复制 config_example.py 为 config.py")
+    print("2. 在 config.py 中填入您的 Materials Project API Key")
+    print("   获取 API Key: https://materialsproject.org/api")
+    print("3. 重新运行此脚本")
+    print()
+    print("=" * 80)
+    exit(1)
+
+
 def main():
     """主函数"""
+    global client
+    args = parse_args()
+    # 按命令行参数重建共享客户端：并发上限与连接池大小一致，
+    # 并发数多于连接池时 urllib3 会丢弃多余的连接，无法复用 keep-alive
+    client = MPClient(
+        args.base_url or BASE_URL,
+        API_KEY,
+        rate_limit=RATE_LIMIT,
+        max_concurrency=args.workers,
+        max_retries=MAX_RETRIES,
+        target_latency=TARGET_LATENCY,
+    )
+    check_config(client.base_url)
+    try:
+        rules = get_screening_rules()
+    except RuleError as e:
+        print(f"✗ {e}")
+        exit(1)
+
+    print("=" * 80)
+    print("Materials Project API - 主流半导体材料数据获取系统")
+    print("=" * 80)
+    print()
+
     start_time = time.time()
 
     print("开始时间:", datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
     print()
 
-    # 第一步：搜索各类半导体材料
-    all_materials = []
-
-    for category_name, category_info in SEMICONDUCTOR_CATEGORIES.items():
-        materials = search_semiconductors_by_category(
-            category_name,
-            category_info["elements"],
-            limit_per_system=5,  # 每个化学系统获取5个材料
+    if not args.no_cache:
+        client.cache = ResponseCache(
+            CACHE_FILE,
+            ttl=CACHE_TTL_DAYS * 24 * 3600,
+            max_bytes=CACHE_MAX_MB * 1024 * 1024,
         )
-        all_materials.extend(materials)
-
-    print(f"\n{'=' * 80}")
-    print(f"第一阶段完成：共搜索到 {len(all_materials)} 个半导体材料")
-    print(f"{'=' * 80}")
 
-    if len(all_materials) == 0:
-        print("\n❌ 未找到符合条件的材料，程序退出")
-        return
+    limit_per_system = args.limit_per_system or None
+    band_gap_range = tuple(args.band_gap or rules.band_gap_range)
+    run_params = {
+        "limit_per_system": limit_per_system,
+        "band_gap_range": list(band_gap_range),
+        "search_rule": rules.search_expression(band_gap_range).source,
+    }
 
-    # 第二步：获取详细电子结构信息
-    enriched_materials = enrich_material_data(all_materials[:120])  # 限制120个以免超时
+    excel_file = "主流半导体材料数据库.xlsx"
+    json_file = "主流半导体材料数据库.json"
+    meta_file = "主流半导体材料数据库.meta.json"
+    parquet_dir = "主流半导体材料数据库.parquet"
+
+    db_version = get_database_version()
+
+    if args.refresh and os.path.exists(json_file) and os.path.exists(meta_file):
+        # 增量刷新：第一、二步只处理有变化的材料
+        with open(meta_file, encoding="utf-8") as f:
+            meta = json.load(f)
+        if (
+            db_version is not None
+            and meta.get("db_version") == db_version
+            and (meta.get("run_params") == run_params)
+        ):
+            print(f"✓ 数据库版本未变化 ({db_version})，现有输出已是最新，无需刷新")
+            return
+
+        with open(json_file, encoding="utf-8") as f:
+            previous = json.load(f)
+        print(
+            f"增量刷新: 上次数据 {len(previous)} 个材料"
+            f"（数据库版本 {meta.get('db_version')} → {db_version}）"
+        )
+        enriched_materials = refresh_materials(
+            previous, run_params, chunk_size=args.chunk_size, max_workers=args.workers
+        )
+    else:
+        if args.refresh:
+            print("⚠ 未找到上次的输出文件，执行完整获取")
+
+        # 第一步：搜索各类半导体材料
+        all_materials = []
+        journal = CheckpointJournal(CHECKPOINT_FILE, run_params, resume=args.resume)
+
+        if args.workers > 1:
+            materials_by_category = search_all_categories(
+                SEMICONDUCTOR_CATEGORIES,
+                limit_per_system,
+                max_workers=args.workers,
+                band_gap_range=band_gap_range,
+                journal=journal,
+            )
+            for materials in materials_by_category.values():
+                all_materials.extend(materials)
+        else:
+            for category_name, category_info in SEMICONDUCTOR_CATEGORIES.items():
+                materials = search_semiconductors_by_category(
+                    category_name,
+                    category_info["elements"],
+                    limit_per_system,
+                    band_gap_range,
+                    journal=journal,
+                )
+                all_materials.extend(materials)
+
+        print(f"\n{'=' * 80}")
+        print(f"第一阶段完成：共搜索到 {len(all_materials)} 个半导体材料")
+        print(f"{'=' * 80}")
+
+        if len(all_materials) == 0:
+            print("\n❌ 未找到符合条件的材料，程序退出")
+            journal.close()
+            return
+
+        # 第二步：获取详细电子结构信息
+        enriched_materials = enrich_material_data(
+            all_materials,
+            chunk_size=args.chunk_size,
+            journal=journal,
+            max_workers=args.workers,
+        )
+        journal.close()
 
     # 第三步：创建DataFrame
     df = create_dataframe(enriched_materials)
 
     # 第四步：保存数据
-    excel_file = "主流半导体材料数据库.xlsx"
-    json_file = "主流半导体材料数据库.json"
-
     print(f"\n{'=' * 80}")
     print("正在保存数据...")
     print(f"{'=' * 80}\n")
 
-    # 保存Excel
-    df.to_excel(excel_file, index=False, engine="openpyxl")
-    print(f"✓ Excel数据已保存: {excel_file}")
-
-    # 美化Excel
-    style_excel(excel_file)
+    # 保存Excel（数据与样式一次写出）
+    write_excel(df, excel_file)
 
     # 保存JSON
     with open(json_file, "w", encoding="utf-8") as f:
         json.dump(enriched_materials, f, indent=2, ensure_ascii=False)
     print(f"✓ JSON数据已保存: {json_file}")
 
+    # 保存按分类/化学系统分区的 Parquet 数据集（需要 pyarrow）
+    if HAS_PYARROW:
+        write_dataset(df, parquet_dir)
+        print(f"✓ Parquet数据集已保存: {parquet_dir}（按分类/化学系统分区）")
+    else:
+        print("⚠ 未安装 pyarrow，跳过 Parquet 数据集（pip install pyarrow）")
+
+    # 写入本地索引数据库：与本次结果一致，删除不再收录的材料
+    with MaterialsStore(STORE_FILE) as store:
+        removed = store.replace_all(enriched_materials)
+        print(
+            f"✓ 本地数据库已更新: {STORE_FILE}（共 {len(store)} 个材料，"
+            f"移除 {removed} 个）"
+        )
+
+    # 保存元数据（供增量刷新判断数据库版本）
+    with open(meta_file, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "db_version": db_version,
+                "fetched_at": datetime.now().isoformat(timespec="seconds"),
+                "run_params": run_params,
+                "count": len(enriched_materials),
+            },
+            f,
+            indent=2,
+            ensure_ascii=False,
+        )
+
     # 第五步：生成摘要报告
-    save_summary_report(df)
+    stats = compute_stats(df)
+    save_summary_report(df, stats=stats)
 
     # 完成
     elapsed_time = time.time() - start_time
@@ -649,10 +1359,23 @@ def main():
     print(f"\n{'=' * 80}")
     print("✅ 所有任务完成！")
     print(f"{'=' * 80}")
-    print(f"总材料数: {len(df)}")
+    print(f"总材料数: {stats.total}（{stats.n_categories} 个类别）")
     print(f"总耗时: {elapsed_time:.1f} 秒 ({elapsed_time / 60:.1f} 分钟)")
+    stats = client.stats()
+    print(
+        f"网络请求: {stats['requests']} 次（重试 {stats['retries']}，"
+        f"限流 {stats['throttled']}，当前并发上限 {stats['concurrency']}）"
+    )
+    if client.cache is not None:
+        stats = client.cache.stats()
+        print(
+            f"本地缓存: 命中 {stats['hits']} / 未命中 {stats['misses']}"
+            f"（过期 {stats['expired']}，淘汰 {stats['evictions']}，"
+            f"共 {stats['entries']} 条 {stats['bytes'] / 1024 / 1024:.1f} MB）"
+        )
     print(f"Excel文件: {excel_file}")
     print(f"JSON文件: {json_file}")
+    print(f"本地数据库: {STORE_FILE}")
     print("摘要报告: 主流半导体材料数据摘要.txt")
     print(f"{'=' * 80}")
 